@@ -3,22 +3,53 @@
 from __future__ import annotations
 
 import argparse
+import glob
 import json
-import statistics
+import os
 import sys
+import time
+from dataclasses import dataclass, field
+from functools import partial
 from datetime import UTC, datetime
 from pathlib import Path
-from typing import Any, Iterable
+from typing import Any, Callable, Iterable, Iterator, Sequence
 
-try:
-    import joblib
-except ModuleNotFoundError:  # pragma: no cover - dépendance optionnelle
-    joblib = None  # type: ignore
-
-from feature_engineering import HostFeatures, extract_features_from_scan
+from feature_engineering import (
+    FEATURE_NAMES,
+    FeatureMatrix,
+    FeatureSnapshotWriter,
+    HostFeatures,
+    ScriptFindingsRef,
+    extract_features_from_host,
+    load_scan_payload,
+    save_feature_snapshot,
+)
+from audit_store import open_audit_store
+from event_log import DEFAULT_FSYNC, FSYNC_POLICIES, EventLogWriter
+from feature_cache import FeatureCache, host_cache_key, xml_host_cache_key
+from history_store import RISK_LEVELS, SnapshotAccumulator, build_snapshot, open_history_store
+from lazy_imports import optional_import
 from lime_explainer import explain_with_lime
-from shap_explainer import explain_with_shap
-from ti_enricher import ThreatIntelClient
+from rule_pack import get_rule_pack, load_rule_pack, set_rule_pack
+from parallel_extract import map_shared
+from pipeline_metrics import DEFAULT_METRICS_FILE, DEFAULT_METRICS_JSON, PipelineMetrics
+from scan_diff import (
+    ScanDiffState,
+    build_delta,
+    compare_fingerprints,
+    fingerprint_host,
+    fingerprint_xml_host,
+    scoring_signature,
+    target_key,
+)
+from scoring_client import DEFAULT_SOCKET, ScoringClient, ScoringUnavailable
+from shap_explainer import build_shap_explainer, explain_with_shap
+from ti_enricher import ThreatIntelClient, ThreatIntelResult
+from xml_features import (
+    extract_features_from_xml_host,
+    follow_features_from_xml,
+    iter_host_elements,
+)
 
 BASE_DIR = Path(__file__).resolve().parent
 DEFAULT_LOG = BASE_DIR / "logs/ia_events.log"
@@ -27,25 +58,47 @@ DEFAULT_MODEL = BASE_DIR / "models/model.pkl"
 LAST_FEATURES = BASE_DIR / "logs/last_features.json"
 SCAN_HISTORY = (BASE_DIR.parent / "audit/scan_history.json").resolve()
 DEFAULT_TI_CACHE = BASE_DIR / "logs/ti_cache.json"
-
-FEATURE_NAMES = [
-    "open_ports",
-    "risky_services",
-    "cve_count",
-    "has_anonymous_ftp",
-    "has_default_http_admin",
-    "max_cvss",
-    "avg_cvss",
-]
-
+DEFAULT_DELTA_LOG = BASE_DIR / "logs/scan_deltas.log"
+# Formats de rapport acceptés en mode lot, par ordre de préférence quand un même
+# scan existe sous plusieurs formats (run_scan.sh garde le XML et le JSON).
+REPORT_SUFFIXES = (".xml", ".msgpack", ".jsonl", ".json")
+# Lignes par appel à predict_proba (borne la mémoire des très gros scans).
+PREDICT_CHUNK_SIZE = 50_000
+# Au-delà, le parcours Cython de sklearn (~7 µs/hôte contre ~30) rattrape son
+# import (~1,5 s) face à la forêt compilée : le modèle source est chargé pour ce lot.
+PACKED_FOREST_MAX_ROWS = 50_000
+# Hôtes par micro-lot en mode flux (--stream-batch) : borne la mémoire du pipeline.
+DEFAULT_STREAM_BATCH = 512
+# Niveau de risque minimal expliqué par SHAP/LIME : les hôtes "low", la grande
+# majorité d'un parc, ne sont pas expliqués (--explain-min-level low pour tout expliquer).
+DEFAULT_EXPLAIN_LEVEL = "medium"
+# Explainers SHAP sérialisés par empreinte de modèle (évite de reconvertir les arbres à chaque run).
+DEFAULT_SHAP_CACHE = BASE_DIR / "logs/shap_cache"
 
 class ModelUnavailable(RuntimeError):
     """Indique qu'aucun modèle ML n'est accessible."""
 
 
 def load_model(model_path: Path):
+    """Modèle de ``model_path`` ; la forêt compilée associée est préférée si elle est à jour.
+
+    Une forêt compilée (``forest_eval.py``) évite d'importer scikit-learn pour scorer.
+    NumPy, joblib et sklearn ne sont importés qu'ici, une fois le modèle trouvé.
+    """
+
     if not model_path.exists():
         raise ModelUnavailable(f"Modèle introuvable: {model_path}")
+    from forest_eval import load_matching_packed_forest, load_packed_forest
+
+    if model_path.suffix == ".npz":
+        try:
+            return load_packed_forest(model_path)
+        except (OSError, KeyError, ValueError) as exc:
+            raise ModelUnavailable(f"Forêt compilée illisible ({model_path}) : {exc}") from exc
+    packed = load_matching_packed_forest(model_path)
+    if packed is not None:
+        return packed
+    joblib = optional_import("joblib")
     if joblib is None:
         raise ModelUnavailable("joblib/scikit-learn non installés dans l'environnement IA")
     return joblib.load(model_path)
@@ -79,32 +132,62 @@ def heuristic_score(features: HostFeatures) -> tuple[int, list[str]]:
         score += 10
         reasons.append("Panneaux d'administration HTTP accessibles")
 
+    rules = get_rule_pack().by_id
+    for column, rule_ids in features.signatures.items():
+        # Une colonne compte une fois, avec le poids de sa règle la plus sévère (0 : simple signalement).
+        weight = max((rules[rule_id].weight for rule_id in rule_ids if rule_id in rules), default=0)
+        if weight:
+            score += weight
+            reasons.append(f"Signatures {column} : {', '.join(rule_ids)}")
+
     score = max(0, min(100, score))
     return score, reasons
 
 
-def feature_vector(features: HostFeatures) -> list[float]:
-    return [
-        float(features.open_ports),
-        float(features.risky_services),
-        float(features.cve_count),
-        float(int(features.has_anonymous_ftp)),
-        float(int(features.has_default_http_admin)),
-        float(features.max_cvss),
-        float(features.avg_cvss),
-    ]
+def predict_critical_proba(model: Any, values: Any, *, chunk_size: int = PREDICT_CHUNK_SIZE) -> list[float]:
+    """Probabilité de la classe critique pour chaque ligne de ``values``.
+
+    Un seul ``predict_proba`` par tranche de ``chunk_size`` lignes : la validation
+    et la répartition sur les arbres sklearn ne sont payées qu'une fois par tranche.
+    """
+
+    from forest_eval import PackedForest
+
+    if isinstance(model, PackedForest) and len(values) > PACKED_FOREST_MAX_ROWS and model.source_path is not None:
+        try:
+            model = model.source_model()
+        except (ImportError, OSError, ValueError) as exc:
+            print(f"[WARN] Modèle source indisponible ({exc}) → forêt compilée", file=sys.stderr)
+    probabilities: list[float] = []
+    for start in range(0, len(values), chunk_size):
+        prediction = model.predict_proba(values[start : start + chunk_size])
+        probabilities.extend(float(row[-1]) for row in prediction)
+    return probabilities
 
 
-def score_with_model(model: Any, vector: list[float], features: HostFeatures) -> tuple[int, list[str]]:
-    prediction = model.predict_proba([vector])[0]
-    score = int(round(prediction[-1] * 100))
+def model_reasons(probability: float, features: HostFeatures) -> tuple[int, list[str]]:
     explanation = [
-        f"Modèle ML : probabilité {prediction[-1]:.2f} d'état critique",
+        f"Modèle ML : probabilité {probability:.2f} d'état critique",
         f"open_ports={features.open_ports}",
         f"risky_services={features.risky_services}",
         f"cve_count={features.cve_count}",
     ]
-    return score, explanation
+    return int(round(probability * 100)), explanation
+
+
+def score_with_model(model: Any, vector: Sequence[float], features: HostFeatures) -> tuple[int, list[str]]:
+    return model_reasons(predict_critical_proba(model, [vector])[0], features)
+
+
+def score_batch_with_model(
+    model: Any, features: Sequence[HostFeatures], matrix: FeatureMatrix
+) -> list[tuple[int, list[str]]]:
+    """Score de tous les hôtes de ``matrix`` (prédiction groupée, raisons assemblées ensuite)."""
+
+    return [
+        model_reasons(probability, host_features)
+        for probability, host_features in zip(predict_critical_proba(model, matrix.values), features)
+    ]
 
 
 def risk_label(score: int) -> str:
@@ -117,33 +200,57 @@ def risk_label(score: int) -> str:
     return "low"
 
 
+@dataclass(frozen=True)
+class ExplainPolicy:
+    """Hôtes expliqués par SHAP/LIME : niveau de risque minimal puis, avec ``top``, les N meilleurs scores."""
+
+    min_level: str = DEFAULT_EXPLAIN_LEVEL
+    top: int = 0
+
+    @property
+    def key(self) -> str:
+        return f"{self.min_level}:{self.top}"
+
+    def rows(
+        self,
+        scores: Sequence[tuple[int, list[str]]],
+        threat_intel: Sequence[ThreatIntelResult | None] | None = None,
+    ) -> list[int]:
+        """Positions des hôtes à expliquer, dans l'ordre du lot.
+
+        La sélection porte sur le score final, ajustement TI de ``threat_intel`` compris :
+        un hôte que la TI fait passer en ``high`` est expliqué comme les autres.
+        """
+
+        final = [
+            min(100, score + ti_data.score_adjustment) if threat_intel and (ti_data := threat_intel[pos]) else score
+            for pos, (score, _) in enumerate(scores)
+        ]
+        threshold = RISK_LEVELS.index(self.min_level)
+        rows = [pos for pos, score in enumerate(final) if RISK_LEVELS.index(risk_label(score)) >= threshold]
+        if self.top > 0 and len(rows) > self.top:
+            rows = sorted(sorted(rows, key=final.__getitem__, reverse=True)[: self.top])
+        return rows
+
+
 def persist_json_line(payload: dict[str, Any], path: Path) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
     with path.open("a", encoding="utf-8") as fh:
         fh.write(json.dumps(payload, ensure_ascii=False) + "\n")
 
 
-def update_audit_file(event: dict[str, Any], path: Path) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    if path.exists():
-        try:
-            history = json.loads(path.read_text(encoding="utf-8"))
-            if not isinstance(history, list):
-                history = []
-        except json.JSONDecodeError:
-            history = []
-    else:
-        history = []
-    history.append(event)
-    path.write_text(json.dumps(history, indent=2, ensure_ascii=False), encoding="utf-8")
+def update_audit_file(events: Sequence[dict[str, Any]], path: Path) -> None:
+    """Ajoute ``events`` au journal segmenté de ``path`` (``audit_store.py``).
 
+    Coût indépendant de l'historique ; le tableau JSON ``path`` lu par le
+    dashboard est régénéré par ``audit_store.py export``.
+    """
 
-def write_last_features(features: list[HostFeatures]) -> None:
-    LAST_FEATURES.parent.mkdir(parents=True, exist_ok=True)
-    LAST_FEATURES.write_text(
-        json.dumps([feat.to_dict() for feat in features], indent=2, ensure_ascii=False),
-        encoding="utf-8",
-    )
+    open_audit_store(path).append_many(events)
+
+
+def write_last_features(features: list[HostFeatures], path: Path = LAST_FEATURES) -> None:
+    save_feature_snapshot(features, path)
 
 
 def build_event(features: HostFeatures, scan_id: str, score: int, reasons: list[str]) -> dict[str, Any]:
@@ -166,32 +273,177 @@ def update_scan_history(
     history_path: Path,
     metadata: dict[str, Any],
 ) -> None:
+    """Ajoute l'instantané du scan à l'historique et à ses agrégats (``history_store.py``)."""
+
     if not history_path:
         return
-    history: list[dict[str, Any]] = []
-    if history_path.exists():
-        try:
-            history = json.loads(history_path.read_text(encoding="utf-8"))
-            if not isinstance(history, list):
-                history = []
-        except json.JSONDecodeError:
-            history = []
-
-    levels = {"low": 0, "medium": 0, "high": 0, "critical": 0}
-    for event in events:
-        level = (event.get("risk_level") or "low").lower()
-        levels[level] = levels.get(level, 0) + 1
-
-    snapshot = {
-        "scan_id": scan_id,
-        "timestamp": metadata.get("start") or datetime.now(tz=UTC).isoformat().replace("+00:00", "Z"),
-        "host_count": len(events),
-        "average_score": statistics.fmean(e.get("risk_score", 0) for e in events) if events else 0,
-        **levels,
-    }
-    history.append(snapshot)
-    history_path.parent.mkdir(parents=True, exist_ok=True)
-    history_path.write_text(json.dumps(history, indent=2), encoding="utf-8")
+    open_history_store(history_path).append(scan_snapshot(scan_id, events, metadata))
+
+
+def scan_timestamp(metadata: dict[str, Any]) -> str:
+    return metadata.get("start") or datetime.now(tz=UTC).isoformat().replace("+00:00", "Z")
+
+
+def scan_snapshot(scan_id: str, events: list[dict[str, Any]], metadata: dict[str, Any]) -> dict[str, Any]:
+    return build_snapshot(scan_id, events, scan_timestamp(metadata))
+
+
+BatchScorer = Callable[[Sequence[HostFeatures], FeatureMatrix], list[tuple[int, list[str]]]]
+
+
+def select_scorer(model_path: Path) -> tuple[Any, BatchScorer]:
+    """Retourne le modèle (ou ``None``) et une fonction de scoring par lot d'hôtes."""
+
+    try:
+        model = load_model(model_path)
+    except ModelUnavailable as exc:
+        print(f"[WARN] {exc} → utilisation de l'heuristique intégrée", file=sys.stderr)
+        return None, lambda feats, matrix: [heuristic_score(feat) for feat in feats]
+    return model, lambda feats, matrix: score_batch_with_model(model, feats, matrix)
+
+
+@dataclass
+class WarmPipeline:
+    """Modèle, client TI et explainer SHAP chargés une fois pour tous les rapports d'un lot.
+
+    ``analyse_report(..., pipeline=...)`` y accumule événements, instantanés
+    d'historique et features au lieu d'écrire l'audit, l'historique et
+    l'instantané de features : ``analyse_reports`` les écrit en une fois.
+    """
+
+    model: Any
+    scorer: BatchScorer
+    ti_client: ThreatIntelClient
+    shap_explainer: object | None = None
+    events: list[dict[str, Any]] = field(default_factory=list)
+    snapshots: list[dict[str, Any]] = field(default_factory=list)
+    features: list[HostFeatures] = field(default_factory=list)
+
+    @classmethod
+    def load(
+        cls,
+        model_path: Path,
+        *,
+        ti_cache: Path,
+        ti_offline: bool,
+        enable_shap: bool,
+        shap_cache: Path | None = None,
+    ) -> WarmPipeline:
+        model, scorer = select_scorer(model_path)
+        return cls(
+            model,
+            scorer,
+            ThreatIntelClient(cache_path=ti_cache, offline=ti_offline, autosave=False),
+            build_shap_explainer(model, model_path=model_path, cache_dir=shap_cache) if enable_shap else None,
+        )
+
+
+def build_host_event(
+    host_features: HostFeatures,
+    scan_id: str,
+    score: int,
+    reasons: list[str],
+    ti_client: ThreatIntelClient | None,
+    *,
+    shap_payload: list[dict[str, float]] | None = None,
+    lime_payload: list[dict[str, float]] | None = None,
+    threat_intel: ThreatIntelResult | None = None,
+    metrics: PipelineMetrics | None = None,
+) -> dict[str, Any]:
+    """Sans ``ti_client``, ``threat_intel`` (déjà calculé : ``enrich_hosts`` ou service de scoring) est utilisé."""
+
+    event = build_event(host_features, scan_id, score, reasons)
+    event["cves"] = host_features.cve_list
+    event["cvss"] = {"max": host_features.max_cvss, "avg": host_features.avg_cvss}
+    if host_features.signatures:
+        event["signatures"] = host_features.signatures
+    if shap_payload:
+        event["shap_top_features"] = shap_payload
+    if lime_payload:
+        event["lime_top_features"] = lime_payload
+    if ti_client is not None:
+        started = time.perf_counter()
+        ti_data = ti_client.enrich(event.get("host"), host_features.cve_list)
+        if metrics is not None:
+            metrics.add("ti", time.perf_counter() - started, 1)
+    else:
+        ti_data = threat_intel
+    if ti_data:
+        event["threat_intel"] = ti_data.to_dict()
+        event["risk_score"] = min(100, event["risk_score"] + ti_data.score_adjustment)
+        event["risk_level"] = risk_label(event["risk_score"])
+    return event
+
+
+def enrich_hosts(
+    features: Sequence[HostFeatures], ti_client: ThreatIntelClient, metrics: PipelineMetrics
+) -> list[ThreatIntelResult | None]:
+    """TI de chaque hôte, calculée avant les explications (sélection sur le score final)."""
+
+    with metrics.stage("ti", len(features)):
+        return [ti_client.enrich(feat.host or feat.hostname, feat.cve_list) for feat in features]
+
+
+def connect_scoring_service(socket_path: Path, model_path: Path) -> tuple[ScoringClient | None, str | None]:
+    """Client du service de scoring s'il sert le même modèle et le même pack de règles.
+
+    Retourne ``(client, empreinte du modèle servi ou None pour l'heuristique)`` ;
+    ``(None, None)`` si aucun service compatible n'est joignable.
+    """
+
+    client = ScoringClient.connect(socket_path)
+    if client is None:
+        return None, None
+    try:
+        status = client.status()
+        if Path(status.get("model_path") or "") != model_path.resolve():
+            raise ScoringUnavailable(f"le service sert {status.get('model_path')}")
+        if status.get("rule_pack") != get_rule_pack().digest:
+            raise ScoringUnavailable("pack de signatures différent")
+    except ScoringUnavailable as exc:
+        print(f"[WARN] {exc} → scoring dans le processus", file=sys.stderr)
+        client.close()
+        return None, None
+    return client, status.get("model")
+
+
+def iter_report_hosts(
+    report_path: Path, metadata: dict[str, Any], *, fingerprints: bool = False, cache_keys: bool = False
+) -> Iterator[tuple[str | None, dict[str, Any] | None, Callable[[], HostFeatures], str | None]]:
+    """Produit ``(adresse, empreinte, extracteur, clé de cache)`` pour chaque hôte du rapport.
+
+    L'extraction des features est différée : un hôte inchangé n'est jamais
+    extrait. Pour le XML, l'extracteur doit être appelé avant de passer à l'hôte
+    suivant (l'élément est ensuite libéré).
+    """
+
+    if report_path.suffix == ".xml":
+        for index, host_elem in enumerate(iter_host_elements(report_path, metadata)):
+            addr = host_elem.find("address")
+            hostname = host_elem.find("hostnames/hostname")
+            address = addr.attrib.get("addr") if addr is not None else None
+            if address is None and hostname is not None:
+                address = hostname.attrib.get("name")
+            yield (
+                address,
+                fingerprint_xml_host(host_elem) if fingerprints else None,
+                lambda elem=host_elem, ref=ScriptFindingsRef(report_path, index): (
+                    extract_features_from_xml_host(elem, ref)
+                ),
+                xml_host_cache_key(host_elem) if cache_keys else None,
+            )
+        return
+    payload = load_scan_payload(report_path)
+    source_metadata = payload.get("metadata") or {}
+    for index, host in enumerate(payload.get("hosts", [])):
+        metadata.update(source_metadata)
+        yield (
+            host.get("address") or host.get("hostname"),
+            fingerprint_host(host) if fingerprints else None,
+            lambda host=host, ref=ScriptFindingsRef(report_path, index): extract_features_from_host(host, ref),
+            host_cache_key(host) if cache_keys else None,
+        )
+    metadata.update(source_metadata)
 
 
 def analyse_report(
@@ -205,71 +457,940 @@ def analyse_report(
     enable_shap: bool,
     enable_lime: bool,
     ti_offline: bool,
+    features_path: Path = LAST_FEATURES,
+    diff_state: Path | None = None,
+    delta_log: Path = DEFAULT_DELTA_LOG,
+    diff_max_age: float | None = None,
+    workers: int = 1,
+    chunk_size: int | None = None,
+    feature_cache: Path | None = None,
+    scoring_socket: Path | None = None,
+    event_log_fsync: str = DEFAULT_FSYNC,
+    explain: ExplainPolicy = ExplainPolicy(),
+    shap_cache: Path | None = None,
+    pipeline: WarmPipeline | None = None,
+    metrics: PipelineMetrics | None = None,
 ) -> list[dict[str, Any]]:
-    payload = json.loads(report_path.read_text(encoding="utf-8"))
-    features = extract_features_from_scan(payload)
-    write_last_features(features)
-    feature_vectors = [feature_vector(feat) for feat in features]
-    try:
-        model = load_model(model_path)
-        scorer = lambda feat, vec: score_with_model(model, vec, feat)
-    except ModelUnavailable as exc:
-        print(f"[WARN] {exc} → utilisation de l'heuristique intégrée", file=sys.stderr)
-        model = None
-        scorer = lambda feat, vec: heuristic_score(feat)
+    """Analyse un rapport complet.
 
-    events: list[dict[str, Any]] = []
+    Avec ``diff_state``, le rapport est comparé au dernier scan du même périmètre :
+    les hôtes dont l'empreinte est inchangée reprennent leur événement précédent
+    (ni extraction, ni scoring, ni XAI, ni TI) et un enregistrement delta est
+    ajouté à ``delta_log``.
+
+    Avec ``workers`` ≠ 1 (0 = tous les CPU), l'extraction des hôtes à scorer est
+    répartie sur un pool de processus (rapports JSON/JSONL/msgpack uniquement ;
+    le XML est extrait au fil de l'eau et reste séquentiel).
+
+    Avec ``feature_cache``, les features d'un hôte au contenu identique à un run
+    précédent sont relues du cache au lieu d'être ré-extraites.
+
+    Avec ``scoring_socket``, le scoring, SHAP/LIME et la TI sont délégués au
+    service résident ``scoring_daemon.py`` s'il écoute (modèle déjà chargé) ;
+    sinon, ou en cas d'erreur, ils sont faits dans le processus.
+
+    Les événements sont écrits par lots dans ``log_path`` (``event_log.py``,
+    synchronisation disque selon ``event_log_fsync``).
+
+    SHAP et LIME ne portent que sur les hôtes retenus par ``explain`` ; l'explainer
+    SHAP est repris de ``shap_cache`` quand le modèle n'a pas changé.
+
+    Avec ``pipeline`` (mode lot), le modèle, la TI et l'explainer SHAP partagés
+    sont utilisés et les sorties consolidées y sont accumulées (voir
+    ``WarmPipeline``) ; ``scoring_socket`` est alors ignoré.
+
+    Le temps de chaque étape et les accès aux caches sont ajoutés à ``metrics``
+    (``pipeline_metrics.py``), que l'appelant écrit en fin de run.
+    """
+
+    metrics = metrics if metrics is not None else PipelineMetrics()
+    client, remote_model = (
+        connect_scoring_service(scoring_socket, model_path)
+        if scoring_socket is not None and pipeline is None
+        else (None, None)
+    )
+    if pipeline is not None:
+        model, scorer = pipeline.model, pipeline.scorer
+    elif client is None:
+        with metrics.stage("model"):
+            model, scorer = select_scorer(model_path)
+    else:
+        model, scorer = None, None
     scan_id = report_path.stem
-    shap_payloads = (
-        explain_with_shap(model, feature_vectors, FEATURE_NAMES) if enable_shap else None
+    metadata: dict[str, Any] = {}
+    state = ScanDiffState(diff_state, max_age=diff_max_age) if diff_state is not None else None
+    signature = (
+        scoring_signature(
+            model_path,
+            model if client is None else remote_model,
+            enable_shap=enable_shap,
+            enable_lime=enable_lime,
+            ti_offline=ti_offline,
+            explain=explain.key,
+        )
+        if state is not None
+        else ""
     )
-    lime_payloads = (
-        explain_with_lime(model, feature_vectors, FEATURE_NAMES) if enable_lime else None
+    key: str | None = None
+    previous_scan_id: str | None = None
+    previous: dict[str, dict[str, Any]] = {}
+    reusable = False
+
+    features: list[HostFeatures] = []
+    host_keys: list[tuple[str | None, dict[str, Any] | None]] = []
+    reused: dict[int, dict[str, Any]] = {}
+    fresh: list[int] = []
+    added: list[dict[str, Any]] = []
+    changed: list[dict[str, Any]] = []
+    unchanged = 0
+    seen: dict[str, int] = {}
+    deferred = workers != 1 and report_path.suffix != ".xml"
+    pending: list[tuple[int, Callable[[], HostFeatures], str | None]] = []
+    cache = FeatureCache(feature_cache) if feature_cache is not None else None
+
+    for address, fingerprint, extract, cache_key in metrics.timed_iter(
+        "parse",
+        iter_report_hosts(report_path, metadata, fingerprints=state is not None, cache_keys=cache is not None),
+    ):
+        if address is not None:
+            # Une même adresse peut apparaître plusieurs fois (plusieurs passes Nmap).
+            seen[address] = seen.get(address, 0) + 1
+            if seen[address] > 1:
+                address = f"{address}#{seen[address]}"
+        if state is not None and key is None:
+            key = target_key(metadata)
+            previous_scan_id, previous, reusable = state.baseline(key, signature)
+        prior = previous.pop(address, None) if address is not None else None
+        if prior is not None and fingerprint is not None and prior["fingerprint"]["digest"] == fingerprint["digest"]:
+            unchanged += 1
+            if state is not None and reusable and state.is_fresh(prior):
+                reused[len(features)] = prior
+                features.append(HostFeatures.from_dict(prior["features"]))
+                host_keys.append((address, fingerprint))
+                continue
+        elif state is not None:
+            if prior is None:
+                added.append({"host": address})
+            else:
+                changed.append(
+                    {
+                        "host": address,
+                        **compare_fingerprints(prior["fingerprint"], fingerprint),
+                        "previous_risk_score": prior["event"].get("risk_score"),
+                    }
+                )
+        fresh.append(len(features))
+        host_keys.append((address, fingerprint))
+        with metrics.stage("features", 1):
+            cached = cache.get(cache_key) if cache is not None and cache_key is not None else None
+            if cached is not None:
+                features.append(cached)
+            elif deferred:
+                pending.append((len(features), extract, cache_key))
+                features.append(None)  # type: ignore[arg-type]  # rempli après l'extraction parallèle
+            else:
+                features.append(extract())
+                if cache is not None and cache_key is not None:
+                    cache.put(cache_key, features[-1])
+
+    if pending:
+        with metrics.stage("features"):
+            extracted = map_shared([extract for _, extract, _ in pending], workers=workers, chunk_size=chunk_size)
+            for (idx, _, cache_key), host_features in zip(pending, extracted):
+                features[idx] = host_features
+                if cache is not None and cache_key is not None:
+                    cache.put(cache_key, host_features)
+    if cache is not None:
+        with metrics.stage("features"):
+            cache.close()
+        stats = cache.stats()
+        metrics.cache("features", stats["hits"], stats["misses"])
+        print(
+            f"[INFO] Cache features : {stats['hits']} réutilisé(s), {stats['misses']} extrait(s) "
+            f"({stats['hit_rate']:.0%})"
+        )
+
+    if state is not None:
+        metrics.cache("diff", len(reused), len(fresh))
+    if pipeline is None:
+        with metrics.stage("last_features"):
+            write_last_features(features, features_path)
+    fresh_features = [features[idx] for idx in fresh]
+    matrix = FeatureMatrix.from_features(fresh_features)
+    remote: list[dict[str, Any]] | None = None
+    if client is not None:
+        # Le service fait aussi SHAP/LIME et la TI : tout est imputé au scoring.
+        try:
+            with metrics.stage("score", len(fresh_features)):
+                remote = client.score(
+                    fresh_features,
+                    enable_shap=enable_shap,
+                    enable_lime=enable_lime,
+                    ti_cache=ti_cache,
+                    ti_offline=ti_offline,
+                    explain_min_level=explain.min_level,
+                    explain_top=explain.top,
+                )
+        except ScoringUnavailable as exc:
+            print(f"[WARN] {exc} → scoring dans le processus", file=sys.stderr)
+        finally:
+            client.close()
+    if remote is None:
+        if scorer is None:
+            with metrics.stage("model"):
+                model, scorer = select_scorer(model_path)
+        with metrics.stage("score", len(fresh_features)):
+            scores = scorer(fresh_features, matrix)
+        ti_client = (
+            pipeline.ti_client
+            if pipeline is not None
+            else ThreatIntelClient(cache_path=ti_cache, offline=ti_offline)
+        )
+        ti_hits, ti_misses = ti_client.hits, ti_client.misses
+        threat_intel = enrich_hosts(fresh_features, ti_client, metrics)
+        metrics.cache("ti", ti_client.hits - ti_hits, ti_client.misses - ti_misses)
+        rows = explain.rows(scores, threat_intel) if enable_shap or enable_lime else []
+        shap_payloads = None
+        if enable_shap and rows:
+            with metrics.stage("shap", len(rows)):
+                shap_payloads = explain_with_shap(
+                    model,
+                    matrix.values,
+                    FEATURE_NAMES,
+                    explainer=(
+                        pipeline.shap_explainer
+                        if pipeline is not None
+                        else build_shap_explainer(model, model_path=model_path, cache_dir=shap_cache)
+                    ),
+                    rows=rows,
+                )
+        lime_payloads = None
+        if enable_lime and rows:
+            with metrics.stage("lime", len(rows)):
+                lime_payloads = explain_with_lime(model, matrix.values, FEATURE_NAMES, rows=rows)
+    else:
+        scores = [(result["score"], result["reasons"]) for result in remote]
+        shap_payloads = [result["shap"] for result in remote] if enable_shap else None
+        lime_payloads = [result["lime"] for result in remote] if enable_lime else None
+        threat_intel = [result["threat_intel"] for result in remote]
+    fresh_position = {idx: pos for pos, idx in enumerate(fresh)}
+
+    events: list[dict[str, Any]] = []
+    entries: dict[str, dict[str, Any]] = {}
+    started = time.perf_counter()
+    with EventLogWriter(log_path, fsync=event_log_fsync) as event_log:
+        for idx, host_features in enumerate(features):
+            address, fingerprint = host_keys[idx]
+            if idx in reused:
+                prior = reused[idx]
+                event = dict(prior["event"])
+                event["timestamp"] = datetime.now(tz=UTC).isoformat().replace("+00:00", "Z")
+                event["scan_id"] = scan_id
+                event["reused_from"] = prior["scan_id"]
+                entry = prior
+            else:
+                pos = fresh_position[idx]
+                score, reasons = scores[pos]
+                event = build_host_event(
+                    host_features,
+                    scan_id,
+                    score,
+                    reasons,
+                    None,
+                    shap_payload=shap_payloads[pos] if shap_payloads else None,
+                    lime_payload=lime_payloads[pos] if lime_payloads else None,
+                    threat_intel=threat_intel[pos],
+                )
+                entry = {
+                    "fingerprint": fingerprint,
+                    "features": dict(host_features.to_dict(), cve_list=host_features.cve_list),
+                    "event": event,
+                    "scan_id": scan_id,
+                    "scored_at": time.time(),
+                }
+            events.append(event)
+            event_log.write(event)
+            if state is not None and address is not None:
+                entries[address] = entry
+    metrics.add("events", time.perf_counter() - started, len(events))
+    if pipeline is not None:
+        pipeline.events.extend(events)
+        pipeline.snapshots.append(scan_snapshot(scan_id, events, metadata))
+        pipeline.features.extend(features)
+    else:
+        with metrics.stage("audit", len(events)):
+            update_audit_file(events, audit_path)
+        if scan_history is not None:
+            with metrics.stage("history", len(events)):
+                update_scan_history(scan_id, events, scan_history, metadata)
+
+    if state is not None:
+        with metrics.stage("diff"):
+            if key is None:
+                key = target_key(metadata)
+                previous_scan_id, previous, _ = state.baseline(key, signature)
+            removed = [
+                {"host": address, "previous_risk_score": prior["event"].get("risk_score")}
+                for address, prior in previous.items()
+            ]
+            for item in changed:
+                item["risk_score"] = entries[item["host"]]["event"].get("risk_score")
+            delta = build_delta(
+                scan_id,
+                previous_scan_id,
+                key,
+                added=added,
+                removed=removed,
+                changed=changed,
+                unchanged=unchanged,
+            )
+            persist_json_line(delta, delta_log)
+            state.commit(key, scan_id, signature, entries)
+            state.save()
+            print(
+                f"[INFO] Différentiel : {len(added)} nouveau(x), {len(changed)} modifié(s), "
+                f"{len(removed)} disparu(s), {unchanged} inchangé(s) dont {len(reused)} repris sans re-scoring"
+            )
+    metrics.reports += 1
+    metrics.total_hosts += len(events)
+    return events
+
+
+def iter_feature_batches(
+    report_path: Path,
+    metadata: dict[str, Any],
+    batch_size: int,
+    metrics: PipelineMetrics,
+    *,
+    cache: FeatureCache | None = None,
+) -> Iterator[list[HostFeatures]]:
+    """Features du rapport par lots de ``batch_size`` hôtes, extraites au fil de la lecture."""
+
+    batch: list[HostFeatures] = []
+    hosts = iter_report_hosts(report_path, metadata, cache_keys=cache is not None)
+    for _, _, extract, cache_key in metrics.timed_iter("parse", hosts):
+        with metrics.stage("features", 1):
+            host_features = cache.get(cache_key) if cache is not None and cache_key is not None else None
+            if host_features is None:
+                host_features = extract()
+                if cache is not None and cache_key is not None:
+                    cache.put(cache_key, host_features)
+        batch.append(host_features)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+ScoredBatch = tuple[
+    list[HostFeatures], list[tuple[int, list[str]]], list[ThreatIntelResult | None], list[Any] | None, list[Any] | None
+]
+
+
+def iter_scored_batches(
+    batches: Iterable[list[HostFeatures]],
+    model: Any,
+    scorer: BatchScorer,
+    ti_client: ThreatIntelClient,
+    metrics: PipelineMetrics,
+    *,
+    enable_shap: bool,
+    enable_lime: bool,
+    shap_explainer: object | None = None,
+    explain: ExplainPolicy = ExplainPolicy(),
+) -> Iterator[ScoredBatch]:
+    """Score, enrichit (TI) et explique chaque lot.
+
+    LIME prend le lot courant comme fond, ``explain.top`` vaut par lot.
+    """
+
+    for batch in batches:
+        matrix = FeatureMatrix.from_features(batch)
+        with metrics.stage("score", len(batch)):
+            scores = scorer(batch, matrix)
+        threat_intel = enrich_hosts(batch, ti_client, metrics)
+        rows = explain.rows(scores, threat_intel) if enable_shap or enable_lime else []
+        shap_payloads = lime_payloads = None
+        if enable_shap and rows:
+            with metrics.stage("shap", len(rows)):
+                shap_payloads = explain_with_shap(
+                    model, matrix.values, FEATURE_NAMES, explainer=shap_explainer, rows=rows
+                )
+        if enable_lime and rows:
+            with metrics.stage("lime", len(rows)):
+                lime_payloads = explain_with_lime(model, matrix.values, FEATURE_NAMES, rows=rows)
+        yield batch, scores, threat_intel, shap_payloads, lime_payloads
+
+
+def iter_event_batches(
+    scored: Iterable[ScoredBatch],
+    scan_id: str,
+    metrics: PipelineMetrics,
+) -> Iterator[tuple[list[HostFeatures], list[dict[str, Any]]]]:
+    """Événements de chaque lot (TI déjà calculée), avec les features correspondantes."""
+
+    for batch, scores, threat_intel, shap_payloads, lime_payloads in scored:
+        with metrics.stage("events", len(batch)):
+            events = [
+                build_host_event(
+                    host_features,
+                    scan_id,
+                    score,
+                    reasons,
+                    None,
+                    shap_payload=shap_payloads[pos] if shap_payloads else None,
+                    lime_payload=lime_payloads[pos] if lime_payloads else None,
+                    threat_intel=threat_intel[pos],
+                )
+                for pos, (host_features, (score, reasons)) in enumerate(zip(batch, scores))
+            ]
+        yield batch, events
+
+
+def stream_report(
+    report_path: Path,
+    model_path: Path,
+    log_path: Path,
+    audit_path: Path,
+    *,
+    scan_history: Path | None,
+    ti_cache: Path,
+    enable_shap: bool,
+    enable_lime: bool,
+    ti_offline: bool,
+    features_path: Path = LAST_FEATURES,
+    batch_size: int = DEFAULT_STREAM_BATCH,
+    feature_cache: Path | None = None,
+    event_log_fsync: str = DEFAULT_FSYNC,
+    explain: ExplainPolicy = ExplainPolicy(),
+    shap_cache: Path | None = None,
+    metrics: PipelineMetrics | None = None,
+) -> int:
+    """Analyse un rapport en flux : seul le micro-lot courant est en mémoire.
+
+    Les hôtes traversent extraction, scoring/XAI, TI et émission par lots de
+    ``batch_size`` (générateurs ``iter_*_batches``) ; chaque lot terminé est
+    écrit dans ``log_path``, l'audit et l'instantané de features avant de lire
+    la suite. L'instantané d'historique est cumulé au fil des lots. La mémoire
+    dépend de ``batch_size``, pas du nombre d'hôtes, pour les rapports XML,
+    JSONL et msgpack (un ``.json`` reste chargé en entier). Renvoie le nombre
+    d'hôtes analysés.
+    """
+
+    metrics = metrics if metrics is not None else PipelineMetrics("stream")
+    with metrics.stage("model"):
+        model, scorer = select_scorer(model_path)
+        shap_explainer = (
+            build_shap_explainer(model, model_path=model_path, cache_dir=shap_cache) if enable_shap else None
+        )
+    ti_client = ThreatIntelClient(cache_path=ti_cache, offline=ti_offline, autosave=False)
+    cache = FeatureCache(feature_cache) if feature_cache is not None else None
+    audit = open_audit_store(audit_path)
+    snapshot = SnapshotAccumulator()
+    metadata: dict[str, Any] = {}
+
+    batches = iter_feature_batches(report_path, metadata, batch_size, metrics, cache=cache)
+    scored = iter_scored_batches(
+        batches,
+        model,
+        scorer,
+        ti_client,
+        metrics,
+        enable_shap=enable_shap,
+        enable_lime=enable_lime,
+        shap_explainer=shap_explainer,
+        explain=explain,
     )
+    with EventLogWriter(log_path, fsync=event_log_fsync) as event_log, FeatureSnapshotWriter(features_path) as snap:
+        for batch, events in iter_event_batches(scored, report_path.stem, metrics):
+            with metrics.stage("events"):
+                event_log.write_many(events)
+                event_log.flush()
+            with metrics.stage("audit", len(events)):
+                audit.append_many(events)
+            with metrics.stage("last_features"):
+                snap.write_many(batch)
+            snapshot.add(events)
+
+    if cache is not None:
+        with metrics.stage("features"):
+            cache.close()
+        stats = cache.stats()
+        metrics.cache("features", stats["hits"], stats["misses"])
+    with metrics.stage("ti"):
+        ti_client.save()
+    metrics.cache("ti", ti_client.hits, ti_client.misses)
+    if scan_history is not None:
+        with metrics.stage("history", snapshot.host_count):
+            open_history_store(scan_history).append(snapshot.snapshot(report_path.stem, scan_timestamp(metadata)))
+    metrics.reports += 1
+    metrics.total_hosts += snapshot.host_count
+    return snapshot.host_count
+
+
+def expand_reports(sources: Sequence[Path]) -> list[Path]:
+    """Rapports désignés par des fichiers, dossiers ou motifs glob (``reports/*.json``).
+
+    Dossiers et motifs ne retiennent que les ``REPORT_SUFFIXES`` et un seul format
+    par scan ; l'ordre est celui des noms (horodatés par ``run_scan.sh``).
+    """
+
+    reports: list[Path] = []
+    for source in sources:
+        if source.is_dir():
+            candidates = [path for path in source.iterdir() if path.is_file()]
+        elif any(char in str(source) for char in "*?["):
+            candidates = [Path(match) for match in glob.glob(str(source)) if Path(match).is_file()]
+        else:
+            reports.append(source)
+            continue
+        by_scan: dict[Path, Path] = {}
+        for path in candidates:
+            if path.suffix not in REPORT_SUFFIXES:
+                continue
+            current = by_scan.get(path.with_suffix(""))
+            if current is None or REPORT_SUFFIXES.index(path.suffix) < REPORT_SUFFIXES.index(current.suffix):
+                by_scan[path.with_suffix("")] = path
+        reports.extend(sorted(by_scan.values()))
+    return list(dict.fromkeys(reports))
+
+
+def _analyse_batch_report(report_path: Path, *args: Any, **kwargs: Any) -> str | None:
+    """Un rapport du lot ; renvoie l'erreur au lieu d'interrompre tout le lot."""
+
+    try:
+        analyse_report(report_path, *args, **kwargs)
+    except Exception as exc:  # noqa: BLE001 - un rapport illisible ne bloque pas les autres
+        print(f"[ERREUR] {report_path} : {exc}", file=sys.stderr)
+        return f"{report_path}: {exc}"
+    return None
+
+
+def analyse_reports(
+    report_paths: Sequence[Path],
+    model_path: Path,
+    log_path: Path,
+    audit_path: Path,
+    *,
+    scan_history: Path | None,
+    ti_cache: Path,
+    enable_shap: bool,
+    enable_lime: bool,
+    ti_offline: bool,
+    features_path: Path = LAST_FEATURES,
+    workers: int = 1,
+    metrics: PipelineMetrics | None = None,
+    **options: Any,
+) -> tuple[list[dict[str, Any]], list[str]]:
+    """Analyse plusieurs rapports dans un seul processus (re-scoring d'un arriéré).
+
+    Le modèle, le client TI et l'explainer SHAP sont chargés une seule fois
+    (``WarmPipeline``). Avec ``workers`` ≠ 1 et sans ``diff_state`` (état partagé
+    d'un rapport à l'autre), les rapports sont répartis sur des processus forkés
+    qui héritent du pipeline déjà chargé ; sinon ils sont analysés l'un après
+    l'autre (``workers`` sert alors à l'extraction de chaque rapport). Audit,
+    historique, cache TI et instantané de features sont écrits une fois, à la
+    fin, dans l'ordre des rapports. Renvoie les événements et les erreurs.
+    Les mesures des workers sont fusionnées dans ``metrics``.
+    """
+
+    metrics = metrics if metrics is not None else PipelineMetrics("batch")
+    with metrics.stage("model"):
+        pipeline = WarmPipeline.load(
+            model_path,
+            ti_cache=ti_cache,
+            ti_offline=ti_offline,
+            enable_shap=enable_shap,
+            shap_cache=options.get("shap_cache"),
+        )
+    common: dict[str, Any] = dict(
+        scan_history=scan_history,
+        ti_cache=ti_cache,
+        enable_shap=enable_shap,
+        enable_lime=enable_lime,
+        ti_offline=ti_offline,
+        features_path=features_path,
+        pipeline=pipeline,
+        **options,
+    )
+    errors: list[str] = []
+    if workers != 1 and options.get("diff_state") is None and len(report_paths) > 1:
+
+        def run(report_path: Path) -> tuple[Any, ...]:
+            # Dans le worker : sorties de ce seul rapport, renvoyées au parent.
+            pipeline.events, pipeline.snapshots, pipeline.features = [], [], []
+            worker_metrics = PipelineMetrics("batch")
+            error = _analyse_batch_report(
+                report_path, model_path, log_path, audit_path, workers=1, metrics=worker_metrics, **common
+            )
+            entries = pipeline.ti_client.take_pending_entries()
+            return error, pipeline.events, pipeline.snapshots, pipeline.features, entries, worker_metrics
+
+        results = map_shared([partial(run, path) for path in report_paths], workers=workers, chunk_size=1, min_tasks=2)
+        pipeline.events, pipeline.snapshots, pipeline.features = [], [], []
+        for error, events, snapshots, features, entries, worker_metrics in results:
+            if error is not None:
+                errors.append(error)
+            metrics.merge(worker_metrics)
+            pipeline.events.extend(events)
+            pipeline.snapshots.extend(snapshots)
+            pipeline.features.extend(features)
+            pipeline.ti_client.merge(entries)
+    else:
+        for report_path in report_paths:
+            error = _analyse_batch_report(
+                report_path, model_path, log_path, audit_path, workers=workers, metrics=metrics, **common
+            )
+            if error is not None:
+                errors.append(error)
+
+    metrics.errors = len(errors)
+    with metrics.stage("audit", len(pipeline.events)):
+        update_audit_file(pipeline.events, audit_path)
+    if scan_history is not None and pipeline.snapshots:
+        with metrics.stage("history", len(pipeline.events)):
+            open_history_store(scan_history).append_many(pipeline.snapshots)
+    with metrics.stage("ti"):
+        pipeline.ti_client.save()
+    with metrics.stage("last_features"):
+        write_last_features(pipeline.features, features_path)
+    return pipeline.events, errors
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def follow_report(
+    xml_path: Path,
+    model_path: Path,
+    log_path: Path,
+    audit_path: Path,
+    *,
+    scan_history: Path | None,
+    ti_cache: Path,
+    enable_shap: bool,
+    ti_offline: bool,
+    features_path: Path = LAST_FEATURES,
+    poll_interval: float = 1.0,
+    idle_timeout: float | None = None,
+    follow_pid: int | None = None,
+    event_log_fsync: str = DEFAULT_FSYNC,
+    explain: ExplainPolicy = ExplainPolicy(),
+    shap_cache: Path | None = None,
+    metrics: PipelineMetrics | None = None,
+) -> list[dict[str, Any]]:
+    """Analyse un XML Nmap en cours d'écriture : chaque hôte est journalisé dès sa fin.
+
+    LIME est ignoré dans ce mode (il a besoin de l'ensemble du scan comme fond).
+    SHAP suit ``explain.min_level`` ; ``explain.top`` n'a pas de sens hôte par hôte.
+    L'attente de nouveaux hôtes n'est imputée à aucune étape de ``metrics``.
+    """
+
+    metrics = metrics if metrics is not None else PipelineMetrics("follow")
+    with metrics.stage("model"):
+        model, scorer = select_scorer(model_path)
+        shap_explainer = (
+            build_shap_explainer(model, model_path=model_path, cache_dir=shap_cache) if enable_shap else None
+        )
+    explain = ExplainPolicy(explain.min_level)
     ti_client = ThreatIntelClient(cache_path=ti_cache, offline=ti_offline)
+    scan_id = xml_path.stem
+    metadata: dict[str, Any] = {}
+    features: list[HostFeatures] = []
+    events: list[dict[str, Any]] = []
+    should_stop = (lambda: not _pid_alive(follow_pid)) if follow_pid else None
 
-    for idx, host_features in enumerate(features):
-        vector = feature_vectors[idx]
-        score, reasons = scorer(host_features, vector)
-        event = build_event(host_features, scan_id, score, reasons)
-        event["cves"] = host_features.cve_list
-        event["cvss"] = {"max": host_features.max_cvss, "avg": host_features.avg_cvss}
-        if shap_payloads and shap_payloads[idx]:
-            event["shap_top_features"] = shap_payloads[idx]
-        if lime_payloads and lime_payloads[idx]:
-            event["lime_top_features"] = lime_payloads[idx]
-        ti_data = ti_client.enrich(event.get("host"), host_features.cve_list)
-        if ti_data:
-            event["threat_intel"] = ti_data.to_dict()
-            event["risk_score"] = min(100, event["risk_score"] + ti_data.score_adjustment)
-            event["risk_level"] = risk_label(event["risk_score"])
-        events.append(event)
-        persist_json_line(event, log_path)
-    for event in events:
-        update_audit_file(event, audit_path)
+    # Hôtes au compte-gouttes : chaque événement est écrit dès qu'il est prêt (max_delay=0).
+    with EventLogWriter(log_path, max_delay=0, fsync=event_log_fsync) as event_log:
+        for host_features in follow_features_from_xml(
+            xml_path,
+            metadata,
+            poll_interval=poll_interval,
+            idle_timeout=idle_timeout,
+            should_stop=should_stop,
+        ):
+            with metrics.stage("score", 1):
+                matrix = FeatureMatrix.from_features([host_features])
+                score, reasons = scorer([host_features], matrix)[0]
+            threat_intel = enrich_hosts([host_features], ti_client, metrics)
+            shap_payloads = None
+            if enable_shap and explain.rows([(score, reasons)], threat_intel):
+                with metrics.stage("shap", 1):
+                    shap_payloads = explain_with_shap(model, matrix.values, FEATURE_NAMES, explainer=shap_explainer)
+            with metrics.stage("events", 1):
+                event = build_host_event(
+                    host_features,
+                    scan_id,
+                    score,
+                    reasons,
+                    None,
+                    shap_payload=shap_payloads[0] if shap_payloads else None,
+                    threat_intel=threat_intel[0],
+                )
+                event_log.write(event)
+            with metrics.stage("audit", 1):
+                update_audit_file([event], audit_path)
+            print(f"[INFO] {event['host']} → {event['risk_level']} ({event['risk_score']})")
+            features.append(host_features)
+            events.append(event)
+
+    metrics.cache("ti", ti_client.hits, ti_client.misses)
+    with metrics.stage("last_features"):
+        write_last_features(features, features_path)
     if scan_history is not None:
-        update_scan_history(scan_id, events, scan_history, payload.get("metadata", {}))
+        with metrics.stage("history", len(events)):
+            update_scan_history(scan_id, events, scan_history, metadata)
+    metrics.reports += 1
+    metrics.total_hosts += len(events)
     return events
 
 
 def parse_args(argv: list[str]) -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Analyse IA d'un rapport Nmap JSON")
-    parser.add_argument("report", type=Path, help="Rapport JSON produit par parse_nmap.py")
+    parser.add_argument(
+        "report",
+        type=Path,
+        nargs="+",
+        help=(
+            "Rapport JSON/JSONL produit par parse_nmap.py ou XML Nmap brut (chemin rapide) ; "
+            "plusieurs rapports, un dossier ou un motif glob = mode lot (modèle chargé une fois)"
+        ),
+    )
     parser.add_argument("--model", type=Path, default=DEFAULT_MODEL)
     parser.add_argument("--log-file", type=Path, default=DEFAULT_LOG)
     parser.add_argument("--audit-file", type=Path, default=DEFAULT_AUDIT)
     parser.add_argument("--scan-history", type=Path, default=SCAN_HISTORY)
     parser.add_argument("--ti-cache", type=Path, default=DEFAULT_TI_CACHE)
+    parser.add_argument(
+        "--features-file",
+        type=Path,
+        default=LAST_FEATURES,
+        help="Instantané des features (.json indenté ou .npz compact)",
+    )
+    parser.add_argument(
+        "--rule-pack",
+        type=Path,
+        default=None,
+        help="Pack de signatures JSON (défaut : $SOC_RULE_PACK ou rules/default.json)",
+    )
     parser.add_argument("--disable-shap", action="store_true")
     parser.add_argument("--disable-lime", action="store_true")
+    parser.add_argument(
+        "--explain-min-level",
+        choices=RISK_LEVELS,
+        default=DEFAULT_EXPLAIN_LEVEL,
+        help="Niveau de risque minimal des hôtes expliqués par SHAP/LIME (low = tous)",
+    )
+    parser.add_argument(
+        "--explain-top",
+        type=int,
+        default=0,
+        metavar="N",
+        help="N'explique que les N meilleurs scores de ce niveau (0 = tous ; par lot avec --stream-batch)",
+    )
+    parser.add_argument(
+        "--shap-cache",
+        type=Path,
+        default=DEFAULT_SHAP_CACHE,
+        help="Dossier des explainers SHAP sérialisés par empreinte de modèle",
+    )
+    parser.add_argument("--no-shap-cache", action="store_true", help="Reconstruit l'explainer SHAP à chaque run")
     parser.add_argument("--ti-offline", action="store_true", help="Désactive les appels réseau TI")
+    parser.add_argument(
+        "--diff-state",
+        type=Path,
+        default=None,
+        help="État du dernier scan par périmètre : seuls les hôtes nouveaux/modifiés sont re-scorés",
+    )
+    parser.add_argument("--delta-log", type=Path, default=DEFAULT_DELTA_LOG, help="Avec --diff-state : journal des deltas")
+    parser.add_argument(
+        "--diff-max-age",
+        type=float,
+        default=24.0,
+        help="Avec --diff-state : âge max (heures) d'un événement réutilisé (0 = illimité)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processus pour l'extraction des features (0 = tous les CPU ; séquentiel sous ~2000 hôtes)",
+    )
+    parser.add_argument("--chunk-size", type=int, default=None, help="Avec --workers : hôtes par lot envoyé aux workers")
+    parser.add_argument(
+        "--feature-cache",
+        type=Path,
+        default=None,
+        help="Cache SQLite des features par contenu d'hôte (évite de ré-extraire un hôte identique)",
+    )
+    parser.add_argument(
+        "--scoring-socket",
+        type=Path,
+        default=DEFAULT_SOCKET,
+        help="Socket du service scoring_daemon.py (utilisé s'il est actif, sinon scoring local)",
+    )
+    parser.add_argument(
+        "--no-scoring-daemon",
+        action="store_true",
+        help="Score toujours dans le processus, même si un service de scoring est actif",
+    )
+    parser.add_argument(
+        "--follow",
+        action="store_true",
+        help="Suit un XML Nmap en cours d'écriture et analyse chaque hôte dès qu'il est complet",
+    )
+    parser.add_argument("--follow-pid", type=int, help="Avec --follow : s'arrête quand ce processus (nmap) se termine")
+    parser.add_argument("--follow-interval", type=float, default=1.0, help="Avec --follow : pause entre deux lectures (s)")
+    parser.add_argument(
+        "--follow-idle-timeout",
+        type=float,
+        default=None,
+        help="Avec --follow : abandonne après N secondes sans nouvelles données",
+    )
+    parser.add_argument(
+        "--stream-batch",
+        type=int,
+        default=0,
+        metavar="N",
+        help=(
+            "Mode flux : hôtes traités par micro-lots de N (mémoire bornée, événements écrits à chaque lot) ; "
+            f"{DEFAULT_STREAM_BATCH} est un bon point de départ"
+        ),
+    )
+    parser.add_argument(
+        "--event-log-fsync",
+        choices=FSYNC_POLICIES,
+        default=DEFAULT_FSYNC,
+        help="Synchronisation disque du journal d'événements : après chaque lot, à la fermeture ou jamais",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        type=Path,
+        default=DEFAULT_METRICS_FILE,
+        help="Mesures du dernier run au format texte Prometheus (textfile collector de node_exporter)",
+    )
+    parser.add_argument(
+        "--metrics-json",
+        type=Path,
+        default=DEFAULT_METRICS_JSON,
+        help="Historique JSON lines des mesures : un résumé par run (temps par étape, débit, caches)",
+    )
+    parser.add_argument("--no-metrics", action="store_true", help="N'écrit ni --metrics-file ni --metrics-json")
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="Relance l'analyse sous python -X importtime et affiche le coût des imports par module (stderr)",
+    )
     return parser.parse_args(argv)
 
 
+def write_metrics(metrics: PipelineMetrics, args: argparse.Namespace) -> None:
+    if not args.no_metrics:
+        metrics.write(args.metrics_file, args.metrics_json)
+
+
 def main(argv: list[str]) -> int:
     args = parse_args(argv)
+    if args.profile_startup:
+        from startup_profile import profile_startup  # subprocess : inutile hors profilage
+
+        return profile_startup(Path(__file__).resolve(), [arg for arg in argv if arg != "--profile-startup"])
+    if args.rule_pack is not None:
+        set_rule_pack(load_rule_pack(args.rule_pack))
+    explain = ExplainPolicy(args.explain_min_level, max(args.explain_top, 0))
+    shap_cache = None if args.no_shap_cache else args.shap_cache
+    reports = expand_reports(args.report)
+    if args.follow:
+        if len(reports) != 1 or reports[0].suffix != ".xml":
+            raise SystemExit("--follow attend le XML produit par nmap -oX")
+        metrics = PipelineMetrics("follow")
+        events = follow_report(
+            reports[0],
+            args.model,
+            args.log_file,
+            args.audit_file,
+            scan_history=args.scan_history,
+            ti_cache=args.ti_cache,
+            enable_shap=not args.disable_shap,
+            ti_offline=args.ti_offline,
+            features_path=args.features_file,
+            poll_interval=args.follow_interval,
+            idle_timeout=args.follow_idle_timeout,
+            follow_pid=args.follow_pid,
+            event_log_fsync=args.event_log_fsync,
+            explain=explain,
+            shap_cache=shap_cache,
+            metrics=metrics,
+        )
+        write_metrics(metrics, args)
+        print(f"[INFO] {len(events)} hôtes analysés en direct → logs IA prêts")
+        return 0
+    if not reports:
+        raise SystemExit(f"Aucun rapport trouvé : {' '.join(map(str, args.report))}")
+    if args.stream_batch > 0:
+        if len(reports) != 1 or reports[0] not in args.report:
+            raise SystemExit("--stream-batch attend un seul rapport")
+        if args.diff_state is not None or args.workers != 1 or args.features_file.suffix == ".npz":
+            raise SystemExit("--stream-batch est incompatible avec --diff-state, --workers et un instantané .npz")
+        metrics = PipelineMetrics("stream")
+        count = stream_report(
+            reports[0],
+            args.model,
+            args.log_file,
+            args.audit_file,
+            scan_history=args.scan_history,
+            ti_cache=args.ti_cache,
+            enable_shap=not args.disable_shap,
+            enable_lime=not args.disable_lime,
+            ti_offline=args.ti_offline,
+            features_path=args.features_file,
+            batch_size=args.stream_batch,
+            feature_cache=args.feature_cache,
+            event_log_fsync=args.event_log_fsync,
+            explain=explain,
+            shap_cache=shap_cache,
+            metrics=metrics,
+        )
+        write_metrics(metrics, args)
+        print(f"[INFO] {count} hôtes analysés en flux → logs IA prêts")
+        return 0
+    if len(reports) > 1 or reports[0] not in args.report:
+        metrics = PipelineMetrics("batch")
+        events, errors = analyse_reports(
+            reports,
+            args.model,
+            args.log_file,
+            args.audit_file,
+            scan_history=args.scan_history,
+            ti_cache=args.ti_cache,
+            enable_shap=not args.disable_shap,
+            enable_lime=not args.disable_lime,
+            ti_offline=args.ti_offline,
+            features_path=args.features_file,
+            diff_state=args.diff_state,
+            delta_log=args.delta_log,
+            diff_max_age=args.diff_max_age * 3600 if args.diff_max_age > 0 else None,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            feature_cache=args.feature_cache,
+            event_log_fsync=args.event_log_fsync,
+            explain=explain,
+            shap_cache=shap_cache,
+            metrics=metrics,
+        )
+        write_metrics(metrics, args)
+        print(f"[INFO] {len(reports) - len(errors)}/{len(reports)} rapports, {len(events)} hôtes analysés → logs IA prêts")
+        return 1 if errors else 0
+    metrics = PipelineMetrics("report")
     events = analyse_report(
-        args.report,
+        reports[0],
         args.model,
         args.log_file,
         args.audit_file,
@@ -278,7 +1399,20 @@ def main(argv: list[str]) -> int:
         enable_shap=not args.disable_shap,
         enable_lime=not args.disable_lime,
         ti_offline=args.ti_offline,
+        features_path=args.features_file,
+        diff_state=args.diff_state,
+        delta_log=args.delta_log,
+        diff_max_age=args.diff_max_age * 3600 if args.diff_max_age > 0 else None,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        feature_cache=args.feature_cache,
+        scoring_socket=None if args.no_scoring_daemon else args.scoring_socket,
+        event_log_fsync=args.event_log_fsync,
+        explain=explain,
+        shap_cache=shap_cache,
+        metrics=metrics,
     )
+    write_metrics(metrics, args)
     print(f"[INFO] {len(events)} hôtes analysés → logs IA prêts")
     return 0
 
@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+"""Journal d'audit append-only en segments JSONL (``ia_decisions``, ``response_actions``).
+
+Un audit ``audit/ia_decisions.json`` est stocké dans ``audit/ia_decisions.segments/`` :
+
+- ``<séquence>.jsonl`` : un enregistrement JSON par ligne, le nom est le numéro
+  de séquence du premier enregistrement du segment ;
+- ``<séquence>.idx`` : fin de chaque ligne dans le segment (entiers 64 bits
+  little-endian), pour relire à partir de n'importe quel numéro de séquence et
+  vérifier en O(1) qu'aucune écriture n'a été interrompue ;
+- ``MANIFEST.json`` : liste des segments, réécrite atomiquement seulement lors
+  d'une bascule de segment ou d'une compaction. Un fichier absent du manifeste
+  est le reste d'une compaction interrompue.
+
+Un ajout écrit les lignes puis leur index (fsync par défaut) sous un verrou
+``fcntl`` : ``analyse_scan.py`` et ``responder.py`` peuvent écrire en même temps.
+Une ligne incomplète laissée par un arrêt brutal est tronquée à l'ajout suivant.
+Le tableau JSON lu par le dashboard est produit par ``export`` (``sync_data.sh``) ;
+au premier usage, le contenu d'un ancien fichier JSON est importé dans le journal.
+
+Exemples :
+    python3 audit_store.py export ../audit/ia_decisions.json ../audit/response_actions.json
+    python3 audit_store.py compact ../audit/ia_decisions.json --max-age-days 365
+"""
+from __future__ import annotations
+
+import argparse
+import fcntl
+import json
+import os
+import struct
+import sys
+import textwrap
+import time
+from contextlib import contextmanager
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+MANIFEST = "MANIFEST.json"
+LOCK = "LOCK"
+DEFAULT_SEGMENT_BYTES = 8 * 1024 * 1024
+_END = struct.Struct("<Q")
+
+
+def _segment_name(base: int, generation: int = 0) -> str:
+    return f"{base:020d}" if not generation else f"{base:020d}.g{generation}"
+
+
+def _fsync_dir(directory: Path) -> None:
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def parse_timestamp(value: Any) -> float | None:
+    if not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return (parsed if parsed.tzinfo else parsed.replace(tzinfo=UTC)).timestamp()
+
+
+class AuditStore:
+    """Journal d'audit segmenté d'un répertoire ``directory``."""
+
+    def __init__(self, directory: Path, *, segment_bytes: int = DEFAULT_SEGMENT_BYTES, fsync: bool = True) -> None:
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.fsync = fsync
+
+    # -- verrou et manifeste -------------------------------------------------
+
+    @contextmanager
+    def _locked(self, *, exclusive: bool = True) -> Iterator[None]:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with (self.directory / LOCK).open("a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield  # verrou libéré à la fermeture du fichier
+
+    def _load_manifest(self) -> dict[str, Any] | None:
+        try:
+            return json.loads((self.directory / MANIFEST).read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+
+    def _write_manifest(self, manifest: dict[str, Any]) -> None:
+        path = self.directory / MANIFEST
+        tmp = path.with_name(MANIFEST + ".tmp")
+        with tmp.open("w", encoding="utf-8") as fh:
+            json.dump(manifest, fh, indent=2)
+            fh.flush()
+            if self.fsync:
+                os.fsync(fh.fileno())
+        os.replace(tmp, path)
+        if self.fsync:
+            _fsync_dir(self.directory)
+
+    def _paths(self, segment: dict[str, Any]) -> tuple[Path, Path]:
+        return self.directory / f"{segment['name']}.jsonl", self.directory / f"{segment['name']}.idx"
+
+    def _new_segment(self, manifest: dict[str, Any], base: int) -> dict[str, Any]:
+        segment = {"name": _segment_name(base, manifest["generation"]), "base": base, "records": None}
+        for path in self._paths(segment):
+            path.touch()
+        manifest["segments"].append(segment)
+        self._write_manifest(manifest)
+        return segment
+
+    # -- segments ------------------------------------------------------------
+
+    def _ends(self, idx_path: Path, start: int = 0, stop: int | None = None) -> list[int]:
+        with idx_path.open("rb") as fh:
+            fh.seek(start * _END.size)
+            data = fh.read(None if stop is None else (stop - start) * _END.size)
+        usable = len(data) - len(data) % _END.size
+        return [value for (value,) in _END.iter_unpack(data[:usable])]
+
+    def _end_at(self, idx_path: Path, position: int) -> int:
+        """Fin de l'enregistrement ``position`` du segment (0 pour ``position`` = -1)."""
+
+        return self._ends(idx_path, position, position + 1)[0] if position >= 0 else 0
+
+    def _recover(self, segment: dict[str, Any]) -> tuple[int, int]:
+        """Réaligne segment et index du segment actif ; renvoie (enregistrements, octets).
+
+        Cas normal en O(1) : la dernière entrée de l'index correspond à la taille du
+        segment. Sinon, les entrées d'index pointant au-delà des données sont
+        retirées, les lignes complètes non indexées sont indexées et une ligne
+        incomplète (ou illisible) en fin de segment est tronquée.
+        """
+
+        data_path, idx_path = self._paths(segment)
+        data_size = data_path.stat().st_size
+        count = idx_path.stat().st_size // _END.size
+        end = self._end_at(idx_path, count - 1)
+        if end == data_size and idx_path.stat().st_size == count * _END.size:
+            return count, end
+
+        while count and end > data_size:
+            count -= 1
+            end = self._end_at(idx_path, count - 1)
+        recovered: list[int] = []
+        with data_path.open("rb") as fh:
+            fh.seek(end)
+            for line in fh:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    json.loads(line)
+                except ValueError:
+                    break
+                end += len(line)
+                recovered.append(end)
+        with data_path.open("r+b") as fh:
+            fh.truncate(end)
+        with idx_path.open("r+b") as fh:
+            fh.truncate(count * _END.size)
+            fh.seek(0, os.SEEK_END)
+            fh.write(b"".join(_END.pack(value) for value in recovered))
+        if recovered or data_size != end:
+            print(
+                f"[WARN] Audit {self.directory.name} : fin de segment réparée "
+                f"({len(recovered)} lignes réindexées, {data_size - end} octets tronqués)",
+                file=sys.stderr,
+            )
+        return count + len(recovered), end
+
+    def _append_locked(self, manifest: dict[str, Any] | None, lines: list[bytes]) -> int:
+        if manifest is None:
+            manifest = {"version": 1, "generation": 0, "segments": []}
+            self._new_segment(manifest, 0)
+        segment = manifest["segments"][-1]
+        count, end = self._recover(segment)
+        if count and end >= self.segment_bytes:
+            segment["records"] = count
+            segment = self._new_segment(manifest, segment["base"] + count)
+            count = end = 0
+        ends: list[int] = []
+        for line in lines:
+            end += len(line)
+            ends.append(end)
+        data_path, idx_path = self._paths(segment)
+        # Données avant l'index : un index ne désigne jamais une ligne absente du disque.
+        for path, payload in ((data_path, b"".join(lines)), (idx_path, b"".join(map(_END.pack, ends)))):
+            with path.open("ab") as fh:
+                fh.write(payload)
+                fh.flush()
+                if self.fsync:
+                    os.fsync(fh.fileno())
+        return segment["base"] + count
+
+    # -- API -----------------------------------------------------------------
+
+    def append_many(self, records: Iterable[dict[str, Any]]) -> int | None:
+        """Ajoute ``records`` en une écriture (coût indépendant de la taille du journal).
+
+        Renvoie le numéro de séquence du premier enregistrement ajouté.
+        """
+
+        lines = [
+            json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+            for record in records
+        ]
+        if not lines:
+            return None
+        with self._locked():
+            return self._append_locked(self._load_manifest(), lines)
+
+    def append(self, record: dict[str, Any]) -> int | None:
+        return self.append_many([record])
+
+    def import_legacy(self, json_path: Path) -> int:
+        """Importe le tableau JSON ``json_path`` si le journal n'existe pas encore."""
+
+        if (self.directory / MANIFEST).exists() or not json_path.exists():
+            return 0
+        with self._locked():
+            if self._load_manifest() is not None:
+                return 0
+            try:
+                legacy = json.loads(json_path.read_text(encoding="utf-8"))
+            except json.JSONDecodeError:
+                legacy = []
+            records = [record for record in legacy if isinstance(record, dict)] if isinstance(legacy, list) else []
+            self._append_locked(
+                None,
+                [
+                    json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+                    for record in records
+                ],
+            )
+        return len(records)
+
+    def _snapshot(self) -> list[tuple[dict[str, Any], int]]:
+        """Segments et nombre d'enregistrements (verrou déjà pris)."""
+
+        manifest = self._load_manifest()
+        if manifest is None:
+            return []
+        segments = []
+        for segment in manifest["segments"]:
+            count = segment["records"]
+            if count is None:
+                count = self._paths(segment)[1].stat().st_size // _END.size
+            segments.append((segment, count))
+        return segments
+
+    def _iter_lines(self, segments: list[tuple[dict[str, Any], int]], start: int = 0) -> Iterator[bytes]:
+        for segment, count in segments:
+            if segment["base"] + count <= start:
+                continue
+            data_path, idx_path = self._paths(segment)
+            first = max(0, start - segment["base"])
+            offset = self._end_at(idx_path, first - 1)
+            stop = self._end_at(idx_path, count - 1)
+            with data_path.open("rb") as fh:
+                fh.seek(offset)
+                remaining = stop - offset
+                for line in fh:
+                    if remaining <= 0:
+                        break
+                    remaining -= len(line)
+                    yield line
+
+    def iter_records(self, start: int = 0) -> Iterator[dict[str, Any]]:
+        """Enregistrements à partir du numéro de séquence ``start`` (verrou partagé pendant la lecture)."""
+
+        if not (self.directory / MANIFEST).exists():
+            return
+        with self._locked(exclusive=False):
+            for line in self._iter_lines(self._snapshot(), start):
+                yield json.loads(line)
+
+    def stats(self) -> dict[str, Any]:
+        if not (self.directory / MANIFEST).exists():
+            return {"segments": 0, "records": 0, "bytes": 0, "first_seq": 0, "next_seq": 0}
+        with self._locked(exclusive=False):
+            segments = self._snapshot()
+        first = segments[0][0]["base"] if segments else 0
+        return {
+            "segments": len(segments),
+            "records": sum(count for _, count in segments),
+            "bytes": sum(self._paths(segment)[0].stat().st_size for segment, _ in segments),
+            "first_seq": first,
+            "next_seq": segments[-1][0]["base"] + segments[-1][1] if segments else 0,
+        }
+
+    def export_json(self, path: Path) -> int:
+        """Écrit le tableau JSON (indenté, comme l'ancien fichier) de tous les enregistrements."""
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        count = 0
+        with tmp.open("w", encoding="utf-8") as out:
+            for record in self.iter_records():
+                out.write(",\n" if count else "[\n")
+                out.write(textwrap.indent(json.dumps(record, indent=2, ensure_ascii=False), "  "))
+                count += 1
+            out.write("\n]" if count else "[]")
+        os.replace(tmp, path)
+        return count
+
+    def compact(self, *, max_age_days: float | None = None, max_records: int | None = None) -> dict[str, int]:
+        """Applique la rétention puis réécrit le journal en segments pleins.
+
+        La rétention retire le plus long préfixe d'enregistrements plus anciens que
+        ``max_age_days`` (champ ``timestamp``) et/ou au-delà des ``max_records``
+        plus récents : les numéros de séquence restent contigus. Les nouveaux
+        segments sont écrits et synchronisés avant le manifeste ; les anciens
+        fichiers ne sont supprimés qu'ensuite.
+        """
+
+        with self._locked():
+            manifest = self._load_manifest()
+            if manifest is None:
+                return {"dropped": 0, "kept": 0, "segments": 0}
+            self._recover(manifest["segments"][-1])
+            segments = self._snapshot()
+            total = sum(count for _, count in segments)
+            drop = max(0, total - max_records) if max_records is not None else 0
+            if max_age_days is not None:
+                cutoff = time.time() - max_age_days * 86400
+                aged = 0
+                for line in self._iter_lines(segments):
+                    stamp = parse_timestamp(json.loads(line).get("timestamp"))
+                    if stamp is None or stamp >= cutoff:
+                        break
+                    aged += 1
+                drop = max(drop, aged)
+            sealed_small = any(
+                self._paths(segment)[0].stat().st_size < self.segment_bytes // 2 for segment, _ in segments[:-1]
+            )
+            if not drop and not sealed_small:
+                self._remove_orphans(manifest)
+                return {"dropped": 0, "kept": total, "segments": len(segments)}
+
+            first_seq = segments[0][0]["base"] + drop
+            new_manifest = {"version": 1, "generation": manifest["generation"] + 1, "segments": []}
+            current: dict[str, Any] | None = None
+            data = idx = None
+            end = count = 0
+            try:
+                for line in self._iter_lines(segments, first_seq):
+                    if current is None or end >= self.segment_bytes:
+                        if current is not None:
+                            current["records"] = count
+                            self._close_segment(data, idx)
+                        base = first_seq + sum(seg["records"] for seg in new_manifest["segments"])
+                        current = {"name": _segment_name(base, new_manifest["generation"]), "base": base}
+                        new_manifest["segments"].append(current)
+                        data_path, idx_path = self._paths(current)
+                        data, idx = data_path.open("wb"), idx_path.open("wb")
+                        end = count = 0
+                    data.write(line)
+                    end += len(line)
+                    count += 1
+                    idx.write(_END.pack(end))
+                if current is None:
+                    current = {"name": _segment_name(first_seq, new_manifest["generation"]), "base": first_seq}
+                    new_manifest["segments"].append(current)
+                    for path in self._paths(current):
+                        path.write_bytes(b"")
+                current["records"] = None  # dernier segment = segment actif
+            finally:
+                self._close_segment(data, idx)
+            self._write_manifest(new_manifest)
+            self._remove_orphans(new_manifest)
+            return {"dropped": drop, "kept": total - drop, "segments": len(new_manifest["segments"])}
+
+    def _close_segment(self, *handles: Any) -> None:
+        for handle in handles:
+            if handle is None or handle.closed:
+                continue
+            handle.flush()
+            if self.fsync:
+                os.fsync(handle.fileno())
+            handle.close()
+
+    def _remove_orphans(self, manifest: dict[str, Any]) -> None:
+        referenced = {path.name for segment in manifest["segments"] for path in self._paths(segment)}
+        for path in self.directory.iterdir():
+            if path.suffix in {".jsonl", ".idx"} and path.name not in referenced:
+                path.unlink()
+
+
+def audit_store_dir(json_path: Path) -> Path:
+    """``audit/ia_decisions.json`` → ``audit/ia_decisions.segments``."""
+
+    return json_path.with_name(json_path.stem + ".segments")
+
+
+def open_audit_store(json_path: Path, **options: Any) -> AuditStore:
+    """Journal associé au tableau JSON ``json_path`` (ancien contenu importé au premier usage)."""
+
+    store = AuditStore(audit_store_dir(json_path), **options)
+    store.import_legacy(json_path)
+    return store
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Journal d'audit segmenté : export JSON, compaction, état")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="Régénère les tableaux JSON lus par le dashboard")
+    export.add_argument("audits", type=Path, nargs="+", help="Fichiers d'audit JSON (ex. audit/ia_decisions.json)")
+    export.add_argument("--output-dir", type=Path, default=None, help="Écrit les exports ailleurs qu'à côté du journal")
+    compact = sub.add_parser("compact", help="Rétention + regroupement des segments")
+    compact.add_argument("audits", type=Path, nargs="+")
+    compact.add_argument("--max-age-days", type=float, default=None)
+    compact.add_argument("--max-records", type=int, default=None)
+    stats = sub.add_parser("stats", help="Segments, enregistrements et taille de chaque journal")
+    stats.add_argument("audits", type=Path, nargs="+")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str]) -> int:
+    args = parse_args(argv)
+    for json_path in args.audits:
+        store = open_audit_store(json_path)
+        if args.command == "export":
+            target = args.output_dir / json_path.name if args.output_dir else json_path
+            print(f"[INFO] {json_path.name} : {store.export_json(target)} enregistrements → {target}")
+        elif args.command == "compact":
+            result = store.compact(max_age_days=args.max_age_days, max_records=args.max_records)
+            print(
+                f"[INFO] {json_path.name} : {result['dropped']} retirés, {result['kept']} conservés, "
+                f"{result['segments']} segments"
+            )
+        else:
+            print(json.dumps({"audit": str(json_path), **store.stats()}, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,108 @@
+"""Écriture groupée du journal d'événements JSON lines (``logs/ia_events.log``).
+
+Les événements sont sérialisés dans un tampon et écrits par lots : un lot part
+quand il dépasse ``max_batch_bytes`` ou quand son premier événement attend depuis
+plus de ``max_delay`` secondes (vérifié à chaque ajout), et au ``flush``/``close``.
+Chaque lot est un seul ``write`` sur un descripteur ouvert en ``O_APPEND`` : il
+n'est jamais entrelacé avec les lignes d'un autre processus et il se termine
+toujours par un saut de ligne. Le lecteur (``responder.read_new_events``) ne
+consomme que jusqu'au dernier saut de ligne et ne voit donc jamais de ligne partielle.
+
+Politique de synchronisation disque (``fsync``) :
+
+- ``"batch"`` : après chaque lot (défaut, un lot écrit survit à une coupure) ;
+- ``"close"`` : une seule fois à la fermeture ;
+- ``"never"`` : laissée au système.
+"""
+from __future__ import annotations
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Iterable
+
+FSYNC_POLICIES = ("batch", "close", "never")
+DEFAULT_FSYNC = "batch"
+DEFAULT_BATCH_BYTES = 256 * 1024
+DEFAULT_MAX_DELAY = 1.0
+
+
+class EventLogWriter:
+    """Journal JSON lines en ajout, écrit par lots (gestionnaire de contexte)."""
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        max_batch_bytes: int = DEFAULT_BATCH_BYTES,
+        max_delay: float = DEFAULT_MAX_DELAY,
+        fsync: str = DEFAULT_FSYNC,
+    ) -> None:
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Politique fsync inconnue : {fsync} (attendu : {', '.join(FSYNC_POLICIES)})")
+        self.path = path
+        self.max_batch_bytes = max_batch_bytes
+        self.max_delay = max_delay
+        self.fsync = fsync
+        self._buffer: list[bytes] = []
+        self._buffered = 0
+        self._first_at = 0.0
+        self._fd: int | None = None
+        self.batches = 0
+        self.events = 0
+
+    def _open(self) -> int:
+        if self._fd is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        return self._fd
+
+    def write(self, payload: dict[str, Any]) -> None:
+        line = json.dumps(payload, ensure_ascii=False).encode("utf-8") + b"\n"
+        if not self._buffer:
+            self._first_at = time.monotonic()
+        self._buffer.append(line)
+        self._buffered += len(line)
+        self.events += 1
+        if self._buffered >= self.max_batch_bytes or time.monotonic() - self._first_at >= self.max_delay:
+            self.flush()
+
+    def write_many(self, payloads: Iterable[dict[str, Any]]) -> None:
+        for payload in payloads:
+            self.write(payload)
+
+    def flush(self) -> None:
+        """Écrit le lot en attente (un seul ``write`` tant que le noyau accepte tout)."""
+
+        if not self._buffer:
+            return
+        data = memoryview(b"".join(self._buffer))
+        self._buffer.clear()
+        self._buffered = 0
+        fd = self._open()
+        while data:
+            written = os.write(fd, data)
+            data = data[written:]
+        self.batches += 1
+        if self.fsync == "batch":
+            os.fsync(fd)
+
+    def close(self) -> None:
+        try:
+            self.flush()
+            if self._fd is not None and self.fsync == "close":
+                os.fsync(self._fd)
+        finally:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+    def __enter__(self) -> EventLogWriter:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+__all__ = ["DEFAULT_FSYNC", "EventLogWriter", "FSYNC_POLICIES"]
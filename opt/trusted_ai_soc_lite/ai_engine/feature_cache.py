@@ -0,0 +1,220 @@
+"""Cache persistant des features par hôte, indexé par empreinte de contenu.
+
+La clé est un hachage des seules entrées de l'extraction (adresse, nom, OS,
+nom et scripts NSE des services ouverts, scripts hôte), de
+``FEATURE_SCHEMA_VERSION`` et de l'empreinte du pack de règles actif : un hôte
+identique d'un scan à l'autre retrouve ses features sans repasser par les regex. Un LRU en mémoire sert les accès répétés
+d'un même processus ; derrière, une base SQLite conserve les entrées d'un run à
+l'autre. Elle mémorise la taille de chaque entrée sérialisée et, au-delà de
+``max_bytes`` cumulés, évince les moins récemment utilisées.
+
+Comme pour la reprise de ``scan_diff``, une entrée relue du cache n'a pas de
+référence au rapport source (``script_findings`` vide, non utilisés par le scoring).
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import marshal
+import sqlite3
+import time
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable
+
+from feature_engineering import FEATURE_SCHEMA_VERSION, HostFeatures
+from rule_pack import get_rule_pack
+from xml_features import _iter_script_texts
+
+DEFAULT_MEMORY_ENTRIES = 4096
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Les lectures/écritures disque sont regroupées par transactions de cette taille.
+FLUSH_EVERY = 1000
+
+
+def _key(*parts: Any) -> str:
+    # marshal v2 (sans références partagées) : sérialisation C déterministe pour un
+    # même contenu, ~2x plus rapide que json.dumps sur des hôtes riches en scripts.
+    return hashlib.sha1(marshal.dumps((FEATURE_SCHEMA_VERSION, get_rule_pack().match_digest, *parts), 2)).hexdigest()
+
+
+def host_cache_key(host: dict[str, Any]) -> str:
+    """Clé d'un hôte au format ``parse_nmap.py`` (JSON, JSONL, msgpack).
+
+    Les scripts sont hachés tels quels plutôt que texte par texte : la clé couvre
+    un peu plus que nécessaire mais coûte bien moins cher que l'extraction.
+    """
+
+    services = [
+        ((svc.get("service") or {}).get("name"), svc.get("scripts", []))
+        for svc in host.get("services", [])
+        if svc.get("state") == "open"
+    ]
+    return _key("json", host.get("address"), host.get("hostname"), host.get("os"), host.get("scripts", []), services)
+
+
+def xml_host_cache_key(host_elem: ET.Element) -> str:
+    """Clé d'un ``<host>`` XML (textes NSE dans l'ordre de lecture de l'extracteur)."""
+
+    services: list[tuple[str | None, list[str]]] = []
+    ports_elem = host_elem.find("ports")
+    if ports_elem is not None:
+        for port in ports_elem.findall("port"):
+            state = port.find("state")
+            if state is None or state.attrib.get("state") != "open":
+                continue
+            service = port.find("service")
+            services.append(
+                (service.attrib.get("name") if service is not None else None, list(_iter_script_texts(port)))
+            )
+    addr = host_elem.find("address")
+    hostname = host_elem.find("hostnames/hostname")
+    osmatch = host_elem.find("os/osmatch")
+    return _key(
+        "xml",
+        addr.attrib.get("addr") if addr is not None else None,
+        hostname.attrib.get("name") if hostname is not None else None,
+        osmatch.attrib.get("name") if osmatch is not None else None,
+        list(_iter_script_texts(host_elem.find("hostscript"))),
+        services,
+    )
+
+
+class FeatureCache:
+    """LRU mémoire devant un magasin SQLite (``path=None`` : mémoire seule)."""
+
+    def __init__(
+        self,
+        path: Path | None,
+        *,
+        memory_entries: int = DEFAULT_MEMORY_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> None:
+        self.path = path
+        self.memory_entries = memory_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self._memory: OrderedDict[str, HostFeatures] = OrderedDict()
+        self._pending: dict[str, str] = {}
+        self._touched: set[str] = set()
+        self._db: sqlite3.Connection | None = None
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(path)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS features ("
+                "key TEXT PRIMARY KEY, schema INTEGER NOT NULL, payload TEXT NOT NULL, last_used REAL NOT NULL, "
+                "size INTEGER NOT NULL DEFAULT 0)"
+            )
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(features)")}
+            if "size" not in columns:  # base créée avant la limite en octets
+                self._db.execute("ALTER TABLE features ADD COLUMN size INTEGER NOT NULL DEFAULT 0")
+                self._db.execute("UPDATE features SET size = length(CAST(payload AS BLOB))")
+            self._db.execute("CREATE INDEX IF NOT EXISTS features_last_used ON features(last_used)")
+            # Une version de schéma différente invalide tout le contenu.
+            self._db.execute("DELETE FROM features WHERE schema != ?", (FEATURE_SCHEMA_VERSION,))
+            self._db.commit()
+
+    def __enter__(self) -> "FeatureCache":
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self.close()
+
+    def _remember(self, key: str, features: HostFeatures) -> None:
+        self._memory[key] = features
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> HostFeatures | None:
+        features = self._memory.get(key)
+        if features is not None:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return features
+        payload = self._pending.get(key)
+        if payload is None and self._db is not None:
+            row = self._db.execute("SELECT payload FROM features WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                payload = row[0]
+                self.disk_hits += 1
+                self._touched.add(key)
+        if payload is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        features = HostFeatures.from_dict(json.loads(payload))
+        self._remember(key, features)
+        return features
+
+    def put(self, key: str, features: HostFeatures) -> None:
+        self._remember(key, features)
+        if self._db is None:
+            return
+        self._pending[key] = json.dumps(features.to_dict(), ensure_ascii=False, separators=(",", ":"))
+        if len(self._pending) + len(self._touched) >= FLUSH_EVERY:
+            self.flush()
+
+    def get_or_extract(self, key: str, extract: Callable[[], HostFeatures]) -> HostFeatures:
+        features = self.get(key)
+        if features is None:
+            features = extract()
+            self.put(key, features)
+        return features
+
+    def flush(self) -> None:
+        """Écrit les nouvelles entrées, rafraîchit ``last_used`` puis applique la limite en octets."""
+
+        if self._db is None or not (self._pending or self._touched):
+            return
+        now = time.time()
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO features (key, schema, payload, last_used, size) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (key, FEATURE_SCHEMA_VERSION, payload, now, len(payload.encode("utf-8")))
+                    for key, payload in self._pending.items()
+                ],
+            )
+            self._db.executemany(
+                "UPDATE features SET last_used = ? WHERE key = ?", [(now, key) for key in self._touched]
+            )
+            (total,) = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM features").fetchone()
+            if total > self.max_bytes:
+                # Garde les entrées les plus récentes tant que leur taille cumulée tient dans le budget.
+                self._db.execute(
+                    "DELETE FROM features WHERE key IN (SELECT key FROM ("
+                    "SELECT key, SUM(size) OVER (ORDER BY last_used DESC, key) AS kept FROM features"
+                    ") WHERE kept > ?)",
+                    (self.max_bytes,),
+                )
+        self._pending.clear()
+        self._touched.clear()
+
+    def close(self) -> None:
+        if self._db is None:
+            return
+        self.flush()
+        self._db.close()
+        self._db = None
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+        }
+
+
+__all__ = [
+    "FeatureCache",
+    "host_cache_key",
+    "xml_host_cache_key",
+]
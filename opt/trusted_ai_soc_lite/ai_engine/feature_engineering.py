@@ -1,11 +1,20 @@
 """Fonctions utilitaires pour extraire les features des rapports Nmap JSON."""
 from __future__ import annotations
 
-from dataclasses import dataclass
+from array import array
+from dataclasses import dataclass, field
+from functools import lru_cache
+from itertools import islice
+from operator import attrgetter
 from pathlib import Path
 import json
 import re
-from typing import Any, Iterable
+import struct
+import sys
+from typing import Any, Iterable, Iterator, Sequence
+
+from lazy_imports import optional_import
+from rule_pack import RulePack, get_rule_pack
 
 CVE_PATTERN = re.compile(r"CVE-\d{4}-\d+", re.IGNORECASE)
 CVSS_PATTERN = re.compile(r"CVSS(?:v[23])?[^0-9]*([0-9]+(?:\.[0-9]+)?)", re.IGNORECASE)
@@ -22,9 +31,123 @@ RISKY_SERVICES = {
     "ldap",
     "mssql",
 }
+# Même encadrement que parse_nmap.py --format msgpack.
+RECORD_MAGIC = b"SOCREC1\n"
+# À incrémenter dès que l'extraction change de résultat (invalide feature_cache.py).
+FEATURE_SCHEMA_VERSION = 2
+FEATURE_NAMES = [
+    "open_ports",
+    "risky_services",
+    "cve_count",
+    "has_anonymous_ftp",
+    "has_default_http_admin",
+    "max_cvss",
+    "avg_cvss",
+]
+
+
+# Début d'un enregistrement hôte tel qu'écrit par parse_nmap.py (JSONL, msgpack) :
+# les autres enregistrements ne sont décodés que s'ils ne commencent pas ainsi.
+_JSONL_RECORD = b'{"record": '
+_JSONL_HOST = b'{"record": "host"'
+_MSGPACK_HOST = b"\x82\xa6record\xa4host"
+
+
+def _jsonl_host_offsets(path: Path) -> array:
+    offsets, position = array("q"), 0
+    with path.open("rb") as fh:
+        for line in fh:
+            if line.startswith(_JSONL_HOST) or (
+                line.strip() and not line.startswith(_JSONL_RECORD) and json.loads(line).get("record") == "host"
+            ):
+                offsets.append(position)
+            position += len(line)
+    return offsets
+
+
+def _msgpack_host_offsets(path: Path) -> array:
+    msgpack = optional_import("msgpack")
+    if msgpack is None:
+        raise RuntimeError("msgpack non installé : impossible de lire " + str(path))
+    offsets = array("q")
+    with path.open("rb") as fh:
+        if fh.read(len(RECORD_MAGIC)) != RECORD_MAGIC:
+            raise ValueError(f"{path} n'est pas un rapport msgpack TRUSTED AI SOC")
+        while header := fh.read(4):
+            (length,) = struct.unpack(">I", header)
+            position = fh.tell() - 4
+            body = fh.read(length)
+            if body.startswith(_MSGPACK_HOST) or msgpack.unpackb(body, raw=False).get("record") == "host":
+                offsets.append(position)
+    return offsets
+
+
+@lru_cache(maxsize=8)
+def _host_offsets(path: Path, size: int, mtime_ns: int) -> array:
+    """Position (octets) de chaque hôte du rapport, calculée en un seul parcours.
+
+    La taille et la date de modification font partie de la clé : un rapport
+    réécrit est réindexé.
+    """
+
+    if path.suffix == ".xml":
+        from xml_features import xml_host_offsets  # import circulaire
+
+        return xml_host_offsets(path)
+    if path.suffix == ".jsonl":
+        return _jsonl_host_offsets(path)
+    return _msgpack_host_offsets(path)
 
 
-@dataclass
+def _read_host_record(path: Path, offset: int) -> dict[str, Any]:
+    with path.open("rb") as fh:
+        fh.seek(offset)
+        if path.suffix == ".jsonl":
+            record = json.loads(fh.readline())
+        else:
+            (length,) = struct.unpack(">I", fh.read(4))
+            record = optional_import("msgpack").unpackb(fh.read(length), raw=False)
+    return record.get("host") or {}
+
+
+@dataclass(frozen=True, slots=True)
+class ScriptFindingsRef:
+    """Référence vers un hôte du rapport source (rang dans le fichier).
+
+    Les textes NSE ne sont relus qu'à la demande, au lieu d'être conservés pour
+    chaque hôte pendant toute l'analyse. Pour un ``.xml``, ``.jsonl`` ou
+    ``.msgpack``, le premier accès indexe la position de chaque hôte (un parcours
+    du fichier, gardé pour les accès suivants) puis chaque lecture ne décode que
+    l'enregistrement de l'hôte. Un ``.json`` n'est pas adressable : chaque accès
+    le relit en entier, à réserver à quelques hôtes (convertir en JSONL sinon).
+    """
+
+    path: Path
+    index: int
+
+    def load(self) -> list[str]:
+        if self.path.suffix in {".xml", ".jsonl", ".msgpack"}:
+            stat = self.path.stat()
+            offsets = _host_offsets(self.path, stat.st_size, stat.st_mtime_ns)
+            if self.index >= len(offsets):
+                return []
+            if self.path.suffix == ".xml":
+                from xml_features import xml_script_findings  # import circulaire
+
+                return xml_script_findings(self.path, offsets[self.index])
+            host = _read_host_record(self.path, offsets[self.index])
+        else:
+            host = next(islice(load_scan_payload(self.path).get("hosts", []), self.index, None), None)
+            if host is None:
+                return []
+        texts = list(_iter_script_outputs(host.get("scripts", [])))
+        for svc in host.get("services", []):
+            if svc.get("state") == "open":
+                texts.extend(_iter_script_outputs(svc.get("scripts", [])))
+        return list(dict.fromkeys(texts))
+
+
+@dataclass(slots=True)
 class HostFeatures:
     host: str | None
     hostname: str | None
@@ -32,12 +155,24 @@ class HostFeatures:
     open_ports: int
     risky_services: int
     cve_count: int
-    cve_list: list[str]
+    # identifiants internés (partagés entre hôtes)
+    cve_list: tuple[str, ...]
     has_anonymous_ftp: bool
     has_default_http_admin: bool
-    script_findings: list[str]
     max_cvss: float
     avg_cvss: float
+    # colonne du pack de règles → identifiants des règles déclenchées
+    signatures: dict[str, list[str]] = field(default_factory=dict)
+    findings_ref: ScriptFindingsRef | None = None
+
+    @property
+    def script_findings(self) -> list[str]:
+        """Textes NSE distincts de l'hôte, relus depuis le rapport source (vide sans référence).
+
+        Chaque appel relit l'hôte sur disque (voir :class:`ScriptFindingsRef`).
+        """
+
+        return self.findings_ref.load() if self.findings_ref is not None else []
 
     def to_dict(self) -> dict[str, Any]:
         return {
@@ -47,13 +182,33 @@ class HostFeatures:
             "open_ports": self.open_ports,
             "risky_services": self.risky_services,
             "cve_count": self.cve_count,
-            "cve_list": self.cve_list,
+            "cve_list": list(self.cve_list),
             "max_cvss": self.max_cvss,
             "avg_cvss": self.avg_cvss,
             "has_anonymous_ftp": int(self.has_anonymous_ftp),
             "has_default_http_admin": int(self.has_default_http_admin),
+            "signatures": self.signatures,
         }
 
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "HostFeatures":
+        """Inverse de :meth:`to_dict` (sans référence au rapport : ``script_findings`` est vide)."""
+
+        return cls(
+            host=data.get("host"),
+            hostname=data.get("hostname"),
+            os=data.get("os"),
+            open_ports=int(data.get("open_ports", 0)),
+            risky_services=int(data.get("risky_services", 0)),
+            cve_count=int(data.get("cve_count", 0)),
+            cve_list=tuple(map(sys.intern, data.get("cve_list") or ())),
+            has_anonymous_ftp=bool(data.get("has_anonymous_ftp")),
+            has_default_http_admin=bool(data.get("has_default_http_admin")),
+            max_cvss=float(data.get("max_cvss", 0.0)),
+            avg_cvss=float(data.get("avg_cvss", 0.0)),
+            signatures={column: list(ids) for column, ids in (data.get("signatures") or {}).items()},
+        )
+
 
 def _iter_script_outputs(scripts: Iterable[dict[str, Any]]) -> Iterable[str]:
     for script in scripts:
@@ -79,82 +234,438 @@ def _iter_table_strings(table: Any) -> Iterable[str]:
                 yield from _iter_table_strings(value)
 
 
-def _extract_cves_and_scores(scripts: Iterable[dict[str, Any]]) -> tuple[list[str], list[float]]:
-    cves: dict[str, None] = {}
-    scores: list[float] = []
-    for text in _iter_script_outputs(scripts):
-        if not isinstance(text, str):
-            continue
-        for match in CVE_PATTERN.findall(text):
-            cves[match.upper()] = None
-        for match in CVSS_PATTERN.findall(text):
-            try:
-                scores.append(float(match))
-            except ValueError:
+class ScriptTextScanner:
+    """Calcule en une seule passe toutes les features dérivées des textes NSE.
+
+    Chaque texte n'est mis en minuscules et passé aux regex CVE/CVSS qu'une fois :
+    les doublons (fréquents avec vulners) réutilisent le résultat mémorisé dans
+    ``findings``. Le pack de signatures (``rule_pack.py``) est évalué à la demande
+    (``hits``/``columns``) sur l'ensemble des textes de service d'une part et des
+    textes hôte d'autre part, selon le ``scope`` de chaque règle.
+    """
+
+    __slots__ = ("rules", "cves", "scores", "findings", "_service_texts", "_host_texts", "_hits")
+
+    def __init__(self, rules: RulePack | None = None) -> None:
+        self.rules = rules if rules is not None else get_rule_pack()
+        self.cves: dict[str, None] = {}
+        self.scores: list[float] = []
+        # texte → (CVE, scores CVSS)
+        self.findings: dict[str, tuple[tuple[str, ...], tuple[float, ...]]] = {}
+        self._service_texts: dict[str, None] = {}
+        self._host_texts: dict[str, None] = {}
+        self._hits: dict[int, None] | None = None
+
+    def add(self, text: Any, *, service: bool) -> None:
+        self.add_texts((text,), service=service)
+
+    def add_texts(self, texts: Iterable[Any], *, service: bool) -> None:
+        findings = self.findings
+        cves = self.cves
+        scores = self.scores
+        pending = self._service_texts if service else self._host_texts
+        self._hits = None
+        for text in texts:
+            if not isinstance(text, str):
                 continue
-    return list(cves.keys()), scores
+            scanned = findings.get(text)
+            if scanned is None:
+                lowered = text.lower()
+                scanned = (
+                    tuple([sys.intern(cve.upper()) for cve in CVE_PATTERN.findall(text)])
+                    if "cve-" in lowered
+                    else (),
+                    tuple(map(float, CVSS_PATTERN.findall(text))) if "cvss" in lowered else (),
+                )
+                findings[text] = scanned
+            pending[text] = None
+            if scanned[0]:
+                for cve in scanned[0]:
+                    cves[cve] = None
+            if scanned[1]:
+                scores.extend(scanned[1])
+
+    def add_scripts(self, scripts: Iterable[dict[str, Any]], *, service: bool) -> None:
+        texts: list[Any] = []
+        for script in scripts:
+            output = script.get("output")
+            if output:
+                texts.append(output)
+            for elem in script.get("elements", []):
+                texts.append(elem.get("value"))
+            for table in script.get("tables", []):
+                if isinstance(table, dict):
+                    _collect_table_strings(table, texts)
+        self.add_texts(texts, service=service)
+
+    @property
+    def hits(self) -> dict[int, None]:
+        """Indices des règles du pack déclenchées par les textes ajoutés."""
+
+        if self._hits is None:
+            hits: dict[int, None] = {}
+            if self._service_texts:
+                self.rules.scan(self._service_texts, self.rules.service_rules, hits)
+            if self._host_texts:
+                self.rules.scan(self._host_texts, self.rules.host_rules, hits)
+            self._hits = hits
+        return self._hits
+
+    def columns(self) -> dict[str, list[str]]:
+        """Règles déclenchées, par colonne du pack (ordre de première apparition)."""
+
+        return self.rules.columns_for(self.hits)
+
+    @property
+    def anonymous(self) -> bool:
+        return any(self.rules.rules[index].column == "has_anonymous_ftp" for index in self.hits)
+
+    @property
+    def http_admin(self) -> bool:
+        return any(self.rules.rules[index].column == "has_default_http_admin" for index in self.hits)
+
+
+def _collect_table_strings(table: dict[str, Any], out: list[Any]) -> None:
+    # Même parcours que _iter_table_strings (les chaînes d'une liste sont ignorées).
+    for value in table.values():
+        if isinstance(value, str):
+            out.append(value)
+        elif isinstance(value, list):
+            for item in value:
+                if isinstance(item, dict):
+                    _collect_table_strings(item, out)
+        elif isinstance(value, dict):
+            _collect_table_strings(value, out)
+
+
+def _extract_cves_and_scores(scripts: Iterable[dict[str, Any]]) -> tuple[list[str], list[float]]:
+    scanner = ScriptTextScanner()
+    scanner.add_scripts(scripts, service=False)
+    return list(scanner.cves), scanner.scores
 
 
 def _has_anonymous_ftp(scripts: Iterable[dict[str, Any]]) -> bool:
-    for text in _iter_script_outputs(scripts):
-        if "anonymous" in text.lower():
-            return True
-    return False
+    scanner = ScriptTextScanner()
+    scanner.add_scripts(scripts, service=True)
+    return scanner.anonymous
 
 
 def _has_http_admin_exposure(scripts: Iterable[dict[str, Any]]) -> bool:
-    for text in _iter_script_outputs(scripts):
-        lowered = text.lower()
-        if "admin" in lowered and any(keyword in lowered for keyword in {"login", "panel", "console"}):
-            return True
-    return False
-
-
-def extract_features_from_host(host: dict[str, Any]) -> HostFeatures:
-    services = host.get("services", [])
-    open_services = [svc for svc in services if svc.get("state") == "open"]
-    risky_services = [
-        svc for svc in open_services if (svc.get("service", {}) or {}).get("name") in RISKY_SERVICES
-    ]
+    scanner = ScriptTextScanner()
+    scanner.add_scripts(scripts, service=True)
+    return scanner.http_admin
 
-    combined_scripts: list[dict[str, Any]] = list(host.get("scripts", []))
-    per_service_scripts = list(open_services_scripts(open_services))
-    for svc in open_services:
-        combined_scripts.extend(svc.get("scripts", []))
 
-    cve_list, cvss_scores = _extract_cves_and_scores(combined_scripts)
-    max_cvss = max(cvss_scores) if cvss_scores else 0.0
-    avg_cvss = (sum(cvss_scores) / len(cvss_scores)) if cvss_scores else 0.0
+def build_host_features(
+    *,
+    host: str | None,
+    hostname: str | None,
+    os: str | None,
+    open_ports: int,
+    risky_services: int,
+    texts: ScriptTextScanner,
+    findings_ref: ScriptFindingsRef | None = None,
+) -> HostFeatures:
+    """Construit les features à partir des textes NSE déjà passés au scanner."""
 
+    cve_list = tuple(texts.cves)
+    cvss_scores = texts.scores
+    # Les colonnes has_anonymous_ftp / has_default_http_admin du pack alimentent les
+    # booléens historiques ; les autres restent dans ``signatures``.
+    signatures = texts.columns()
     return HostFeatures(
+        host=host,
+        hostname=hostname,
+        os=os,
+        open_ports=open_ports,
+        risky_services=risky_services,
+        cve_count=len(cve_list),
+        cve_list=cve_list,
+        has_anonymous_ftp=signatures.pop("has_anonymous_ftp", None) is not None,
+        has_default_http_admin=signatures.pop("has_default_http_admin", None) is not None,
+        max_cvss=max(cvss_scores) if cvss_scores else 0.0,
+        avg_cvss=(sum(cvss_scores) / len(cvss_scores)) if cvss_scores else 0.0,
+        signatures=signatures,
+        findings_ref=findings_ref,
+    )
+
+
+def extract_features_from_host(
+    host: dict[str, Any], findings_ref: ScriptFindingsRef | None = None
+) -> HostFeatures:
+    texts = ScriptTextScanner()
+    texts.add_scripts(host.get("scripts", []), service=False)
+    open_ports = 0
+    risky_services = 0
+    for svc in host.get("services", []):
+        if svc.get("state") != "open":
+            continue
+        open_ports += 1
+        if (svc.get("service", {}) or {}).get("name") in RISKY_SERVICES:
+            risky_services += 1
+        texts.add_scripts(svc.get("scripts", []), service=True)
+
+    return build_host_features(
         host=host.get("address"),
         hostname=host.get("hostname"),
         os=host.get("os"),
-        open_ports=len(open_services),
-        risky_services=len(risky_services),
-        cve_count=len(cve_list),
-        cve_list=cve_list,
-        has_anonymous_ftp=_has_anonymous_ftp(per_service_scripts),
-        has_default_http_admin=_has_http_admin_exposure(per_service_scripts),
-        script_findings=list({text for text in _iter_script_outputs(combined_scripts)}),
-        max_cvss=max_cvss,
-        avg_cvss=avg_cvss,
+        open_ports=open_ports,
+        risky_services=risky_services,
+        texts=texts,
+        findings_ref=findings_ref,
     )
 
 
+def feature_vector(features: HostFeatures) -> list[float]:
+    return [
+        float(features.open_ports),
+        float(features.risky_services),
+        float(features.cve_count),
+        float(int(features.has_anonymous_ftp)),
+        float(int(features.has_default_http_admin)),
+        float(features.max_cvss),
+        float(features.avg_cvss),
+    ]
+
+
+class FeatureMatrix:
+    """Features numériques de plusieurs hôtes dans un tableau NumPy contigu.
+
+    ``values`` a une ligne par hôte et une colonne par entrée de
+    ``FEATURE_NAMES`` (float64, C-contigu) ; il est passé tel quel au modèle, à
+    SHAP et à LIME. Il n'est construit qu'au premier accès : le scoring
+    heuristique n'en a pas besoin et n'importe donc pas NumPy. Les identifiants
+    et listes de CVE restent dans des listes parallèles (partagées avec les
+    ``HostFeatures`` d'origine, sans copie). Sans NumPy, ``values`` est une
+    simple liste de lignes.
+    """
+
+    __slots__ = ("_features", "_values", "hosts", "hostnames", "os", "cve_lists")
+
+    def __init__(
+        self,
+        features: Sequence[HostFeatures],
+        hosts: list[str | None],
+        hostnames: list[str | None],
+        os: list[str | None],
+        cve_lists: list[tuple[str, ...]],
+    ) -> None:
+        self._features: Sequence[HostFeatures] | None = features
+        self._values: Any = None
+        self.hosts = hosts
+        self.hostnames = hostnames
+        self.os = os
+        self.cve_lists = cve_lists
+
+    @classmethod
+    def from_features(cls, features: Sequence[HostFeatures]) -> "FeatureMatrix":
+        return cls(
+            features,
+            [feat.host for feat in features],
+            [feat.hostname for feat in features],
+            [feat.os for feat in features],
+            [feat.cve_list for feat in features],
+        )
+
+    @property
+    def values(self) -> Any:
+        if self._values is not None:
+            return self._values
+        features = self._features or []
+        np = optional_import("numpy")
+        if np is None:
+            values: Any = [feature_vector(feat) for feat in features]
+        else:
+            values = np.empty((len(features), len(FEATURE_NAMES)), dtype=np.float64)
+            for column, name in enumerate(FEATURE_NAMES):
+                getter = attrgetter(name)
+                values[:, column] = np.fromiter(
+                    (getter(feat) for feat in features), dtype=np.float64, count=len(features)
+                )
+        self._values, self._features = values, None
+        return values
+
+    def __len__(self) -> int:
+        return len(self.hosts)
+
+    def row(self, index: int) -> Any:
+        """Vecteur d'un hôte (vue sur ``values``, pas de copie)."""
+
+        return self.values[index]
+
+    def column(self, name: str) -> Any:
+        index = FEATURE_NAMES.index(name)
+        if isinstance(self.values, list):
+            return [row[index] for row in self.values]
+        return self.values[:, index]
+
+
 def open_services_scripts(services: Iterable[dict[str, Any]]) -> Iterable[dict[str, Any]]:
     for svc in services:
         yield from svc.get("scripts", [])
 
 
-def _load_scan_payload(scan_source: Path | dict[str, Any]) -> dict[str, Any]:
+def _iter_jsonl_hosts(path: Path, metadata: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    """Lit un rapport JSON Lines (``parse_nmap.py --jsonl``) hôte par hôte.
+
+    Les enregistrements header/trailer complètent ``metadata`` au fil de la lecture.
+    """
+
+    with path.open(encoding="utf-8") as fh:
+        for line in fh:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            kind = record.get("record")
+            if kind == "host":
+                yield record.get("host") or {}
+            elif kind in {"header", "trailer"}:
+                metadata.update(record.get("metadata") or {})
+
+
+def _iter_msgpack_hosts(path: Path, metadata: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    """Lit un rapport binaire ``parse_nmap.py --format msgpack`` hôte par hôte."""
+
+    msgpack = optional_import("msgpack")
+    if msgpack is None:
+        raise RuntimeError("msgpack non installé : impossible de lire " + str(path))
+    with path.open("rb") as fh:
+        if fh.read(len(RECORD_MAGIC)) != RECORD_MAGIC:
+            raise ValueError(f"{path} n'est pas un rapport msgpack TRUSTED AI SOC")
+        while header := fh.read(4):
+            (length,) = struct.unpack(">I", header)
+            record = msgpack.unpackb(fh.read(length), raw=False)
+            kind = record.get("record")
+            if kind == "host":
+                yield record.get("host") or {}
+            elif kind in {"header", "trailer"}:
+                metadata.update(record.get("metadata") or {})
+
+
+def load_scan_payload(scan_source: Path | dict[str, Any]) -> dict[str, Any]:
+    """Charge un rapport ``{"metadata", "hosts"}``.
+
+    Pour un fichier ``.jsonl`` ou ``.msgpack``, ``hosts`` est un itérateur paresseux
+    et ``metadata`` n'est complet qu'une fois les hôtes consommés (le trailer arrive
+    en fin de flux).
+    """
+
     if isinstance(scan_source, Path):
+        if scan_source.suffix in {".jsonl", ".msgpack"}:
+            metadata: dict[str, Any] = {}
+            reader = _iter_jsonl_hosts if scan_source.suffix == ".jsonl" else _iter_msgpack_hosts
+            return {"metadata": metadata, "hosts": reader(scan_source, metadata)}
         return json.loads(scan_source.read_text(encoding="utf-8"))
     return scan_source
 
 
+def iter_features_from_scan(scan_source: Path | dict[str, Any]) -> Iterator[HostFeatures]:
+    data = load_scan_payload(scan_source)
+    for index, host in enumerate(data.get("hosts", [])):
+        yield extract_features_from_host(
+            host, ScriptFindingsRef(scan_source, index) if isinstance(scan_source, Path) else None
+        )
+
+
 def extract_features_from_scan(scan_source: Path | dict[str, Any]) -> list[HostFeatures]:
-    data = _load_scan_payload(scan_source)
-    hosts = data.get("hosts", [])
-    return [extract_features_from_host(host) for host in hosts]
+    return list(iter_features_from_scan(scan_source))
+
+
+def save_feature_snapshot(features: list[HostFeatures], path: Path) -> None:
+    """Écrit les features en JSON indenté ou, pour un suffixe ``.npz``, en matrice NumPy."""
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.suffix != ".npz":
+        path.write_text(
+            json.dumps([feat.to_dict() for feat in features], indent=2, ensure_ascii=False),
+            encoding="utf-8",
+        )
+        return
+    np = optional_import("numpy")
+    if np is None:
+        raise RuntimeError("numpy non installé : format .npz indisponible")
+    matrix = FeatureMatrix.from_features(features)
+    np.savez_compressed(
+        path,
+        features=matrix.values,
+        feature_names=np.array(FEATURE_NAMES),
+        hosts=np.array([host or "" for host in matrix.hosts]),
+        hostnames=np.array([hostname or "" for hostname in matrix.hostnames]),
+        os=np.array([os_name or "" for os_name in matrix.os]),
+        cve_lists=np.array([",".join(cves) for cves in matrix.cve_lists]),
+        signatures=np.array([json.dumps(feat.signatures) for feat in features]),
+    )
+
+
+class FeatureSnapshotWriter:
+    """Instantané JSON écrit hôte par hôte, au même format que :func:`save_feature_snapshot`.
+
+    Le fichier est construit à côté puis remplacé à la fermeture : un lecteur voit
+    l'instantané précédent ou le nouveau complet. Le format ``.npz`` (une matrice
+    entière) n'est pas disponible ainsi.
+    """
+
+    def __init__(self, path: Path) -> None:
+        if path.suffix == ".npz":
+            raise ValueError(f"Instantané .npz impossible en flux : {path}")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._tmp = path.with_name(f".{path.name}.tmp")
+        self._fh = self._tmp.open("w", encoding="utf-8")
+        self._fh.write("[")
+        self.count = 0
+
+    def write_many(self, features: Iterable[HostFeatures]) -> None:
+        for feat in features:
+            text = json.dumps(feat.to_dict(), indent=2, ensure_ascii=False).replace("\n", "\n  ")
+            self._fh.write(("\n  " if not self.count else ",\n  ") + text)
+            self.count += 1
+
+    def close(self) -> None:
+        self._fh.write("\n]" if self.count else "]")
+        self._fh.close()
+        self._tmp.replace(self.path)
+
+    def __enter__(self) -> FeatureSnapshotWriter:
+        return self
+
+    def __exit__(self, exc_type: Any, *exc_info: Any) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._fh.close()
+            self._tmp.unlink(missing_ok=True)
+
+
+def load_feature_snapshot(path: Path) -> list[dict[str, Any]]:
+    """Relit un instantané JSON ou ``.npz`` sous la forme de ``HostFeatures.to_dict()``."""
 
+    if path.suffix != ".npz":
+        return json.loads(path.read_text(encoding="utf-8"))
+    np = optional_import("numpy")
+    if np is None:
+        raise RuntimeError("numpy non installé : format .npz indisponible")
+    with np.load(path) as data:
+        names = [str(name) for name in data["feature_names"]]
+        rows: list[dict[str, Any]] = []
+        for idx, vector in enumerate(data["features"]):
+            values = dict(zip(names, vector.tolist()))
+            cves = str(data["cve_lists"][idx])
+            signatures = json.loads(str(data["signatures"][idx])) if "signatures" in data else {}
+            rows.append(
+                {
+                    "host": str(data["hosts"][idx]) or None,
+                    "hostname": str(data["hostnames"][idx]) or None,
+                    "os": str(data["os"][idx]) or None,
+                    "open_ports": int(values["open_ports"]),
+                    "risky_services": int(values["risky_services"]),
+                    "cve_count": int(values["cve_count"]),
+                    "cve_list": cves.split(",") if cves else [],
+                    "max_cvss": values["max_cvss"],
+                    "avg_cvss": values["avg_cvss"],
+                    "has_anonymous_ftp": int(values["has_anonymous_ftp"]),
+                    "has_default_http_admin": int(values["has_default_http_admin"]),
+                    "signatures": signatures,
+                }
+            )
+    return rows
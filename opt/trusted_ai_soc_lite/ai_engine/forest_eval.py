@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""Évaluation d'un RandomForest sklearn à partir de tableaux NumPy compacts.
+
+``pack_forest`` aplatit les arbres d'un ``RandomForestClassifier`` entraîné dans
+quelques tableaux (feature testée, seuil, enfants gauche/droit, probabilités des
+feuilles) ; :class:`PackedForest` les parcourt niveau par niveau pour tout un lot
+d'hôtes et tous les arbres à la fois, sans importer scikit-learn. Les résultats sont identiques bit à bit à
+``predict_proba`` : entrées converties en float32 comme dans sklearn, feuilles
+reprises telles que sklearn les rend (fractions depuis 1.4, effectifs normalisés
+avant) et probabilités des arbres accumulées dans l'ordre des estimateurs avant
+la division finale.
+
+Le fichier ``model.forest.npz`` écrit à côté de ``model.pkl`` (par
+``train_model.py`` ou par ce script) mémorise l'empreinte SHA-256 du pickle dont
+il est issu : ``analyse_scan.py`` ne l'utilise que s'il correspond encore au modèle.
+
+Exemple :
+    python3 forest_eval.py models/model.pkl --check 10000
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import io
+import sys
+from pathlib import Path
+from typing import Any, Sequence
+
+try:
+    import numpy as np
+except ModuleNotFoundError:  # pragma: no cover - dépendance optionnelle
+    np = None  # type: ignore
+
+PACKED_SUFFIX = ".forest.npz"
+# 2 : feuilles reprises sans renormalisation (les forêts au format 1 s'écartaient d'un ulp).
+PACKED_FORMAT = 2
+# Cellules (arbres x hôtes) parcourues par passe : borne la mémoire des gros lots
+# (~2 Mo par tableau intermédiaire), meilleur compromis mesuré avec le cache CPU.
+BLOCK_CELLS = 1 << 18
+
+
+def file_digest(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def packed_forest_path(model_path: Path) -> Path:
+    """Emplacement du modèle compilé associé à ``model_path`` (``model.pkl`` → ``model.forest.npz``)."""
+
+    return model_path.with_name(model_path.stem + PACKED_SUFFIX)
+
+
+class PackedForest:
+    """Forêt aplatie : nœuds de tous les arbres numérotés à la suite.
+
+    ``children[2 * n]`` et ``children[2 * n + 1]`` sont les enfants gauche et droit
+    du nœud ``n`` ; une feuille est sa propre enfant, si bien que ``max_depth``
+    passes amènent chaque hôte sur une feuille de chaque arbre.
+    """
+
+    def __init__(
+        self,
+        *,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        children: np.ndarray,
+        leaf_proba: np.ndarray,
+        roots: np.ndarray,
+        classes: np.ndarray,
+        max_depth: int,
+        n_features: int,
+        source_digest: str | None = None,
+        source_path: Path | None = None,
+    ) -> None:
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.leaf_proba = leaf_proba
+        self.roots = roots
+        self.classes_ = classes
+        self.max_depth = max_depth
+        self.n_features_in_ = n_features
+        self.source_digest = source_digest
+        self.source_path = source_path
+        self._source_model: Any = None
+
+    @property
+    def n_estimators(self) -> int:
+        return len(self.roots)
+
+    def predict_proba(self, values: Any) -> np.ndarray:
+        # sklearn évalue les arbres en float32 ; la comparaison au seuil float64 se fait ensuite en double.
+        X = np.asarray(values, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"{self.n_features_in_} features attendues, matrice de forme {X.shape}")
+        if np.isnan(X).any():
+            raise ValueError("Valeurs manquantes non supportées par la forêt compilée")
+
+        trees, width = len(self.roots), X.shape[1]
+        proba = np.zeros((X.shape[0], self.leaf_proba.shape[1]), dtype=np.float64)
+        block = max(1, BLOCK_CELLS // trees)
+        for start in range(0, X.shape[0], block):
+            rows = X[start : start + block]
+            flat = rows.ravel()
+            row_offsets = np.arange(len(rows), dtype=np.intp) * width
+            nodes = np.repeat(self.roots[:, None], len(rows), axis=1)
+            for _ in range(self.max_depth):
+                # Sans NaN, ``x > seuil`` est exactement la négation du ``x <= seuil`` de sklearn.
+                go_right = flat[row_offsets + self.feature[nodes]] > self.threshold[nodes]
+                nodes = self.children[2 * nodes + go_right]
+            # Même ordre d'accumulation que RandomForestClassifier.predict_proba.
+            out = proba[start : start + len(rows)]
+            for tree_nodes in nodes:
+                out += self.leaf_proba[tree_nodes]
+        proba /= trees
+        return proba
+
+    def source_model(self) -> Any:
+        """Modèle sklearn d'origine, chargé au premier appel (SHAP, très gros lots)."""
+
+        if self._source_model is not None:
+            return self._source_model
+        if self.source_path is None:
+            raise ValueError("Forêt compilée sans modèle source associé")
+        import joblib  # importe sklearn : seulement si un explainer le demande
+
+        data = self.source_path.read_bytes()
+        if self.source_digest is not None and hashlib.sha256(data).hexdigest() != self.source_digest:
+            raise ValueError(f"{self.source_path} a changé depuis la compilation de la forêt")
+        self._source_model = joblib.load(io.BytesIO(data))
+        return self._source_model
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        with tmp.open("wb") as fh:
+            np.savez(
+                fh,
+                format=np.int64(PACKED_FORMAT),
+                feature=self.feature,
+                threshold=self.threshold,
+                children=self.children,
+                leaf_proba=self.leaf_proba,
+                roots=self.roots,
+                classes=self.classes_,
+                max_depth=np.int64(self.max_depth),
+                n_features=np.int64(self.n_features_in_),
+                source_digest=np.str_(self.source_digest or ""),
+            )
+        tmp.replace(path)
+
+
+def _leaf_probabilities(tree: Any, n_classes: int) -> np.ndarray:
+    """Probabilités par nœud telles que les renvoie ``DecisionTreeClassifier.predict_proba``.
+
+    Depuis scikit-learn 1.4, ``tree_.value`` contient déjà des fractions, rendues
+    telles quelles par ``predict_proba`` : les renormaliser décalerait certaines
+    feuilles d'un ulp. Les versions antérieures y stockaient des effectifs, que
+    ``predict_proba`` divisait par leur somme : seul ce cas est normalisé.
+    """
+
+    proba = np.array(tree.value[:, 0, :n_classes], dtype=np.float64)
+    normalizer = proba.sum(axis=1)[:, np.newaxis]
+    if np.all(np.abs(normalizer - 1.0) <= 1e-9):
+        return proba
+    normalizer[normalizer == 0.0] = 1.0
+    proba /= normalizer
+    return proba
+
+
+def pack_forest(model: Any, *, source_digest: str | None = None, source_path: Path | None = None) -> PackedForest:
+    """Aplatit un ``RandomForestClassifier`` (ou ``ExtraTreesClassifier``) entraîné, mono-sortie."""
+
+    estimators = getattr(model, "estimators_", None)
+    if not estimators or not hasattr(model, "predict_proba") or getattr(model, "n_outputs_", 1) != 1:
+        raise ValueError(f"Forêt de classification mono-sortie attendue, reçu {type(model).__name__}")
+    n_classes = int(model.n_classes_)
+
+    features, thresholds, children, probas, roots = [], [], [], [], []
+    offset = max_depth = 0
+    for estimator in estimators:
+        tree = estimator.tree_
+        count = tree.node_count
+        left = np.asarray(tree.children_left, dtype=np.intp)
+        leaf = left == -1
+        own = np.arange(offset, offset + count, dtype=np.intp)
+        features.append(np.where(leaf, 0, tree.feature).astype(np.intp))
+        thresholds.append(np.where(leaf, np.inf, tree.threshold).astype(np.float64))
+        pairs = np.empty((count, 2), dtype=np.intp)
+        pairs[:, 0] = np.where(leaf, own, left + offset)
+        pairs[:, 1] = np.where(leaf, own, np.asarray(tree.children_right, dtype=np.intp) + offset)
+        children.append(pairs.ravel())
+        probas.append(_leaf_probabilities(tree, n_classes))
+        roots.append(offset)
+        offset += count
+        max_depth = max(max_depth, int(tree.max_depth))
+
+    return PackedForest(
+        feature=np.concatenate(features),
+        threshold=np.concatenate(thresholds),
+        children=np.concatenate(children),
+        leaf_proba=np.concatenate(probas),
+        roots=np.asarray(roots, dtype=np.intp),
+        classes=np.asarray(model.classes_),
+        max_depth=max_depth,
+        n_features=int(model.n_features_in_),
+        source_digest=source_digest,
+        source_path=source_path,
+    )
+
+
+def load_packed_forest(path: Path, *, source_path: Path | None = None) -> PackedForest:
+    if np is None:
+        raise ValueError("numpy non installé : forêt compilée indisponible")
+    with np.load(path, allow_pickle=False) as data:
+        if int(data["format"]) != PACKED_FORMAT:
+            raise ValueError(f"{path} : format de forêt compilée {int(data['format'])} non supporté")
+        return PackedForest(
+            # Index en intp : le type natif du fancy indexing NumPy, sans conversion à chaque passe.
+            feature=data["feature"].astype(np.intp),
+            threshold=data["threshold"],
+            children=data["children"].astype(np.intp),
+            leaf_proba=data["leaf_proba"],
+            roots=data["roots"].astype(np.intp),
+            classes=data["classes"],
+            max_depth=int(data["max_depth"]),
+            n_features=int(data["n_features"]),
+            source_digest=str(data["source_digest"]) or None,
+            source_path=source_path,
+        )
+
+
+def load_matching_packed_forest(model_path: Path) -> PackedForest | None:
+    """Forêt compilée associée à ``model_path`` si elle correspond encore à son contenu."""
+
+    packed_path = packed_forest_path(model_path)
+    if np is None or not packed_path.exists():
+        return None
+    try:
+        forest = load_packed_forest(packed_path, source_path=model_path)
+    except (OSError, KeyError, ValueError) as exc:
+        print(f"[WARN] Forêt compilée {packed_path} illisible ({exc}) → modèle sklearn", file=sys.stderr)
+        return None
+    if forest.source_digest != file_digest(model_path):
+        print(f"[WARN] {packed_path} ne correspond plus à {model_path} → modèle sklearn", file=sys.stderr)
+        return None
+    return forest
+
+
+def export_packed_forest(model: Any, model_path: Path) -> Path:
+    """Écrit la forêt compilée de ``model`` (déjà sauvegardé dans ``model_path``) à côté du pickle."""
+
+    packed_path = packed_forest_path(model_path)
+    pack_forest(model, source_digest=file_digest(model_path)).save(packed_path)
+    return packed_path
+
+
+def max_abs_difference(model: Any, forest: PackedForest, values: Sequence[Sequence[float]]) -> float:
+    expected = model.predict_proba(values)
+    return float(np.max(np.abs(expected - forest.predict_proba(values)), initial=0.0))
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compile un modèle RandomForest (model.pkl) en tableaux NumPy")
+    parser.add_argument("model", type=Path, help="Modèle sklearn sauvegardé par train_model.py")
+    parser.add_argument(
+        "--check",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Compare predict_proba sur N vecteurs aléatoires (échec si un écart est observé)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str]) -> int:
+    args = parse_args(argv)
+    import joblib
+
+    model = joblib.load(args.model)
+    packed_path = export_packed_forest(model, args.model)
+    forest = load_packed_forest(packed_path, source_path=args.model)
+    print(
+        f"[INFO] {forest.n_estimators} arbres, {len(forest.feature)} nœuds, profondeur {forest.max_depth} "
+        f"→ {packed_path}"
+    )
+    if args.check:
+        rng = np.random.default_rng(42)
+        # Valeurs entières et réelles mêlées : les features sont des compteurs, des booléens et des CVSS.
+        probes = rng.integers(0, 40, size=(args.check, forest.n_features_in_)).astype(np.float64)
+        probes[: args.check // 2] *= rng.random((args.check // 2, forest.n_features_in_))
+        diff = max_abs_difference(model, forest, probes)
+        print(f"[INFO] Écart max avec predict_proba sur {args.check} vecteurs : {diff}")
+        if diff != 0.0:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
+
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""Historique des scans : instantanés bruts + agrégats horaires, journaliers et hebdomadaires.
+
+Les instantanés (un par scan) sont ajoutés au journal segmenté ``audit_store.py``
+de ``audit/scan_history.json`` (``audit/scan_history.segments/``). Chaque ajout met
+aussi à jour, en place, un enregistrement binaire de taille fixe par période dans
+``rollup-hour-<origine>.bin``, ``rollup-day-…`` et ``rollup-week-…`` (semaines ISO,
+lundi 00:00 UTC) : nombre de scans et d'hôtes, hôtes par ``risk_level``, somme
+et maximum des scores. La période ``p`` est à l'offset ``(p - origine) * 64`` :
+un ajout coûte trois lectures/écritures de 64 octets et une requête ne lit que
+les périodes de sa fenêtre, quelle que soit la taille de l'historique.
+
+``ROLLUPS.json`` (réécrit atomiquement à chaque ajout) contient les origines, le
+nombre d'instantanés agrégés et les valeurs finales des enregistrements modifiés
+par le dernier ajout : rejouées à l'ouverture, elles réparent une écriture
+interrompue. Les agrégats survivent à la compaction du journal brut.
+
+Exemples :
+    python3 history_store.py export ../audit/scan_history.json
+    python3 history_store.py query ../audit/scan_history.json --granularity day --limit 30
+"""
+from __future__ import annotations
+
+import argparse
+import fcntl
+import json
+import os
+import struct
+import sys
+from contextlib import contextmanager
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from audit_store import AuditStore, open_audit_store, parse_timestamp
+
+RISK_LEVELS = ("low", "medium", "high", "critical")
+# Taille et décalage des périodes (le 1970-01-05 est le premier lundi après l'epoch).
+GRANULARITIES = {"hour": (3600, 0), "day": (86400, 0), "week": (7 * 86400, 4 * 86400)}
+# Fenêtres exportées pour le dashboard (nombre de périodes les plus récentes).
+EXPORT_WINDOWS = {"hour": 168, "day": 90, "week": 104}
+STATE = "ROLLUPS.json"
+LOCK = "ROLLUPS.lock"
+# scans, hôtes, low, medium, high, critical, somme des scores, score max
+_RECORD = struct.Struct("<6Q2d")
+_EMPTY = (0, 0, 0, 0, 0, 0, 0.0, 0.0)
+
+
+class SnapshotAccumulator:
+    """Instantané d'un scan construit lot par lot (``analyse_scan.py --stream-batch``)."""
+
+    def __init__(self) -> None:
+        self.levels = dict.fromkeys(RISK_LEVELS, 0)
+        self.host_count = 0
+        self.score_sum = 0
+        self.max_score = 0
+
+    def add(self, events: Iterable[dict[str, Any]]) -> None:
+        for event in events:
+            level = (event.get("risk_level") or "low").lower()
+            self.levels[level] = self.levels.get(level, 0) + 1
+            score = event.get("risk_score", 0)
+            self.host_count += 1
+            self.score_sum += score
+            self.max_score = max(self.max_score, score)
+
+    def snapshot(self, scan_id: str, timestamp: str) -> dict[str, Any]:
+        return {
+            "scan_id": scan_id,
+            "timestamp": timestamp,
+            "host_count": self.host_count,
+            "average_score": self.score_sum / self.host_count if self.host_count else 0,
+            "max_score": self.max_score,
+            **self.levels,
+        }
+
+
+def build_snapshot(scan_id: str, events: list[dict[str, Any]], timestamp: str) -> dict[str, Any]:
+    """Instantané d'un scan (format historique de ``scan_history.json`` + ``max_score``)."""
+
+    accumulator = SnapshotAccumulator()
+    accumulator.add(events)
+    return accumulator.snapshot(scan_id, timestamp)
+
+
+def bucket_of(granularity: str, epoch: float) -> int:
+    size, offset = GRANULARITIES[granularity]
+    return int((epoch - offset) // size)
+
+
+def bucket_start(granularity: str, bucket: int) -> str:
+    size, offset = GRANULARITIES[granularity]
+    return datetime.fromtimestamp(bucket * size + offset, tz=UTC).isoformat().replace("+00:00", "Z")
+
+
+def _merge(values: tuple, snapshot: dict[str, Any]) -> tuple:
+    scans, hosts, *levels, score_sum, score_max = values
+    count = int(snapshot.get("host_count") or 0)
+    average = float(snapshot.get("average_score") or 0)
+    return (
+        scans + 1,
+        hosts + count,
+        *(total + int(snapshot.get(level) or 0) for total, level in zip(levels, RISK_LEVELS)),
+        score_sum + average * count,
+        max(score_max, float(snapshot.get("max_score", average) or 0)),
+    )
+
+
+class ScanHistoryStore:
+    """Instantanés bruts (``raw``) et agrégats par période d'un historique de scans."""
+
+    def __init__(self, raw: AuditStore) -> None:
+        self.raw = raw
+        self.directory = raw.directory
+
+    @contextmanager
+    def _locked(self, *, exclusive: bool = True) -> Iterator[None]:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with (self.directory / LOCK).open("a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield
+
+    def _path(self, state: dict[str, Any], granularity: str) -> Path:
+        return self.directory / f"rollup-{granularity}-{state['origins'][granularity]}.bin"
+
+    def _load_state(self) -> dict[str, Any] | None:
+        try:
+            return json.loads((self.directory / STATE).read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+
+    def _write_state(self, state: dict[str, Any]) -> None:
+        path = self.directory / STATE
+        tmp = path.with_name(STATE + ".tmp")
+        with tmp.open("w", encoding="utf-8") as fh:
+            json.dump(state, fh)
+            fh.flush()
+            if self.raw.fsync:
+                os.fsync(fh.fileno())
+        os.replace(tmp, path)
+
+    def _read(self, state: dict[str, Any], granularity: str, first: int, count: int) -> list[tuple]:
+        """``count`` enregistrements à partir de l'indice ``first`` (zéros au-delà du fichier)."""
+
+        try:
+            with self._path(state, granularity).open("rb") as fh:
+                fh.seek(first * _RECORD.size)
+                data = fh.read(count * _RECORD.size)
+        except FileNotFoundError:
+            data = b""
+        records = list(_RECORD.iter_unpack(data[: len(data) - len(data) % _RECORD.size]))
+        return records + [_EMPTY] * (count - len(records))
+
+    def _write_records(self, state: dict[str, Any], updates: list[list[Any]]) -> None:
+        handles: dict[str, Any] = {}
+        try:
+            for granularity, index, values in updates:
+                if granularity not in handles:
+                    path = self._path(state, granularity)
+                    path.touch()
+                    handles[granularity] = path.open("r+b")
+                handles[granularity].seek(index * _RECORD.size)
+                handles[granularity].write(_RECORD.pack(*values))
+        finally:
+            for handle in handles.values():
+                handle.flush()
+                if self.raw.fsync:
+                    os.fsync(handle.fileno())
+                handle.close()
+
+    def _shift_origin(self, state: dict[str, Any], granularity: str, origin: int) -> None:
+        """Recule l'origine (instantané antérieur à la première période) : copie décalée du fichier.
+
+        Le nouveau fichier porte la nouvelle origine dans son nom ; l'ancien n'est
+        supprimé qu'une fois l'état réécrit.
+        """
+
+        old_path = self._path(state, granularity)
+        shift = (state["origins"][granularity] - origin) * _RECORD.size
+        state["origins"][granularity] = origin
+        new_path = self._path(state, granularity)
+        tmp = new_path.with_name(new_path.name + ".tmp")
+        tmp.write_bytes(b"\0" * shift + (old_path.read_bytes() if old_path.exists() else b""))
+        os.replace(tmp, new_path)
+        state["redo"] = []  # déjà rejoué par _open_state, indices de l'ancienne origine
+        self._write_state(state)
+        old_path.unlink(missing_ok=True)
+
+    def _fold(self, state: dict[str, Any], snapshots: Iterable[dict[str, Any]]) -> None:
+        """Ajoute ``snapshots`` aux agrégats (verrou pris) et met l'état à jour."""
+
+        snapshots = list(snapshots)
+        stamped = [(parse_timestamp(snapshot.get("timestamp")), snapshot) for snapshot in snapshots]
+        stamped = [(epoch, snapshot) for epoch, snapshot in stamped if epoch is not None]
+        for granularity in GRANULARITIES:
+            if not stamped:
+                break
+            first = min(bucket_of(granularity, epoch) for epoch, _ in stamped)
+            if granularity not in state["origins"]:
+                state["origins"][granularity] = first
+            elif first < state["origins"][granularity]:
+                self._shift_origin(state, granularity, first)
+
+        pending: dict[tuple[str, int], tuple] = {}
+        for epoch, snapshot in stamped:
+            for granularity in GRANULARITIES:
+                key = (granularity, bucket_of(granularity, epoch) - state["origins"][granularity])
+                current = pending.get(key) or self._read(state, granularity, key[1], 1)[0]
+                pending[key] = _merge(current, snapshot)
+        state["applied"] += len(snapshots)
+        state["redo"] = [[granularity, index, list(values)] for (granularity, index), values in pending.items()]
+        self._write_state(state)
+        self._write_records(state, state["redo"])
+
+    def _open_state(self) -> dict[str, Any]:
+        """État des agrégats, rejeu de la dernière écriture et rattrapage du journal brut."""
+
+        stats = self.raw.stats()
+        state = self._load_state()
+        if state is None:
+            state = {"version": 1, "applied": stats["first_seq"], "origins": {}, "redo": []}
+        self._write_records(state, state["redo"])
+        if state["applied"] < stats["next_seq"]:
+            self._fold(state, self.raw.iter_records(state["applied"]))
+        return state
+
+    def append_many(self, snapshots: list[dict[str, Any]]) -> None:
+        if not snapshots:
+            return
+        with self._locked():
+            state = self._open_state()
+            self.raw.append_many(snapshots)
+            self._fold(state, snapshots)
+
+    def append(self, snapshot: dict[str, Any]) -> None:
+        self.append_many([snapshot])
+
+    def query(
+        self,
+        granularity: str,
+        *,
+        since: float | None = None,
+        until: float | None = None,
+        limit: int | None = None,
+    ) -> list[dict[str, Any]]:
+        """Agrégats non vides de ``granularity`` entre ``since`` et ``until`` (epoch).
+
+        Sans borne basse, renvoie les ``limit`` dernières périodes (jusqu'à ``until``
+        ou la dernière période agrégée).
+        """
+
+        with self._locked(exclusive=False):
+            state = self._load_state()
+            if state is None or granularity not in state["origins"]:
+                return []
+            origin = state["origins"][granularity]
+            path = self._path(state, granularity)
+            size = path.stat().st_size // _RECORD.size if path.exists() else 0
+            last = origin + size - 1 if until is None else min(bucket_of(granularity, until), origin + size - 1)
+            if since is not None:
+                first = max(origin, bucket_of(granularity, since))
+            else:
+                first = max(origin, last - (limit or size) + 1)
+            records = self._read(state, granularity, first - origin, max(0, last - first + 1))
+        rows = []
+        for bucket, (scans, hosts, *levels, score_sum, score_max) in enumerate(records, start=first):
+            if not scans:
+                continue
+            rows.append(
+                {
+                    "period": bucket_start(granularity, bucket),
+                    "scans": scans,
+                    "host_count": hosts,
+                    **dict(zip(RISK_LEVELS, levels)),
+                    "average_score": round(score_sum / hosts, 2) if hosts else 0,
+                    "max_score": score_max,
+                }
+            )
+        return rows[-limit:] if limit and since is not None else rows
+
+    def export_rollups(self, path: Path, windows: dict[str, int] = EXPORT_WINDOWS) -> None:
+        payload = {granularity: self.query(granularity, limit=count) for granularity, count in windows.items()}
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+        os.replace(tmp, path)
+
+
+def rollups_path(json_path: Path) -> Path:
+    """``audit/scan_history.json`` → ``audit/scan_history_rollups.json``."""
+
+    return json_path.with_name(f"{json_path.stem}_rollups.json")
+
+
+def open_history_store(json_path: Path, **options: Any) -> ScanHistoryStore:
+    """Historique associé à ``json_path`` (ancien tableau importé et agrégé au premier usage)."""
+
+    store = ScanHistoryStore(open_audit_store(json_path, **options))
+    if not (store.directory / STATE).exists():
+        with store._locked():
+            store._open_state()
+    return store
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Historique des scans : export JSON et agrégats par période")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="Régénère scan_history.json et scan_history_rollups.json")
+    export.add_argument("history", type=Path)
+    export.add_argument("--output-dir", type=Path, default=None)
+    query = sub.add_parser("query", help="Affiche les agrégats d'une granularité")
+    query.add_argument("history", type=Path)
+    query.add_argument("--granularity", choices=sorted(GRANULARITIES), default="day")
+    query.add_argument("--since", default=None, help="Date ISO 8601 de début")
+    query.add_argument("--until", default=None, help="Date ISO 8601 de fin")
+    query.add_argument("--limit", type=int, default=None)
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str]) -> int:
+    args = parse_args(argv)
+    store = open_history_store(args.history)
+    if args.command == "export":
+        directory = args.output_dir or args.history.parent
+        count = store.raw.export_json(directory / args.history.name)
+        store.export_rollups(rollups_path(directory / args.history.name))
+        print(f"[INFO] {args.history.name} : {count} instantanés, agrégats → {rollups_path(directory / args.history.name)}")
+        return 0
+    bounds = {}
+    for name in ("since", "until"):
+        value = getattr(args, name)
+        if value is not None:
+            bounds[name] = parse_timestamp(value)
+            if bounds[name] is None:
+                print(f"[ERREUR] Date invalide pour --{name} : {value}", file=sys.stderr)
+                return 1
+    for row in store.query(args.granularity, limit=args.limit, **bounds):
+        print(json.dumps(row, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
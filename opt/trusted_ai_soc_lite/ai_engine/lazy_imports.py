@@ -0,0 +1,33 @@
+"""Import différé des dépendances optionnelles lourdes (numpy, joblib, shap, lime…).
+
+``analyse_scan.py`` est relancé à chaque scan : importer ces bibliothèques au
+chargement des modules coûte des centaines de millisecondes (plusieurs secondes
+pour shap/lime) même quand l'heuristique seule est utilisée. Les modules
+appellent ``optional_import`` au moment où ils en ont réellement besoin.
+"""
+from __future__ import annotations
+
+import importlib
+import importlib.util
+import sys
+from functools import cache
+from types import ModuleType
+
+
+@cache
+def optional_import(name: str) -> ModuleType | None:
+    """Module ``name`` importé au premier appel, ``None`` s'il n'est pas installé."""
+
+    try:
+        return importlib.import_module(name)
+    except ModuleNotFoundError:
+        return None
+
+
+def module_available(name: str) -> bool:
+    """``True`` si ``name`` est installé, sans l'importer."""
+
+    return name in sys.modules or importlib.util.find_spec(name) is not None
+
+
+__all__ = ["module_available", "optional_import"]
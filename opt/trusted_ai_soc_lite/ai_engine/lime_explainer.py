@@ -3,15 +3,7 @@ from __future__ import annotations
 
 from typing import Sequence
 
-try:  # pragma: no cover - optional dependency
-    import numpy as np
-except ModuleNotFoundError:  # pragma: no cover
-    np = None  # type: ignore
-
-try:  # pragma: no cover - optional dependency
-    from lime.lime_tabular import LimeTabularExplainer  # type: ignore
-except ModuleNotFoundError:  # pragma: no cover - optional dependency
-    LimeTabularExplainer = None  # type: ignore
+from lazy_imports import optional_import
 
 
 def explain_with_lime(
@@ -20,15 +12,26 @@ def explain_with_lime(
     feature_names: Sequence[str],
     *,
     top_k: int = 5,
+    rows: Sequence[int] | None = None,
 ) -> list[list[dict[str, float]] | None] | None:
-    """Return LIME explanations per host or ``None`` if unavailable."""
+    """Return LIME explanations per host or ``None`` if unavailable.
+
+    A float64 NumPy matrix (``FeatureMatrix.values``) is used as the LIME
+    background without being copied. With ``rows``, the whole matrix stays the
+    background but only those rows are explained (``None`` for the others).
+    LIME and NumPy are only imported here.
+    """
 
-    if LimeTabularExplainer is None or model is None or np is None or not feature_vectors:
+    if model is None or len(feature_vectors) == 0 or (rows is not None and not rows):
+        return None
+    np = optional_import("numpy")
+    lime_tabular = optional_import("lime.lime_tabular")
+    if np is None or lime_tabular is None:
         return None
 
     try:
-        background = np.array(feature_vectors)
-        explainer = LimeTabularExplainer(
+        background = np.asarray(feature_vectors, dtype=np.float64)
+        explainer = lime_tabular.LimeTabularExplainer(
             background,
             feature_names=list(feature_names),
             discretize_continuous=False,
@@ -36,25 +39,26 @@ def explain_with_lime(
     except Exception:  # noqa: BLE001
         return None
 
-    def predict_fn(samples: np.ndarray):  # type: ignore[override]
+    def predict_fn(samples):  # type: ignore[no-untyped-def]
         try:
             return model.predict_proba(samples)
         except Exception:  # noqa: BLE001
             return np.zeros((samples.shape[0], 2))
 
-    payload: list[list[dict[str, float]] | None] = []
-    for vector in feature_vectors:
+    payload: list[list[dict[str, float]] | None] = [None] * len(background)
+    for pos in range(len(background)) if rows is None else rows:
+        vector = background[pos]
         try:
             explanation = explainer.explain_instance(
-                np.array(vector), predict_fn, num_features=min(top_k, len(feature_names))
+                vector, predict_fn, num_features=min(top_k, len(feature_names))
             )
             contribution = [
                 {"feature": name, "weight": float(round(weight, 4))}
                 for name, weight in explanation.as_list()
             ]
-            payload.append(contribution[:top_k])
-        except Exception:  # noqa: BLE001
-            payload.append(None)
+            payload[pos] = contribution[:top_k]
+        except Exception:  # noqa: BLE001 - host left unexplained
+            continue
     return payload
 
 
@@ -0,0 +1,106 @@
+"""Extraction des features en parallèle sur un pool de processus.
+
+Les hôtes ne sont jamais sérialisés vers les workers : la liste de tâches est
+publiée dans une variable du module avant de créer le pool en mode ``fork``,
+puis chaque worker reçoit seulement des bornes ``(début, fin)``. Seules les
+features calculées repassent par pickle. Sans ``fork`` (Windows, macOS en
+``spawn``) ou sous le seuil ``min_tasks``, l'exécution reste séquentielle ;
+``multiprocessing`` n'est alors jamais importé (démarrage d'``analyse_scan.py``).
+"""
+from __future__ import annotations
+
+import os
+from functools import partial
+from typing import Any, Callable, Sequence, TypeVar
+
+from feature_engineering import HostFeatures, extract_features_from_host
+
+T = TypeVar("T")
+
+PARALLEL_MIN_HOSTS = 2000
+DEFAULT_CHUNK_SIZE = 512
+
+# Tâches partagées avec les workers forkés (copie en écriture, jamais picklées).
+_SHARED_TASKS: Sequence[Callable[[], Any]] = ()
+
+
+def _run_range(bounds: tuple[int, int]) -> list[Any]:
+    start, stop = bounds
+    return [task() for task in _SHARED_TASKS[start:stop]]
+
+
+def resolve_workers(workers: int | None) -> int:
+    """``None``/``0`` = tous les CPU ; une valeur négative est ramenée à 1."""
+
+    if not workers:
+        return os.cpu_count() or 1
+    return max(1, workers)
+
+
+def _fork_available() -> bool:
+    import multiprocessing
+
+    return "fork" in multiprocessing.get_all_start_methods()
+
+
+def map_shared(
+    tasks: Sequence[Callable[[], T]],
+    *,
+    workers: int | None = None,
+    chunk_size: int | None = None,
+    min_tasks: int = PARALLEL_MIN_HOSTS,
+) -> list[T]:
+    """Exécute des tâches sans argument et renvoie leurs résultats dans l'ordre.
+
+    Les tâches (lambdas, ``partial``…) n'ont pas besoin d'être picklables : elles
+    sont héritées par ``fork``. Leurs résultats, eux, doivent l'être.
+    """
+
+    global _SHARED_TASKS
+
+    workers = min(resolve_workers(workers), max(1, len(tasks)))
+    if workers == 1 or len(tasks) < min_tasks or not _fork_available():
+        return [task() for task in tasks]
+
+    if chunk_size is None:
+        # ~4 blocs par worker : équilibre la charge sans multiplier les allers-retours.
+        chunk_size = max(1, min(DEFAULT_CHUNK_SIZE, -(-len(tasks) // (workers * 4))))
+    bounds = [(start, min(start + chunk_size, len(tasks))) for start in range(0, len(tasks), chunk_size)]
+
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    _SHARED_TASKS = tasks
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork")) as pool:
+            results: list[T] = []
+            for chunk in pool.map(_run_range, bounds):
+                results.extend(chunk)
+    finally:
+        _SHARED_TASKS = ()
+    return results
+
+
+def extract_features_parallel(
+    hosts: Sequence[dict[str, Any]],
+    *,
+    workers: int | None = None,
+    chunk_size: int | None = None,
+    min_hosts: int = PARALLEL_MIN_HOSTS,
+) -> list[HostFeatures]:
+    """Équivalent parallèle de ``[extract_features_from_host(h) for h in hosts]``."""
+
+    return map_shared(
+        [partial(extract_features_from_host, host) for host in hosts],
+        workers=workers,
+        chunk_size=chunk_size,
+        min_tasks=min_hosts,
+    )
+
+
+__all__ = [
+    "PARALLEL_MIN_HOSTS",
+    "extract_features_parallel",
+    "map_shared",
+    "resolve_workers",
+]
@@ -0,0 +1,217 @@
+"""Mesures par étape du pipeline d'analyse (temps, débit, taux de cache).
+
+Chaque run de ``analyse_scan.py`` chronomètre ses étapes (``STAGES``) et
+compte les accès aux caches (features, TI, différentiel). En fin de run :
+
+- ``metrics_file`` est réécrit atomiquement au format texte Prometheus (à
+  pointer par le *textfile collector* de node_exporter) ;
+- un enregistrement JSON résumé est ajouté à ``metrics_json`` (une ligne par
+  run) pour tracer l'évolution des performances d'une version à l'autre.
+
+Les temps sont exclusifs (``events`` n'inclut pas ``ti``) : leur somme est
+proche de la durée totale du run.
+"""
+from __future__ import annotations
+
+import json
+import os
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any, Iterable, Iterator, TypeVar
+
+BASE_DIR = Path(__file__).resolve().parent
+DEFAULT_METRICS_FILE = BASE_DIR / "logs/pipeline_metrics.prom"
+DEFAULT_METRICS_JSON = BASE_DIR / "logs/pipeline_metrics.jsonl"
+# Ordre d'affichage ; une étape absente d'un run n'est pas exportée.
+STAGES = (
+    "model",
+    "parse",
+    "features",
+    "score",
+    "shap",
+    "lime",
+    "ti",
+    "events",
+    "last_features",
+    "audit",
+    "history",
+    "diff",
+)
+PREFIX = "soc_pipeline"
+
+T = TypeVar("T")
+
+
+def _rate(count: int, seconds: float) -> float | None:
+    return round(count / seconds, 3) if count and seconds > 0 else None
+
+
+class _Stage:
+    __slots__ = ("metrics", "name", "hosts", "started")
+
+    def __init__(self, metrics: PipelineMetrics, name: str, hosts: int) -> None:
+        self.metrics = metrics
+        self.name = name
+        self.hosts = hosts
+
+    def __enter__(self) -> _Stage:
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.metrics.add(self.name, time.perf_counter() - self.started, self.hosts)
+
+
+class PipelineMetrics:
+    """Accumulateur des mesures d'un run (un rapport, un lot ou un suivi ``--follow``)."""
+
+    def __init__(self, mode: str = "report") -> None:
+        self.mode = mode
+        self.started = time.perf_counter()
+        self.seconds: dict[str, float] = {}
+        self.hosts: dict[str, int] = {}
+        self.caches: dict[str, list[int]] = {}
+        self.reports = 0
+        self.errors = 0
+        self.total_hosts = 0
+
+    def stage(self, name: str, hosts: int = 0) -> _Stage:
+        """Chronomètre un bloc ``with`` ; ``hosts`` = hôtes traités par ce bloc."""
+
+        return _Stage(self, name, hosts)
+
+    def add(self, name: str, seconds: float, hosts: int = 0) -> None:
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+        self.hosts[name] = self.hosts.get(name, 0) + hosts
+
+    def timed_iter(self, name: str, iterable: Iterable[T]) -> Iterator[T]:
+        """Itère en imputant à ``name`` le temps passé à produire chaque élément (un hôte)."""
+
+        iterator = iter(iterable)
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add(name, time.perf_counter() - started)
+                return
+            self.add(name, time.perf_counter() - started, 1)
+            yield item
+
+    def cache(self, name: str, hits: int, misses: int) -> None:
+        counts = self.caches.setdefault(name, [0, 0])
+        counts[0] += hits
+        counts[1] += misses
+
+    def merge(self, other: PipelineMetrics) -> None:
+        """Ajoute les mesures d'un worker (mode lot parallèle).
+
+        Les temps d'étape sont alors cumulés sur les workers et peuvent dépasser
+        la durée totale du run, qui reste celle du processus parent.
+        """
+
+        for name, seconds in other.seconds.items():
+            self.add(name, seconds, other.hosts.get(name, 0))
+        for name, (hits, misses) in other.caches.items():
+            self.cache(name, hits, misses)
+        self.reports += other.reports
+        self.errors += other.errors
+        self.total_hosts += other.total_hosts
+
+    def summary(self) -> dict[str, Any]:
+        elapsed = time.perf_counter() - self.started
+        ordered = sorted(self.seconds, key=lambda name: (STAGES.index(name) if name in STAGES else len(STAGES), name))
+        return {
+            "timestamp": datetime.now(tz=UTC).isoformat().replace("+00:00", "Z"),
+            "mode": self.mode,
+            "reports": self.reports,
+            "errors": self.errors,
+            "hosts": self.total_hosts,
+            "seconds": round(elapsed, 6),
+            "hosts_per_second": _rate(self.total_hosts, elapsed) or 0.0,
+            "stages": {
+                name: {
+                    "seconds": round(self.seconds[name], 6),
+                    "hosts": self.hosts[name],
+                    "hosts_per_second": _rate(self.hosts[name], self.seconds[name]),
+                }
+                for name in ordered
+            },
+            "caches": {
+                name: {
+                    "hits": hits,
+                    "misses": misses,
+                    "hit_rate": round(hits / (hits + misses), 4) if hits + misses else None,
+                }
+                for name, (hits, misses) in sorted(self.caches.items())
+            },
+        }
+
+    def write(self, metrics_file: Path | None, metrics_json: Path | None) -> dict[str, Any]:
+        summary = self.summary()
+        if metrics_file is not None:
+            write_prometheus(summary, metrics_file)
+        if metrics_json is not None:
+            metrics_json.parent.mkdir(parents=True, exist_ok=True)
+            with metrics_json.open("a", encoding="utf-8") as fh:
+                fh.write(json.dumps(summary, ensure_ascii=False) + "\n")
+        return summary
+
+
+def _gauge(lines: list[str], name: str, help_text: str, samples: list[tuple[str, float]]) -> None:
+    if not samples:
+        return
+    lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+    lines.append(f"# TYPE {PREFIX}_{name} gauge")
+    for labels, value in samples:
+        lines.append(f"{PREFIX}_{name}{labels} {value if isinstance(value, int) else repr(float(value))}")
+
+
+def _labelled(label: str, items: dict[str, dict[str, Any]], key: str) -> list[tuple[str, float]]:
+    return [(f'{{{label}="{name}"}}', item[key]) for name, item in items.items() if item[key] is not None]
+
+
+def to_prometheus(summary: dict[str, Any]) -> str:
+    """Format d'exposition texte Prometheus du résumé d'un run."""
+
+    stages, caches = summary["stages"], summary["caches"]
+    lines: list[str] = []
+    _gauge(lines, "run_info", "Dernier run analysé (mode en étiquette)", [(f'{{mode="{summary["mode"]}"}}', 1)])
+    _gauge(
+        lines,
+        "last_run_timestamp_seconds",
+        "Fin du dernier run (epoch)",
+        [("", round(datetime.fromisoformat(summary["timestamp"].replace("Z", "+00:00")).timestamp(), 3))],
+    )
+    _gauge(lines, "run_seconds", "Durée totale du dernier run", [("", summary["seconds"])])
+    _gauge(lines, "reports", "Rapports analysés par le dernier run", [("", summary["reports"])])
+    _gauge(lines, "report_errors", "Rapports en erreur dans le dernier run", [("", summary["errors"])])
+    _gauge(lines, "hosts", "Hôtes analysés par le dernier run", [("", summary["hosts"])])
+    _gauge(lines, "hosts_per_second", "Débit global du dernier run", [("", summary["hosts_per_second"])])
+    _gauge(lines, "stage_seconds", "Temps passé par étape (exclusif)", _labelled("stage", stages, "seconds"))
+    _gauge(lines, "stage_hosts", "Hôtes traités par étape", _labelled("stage", stages, "hosts"))
+    _gauge(lines, "stage_hosts_per_second", "Débit par étape", _labelled("stage", stages, "hosts_per_second"))
+    _gauge(lines, "cache_hits", "Accès servis par le cache", _labelled("cache", caches, "hits"))
+    _gauge(lines, "cache_misses", "Accès non servis par le cache", _labelled("cache", caches, "misses"))
+    _gauge(lines, "cache_hit_ratio", "Taux de succès du cache", _labelled("cache", caches, "hit_rate"))
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(summary: dict[str, Any], path: Path) -> None:
+    """Réécrit ``path`` atomiquement : le collecteur ne lit jamais un fichier à moitié écrit."""
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(to_prometheus(summary), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+__all__ = [
+    "DEFAULT_METRICS_FILE",
+    "DEFAULT_METRICS_JSON",
+    "PipelineMetrics",
+    "STAGES",
+    "to_prometheus",
+    "write_prometheus",
+]
@@ -0,0 +1,370 @@
+"""Packs de signatures déclaratifs pour les sorties de scripts NSE.
+
+Un pack est un fichier JSON ``{"name", "rules": [...]}``. Chaque règle associe
+des conditions sur un texte NSE (mis en minuscules) à une colonne de features :
+
+``{"id": "ftp-anonymous", "column": "has_anonymous_ftp", "scope": "service",
+   "all": ["anonymous"], "any": [], "regex": [], "weight": 15}``
+
+- ``all`` : sous-chaînes toutes présentes ; ``any`` : au moins une présente ;
+- ``regex`` : motifs tous présents (appliqués au texte en minuscules) ;
+- ``scope`` : ``service`` (scripts de port), ``host`` (scripts hôte) ou ``any``.
+- ``weight`` : points ajoutés au score heuristique quand la colonne est touchée ;
+  0 par défaut (règles du pack fourni comprises) : la règle ne fait alors que
+  renseigner ``signatures``, sans changer les scores.
+
+Toutes les sous-chaînes du pack (et un littéral obligatoire extrait de chaque
+regex) sont compilées en une seule regex en trie : chaque texte est parcouru une
+fois quel que soit le nombre de règles, puis seules les regex dont le littéral
+est présent et les règles dont un atome a été trouvé sont évaluées.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+DEFAULT_RULE_PACK = Path(__file__).resolve().parent / "rules/default.json"
+RULE_SCOPES = {"any", "service", "host"}
+DEFAULT_WEIGHT = 0
+# Séparateur des textes concaténés par RulePack.scan (absent des sous-chaînes).
+TEXT_SEPARATOR = "\x00"
+
+
+@dataclass(frozen=True)
+class Rule:
+    id: str
+    column: str
+    scope: str
+    all: tuple[str, ...]
+    any: tuple[str, ...]
+    regex: tuple[str, ...]
+    weight: int
+    description: str | None = None
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "Rule":
+        rule_id = data.get("id")
+        column = data.get("column")
+        if not rule_id or not column:
+            raise ValueError(f"Règle invalide (id et column obligatoires) : {data!r}")
+        scope = data.get("scope", "any")
+        if scope not in RULE_SCOPES:
+            raise ValueError(f"Règle {rule_id} : scope inconnu {scope!r}")
+        regex = data.get("regex") or []
+        rule = cls(
+            id=str(rule_id),
+            column=str(column),
+            scope=scope,
+            all=tuple(str(item).lower() for item in data.get("all") or []),
+            any=tuple(str(item).lower() for item in data.get("any") or []),
+            regex=(regex,) if isinstance(regex, str) else tuple(regex),
+            weight=int(data.get("weight", DEFAULT_WEIGHT)),
+            description=data.get("description"),
+        )
+        if not (rule.all or rule.any or rule.regex):
+            raise ValueError(f"Règle {rule_id} : aucune condition (all/any/regex)")
+        if any(not literal or TEXT_SEPARATOR in literal for literal in rule.all + rule.any):
+            raise ValueError(f"Règle {rule_id} : sous-chaîne vide ou contenant NUL")
+        for pattern in rule.regex:
+            try:
+                re.compile(pattern)
+            except re.error as exc:
+                raise ValueError(f"Règle {rule_id} : regex invalide {pattern!r} ({exc})") from exc
+        return rule
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Regex équivalente à ``a|b|c…`` mais factorisée par préfixes communs.
+
+    L'alternative la plus longue est tentée en premier à chaque position.
+    """
+
+    trie: dict[str, Any] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: dict[str, Any]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            return ("(?:" + body + ")?") if len(branches) == 1 else body + "?"
+        return body
+
+    return build(trie)
+
+
+_REGEX_META = set("()[]{}?*+|^$.")
+# Échappements qui désignent une classe ou une assertion, pas un caractère littéral.
+_REGEX_CLASS_ESCAPES = set("dDwWsSbBAZ0123456789")
+_REGEX_REPEAT = re.compile(r"\{\d*(?:,\d*)?\}")
+MIN_PREFILTER_LENGTH = 3
+
+
+def required_literal(pattern: str) -> str | None:
+    """Plus longue sous-chaîne littérale présente dans toute correspondance de ``pattern``.
+
+    Analyse volontairement simple : seules les suites de caractères au premier
+    niveau (hors groupes et classes) sont retenues, sans l'atome qui précède un
+    quantificateur ``?``, ``*`` ou ``{m,n}``, et aucune si le motif contient une
+    alternance ``|`` de premier niveau. ``None`` si rien d'assez long n'est trouvé.
+    """
+
+    runs: list[str] = []
+    current: list[str] = []
+    depth = 0
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if char == "\\" and index + 1 < len(pattern):
+            escaped = pattern[index + 1]
+            index += 2
+            if depth == 0 and escaped not in _REGEX_CLASS_ESCAPES and escaped.isascii() and not escaped.isalpha():
+                current.append(escaped)
+            else:
+                runs.append("".join(current))
+                current = []
+            continue
+        if char in "([":
+            depth += 1
+        elif char in ")]":
+            depth = max(0, depth - 1)
+        elif char == "|" and depth == 0:
+            return None
+        elif char == "{" and depth == 0 and (repeat := _REGEX_REPEAT.match(pattern, index)):
+            # Quantificateur {m,n} : l'atome précédent peut manquer, les chiffres ne sont pas du texte.
+            if current:
+                current.pop()
+            runs.append("".join(current))
+            current = []
+            index = repeat.end()
+            continue
+        if depth == 0 and char not in _REGEX_META:
+            current.append(char)
+        else:
+            if char in "?*{" and current:
+                current.pop()  # caractère précédent optionnel
+            runs.append("".join(current))
+            current = []
+        index += 1
+    runs.append("".join(current))
+    # Les textes sont mis en minuscules : un motif (?i) reste couvert.
+    best = max(runs, key=len).lower()
+    return best if len(best) >= MIN_PREFILTER_LENGTH else None
+
+
+class SignatureMatcher:
+    """Trouve en un passage tous les atomes (sous-chaînes, regex) présents dans un texte.
+
+    Les identifiants d'atomes suivent l'ordre ``literals`` puis ``patterns``. Les
+    sous-chaînes et, pour chaque regex, un littéral obligatoire (``required_literal``)
+    sont cherchés ensemble par une seule regex en trie ; une regex n'est exécutée
+    que si son littéral a été vu (ou toujours, faute de littéral exploitable).
+    Une grande alternance ``(?P<a>…)|(?P<b>…)`` coûterait un temps quadratique en
+    nombre de groupes avec le moteur ``re``.
+    """
+
+    __slots__ = ("_trie_re", "_implied", "_patterns", "_unfiltered", "prefilter")
+
+    def __init__(self, literals: list[str], patterns: list[str]) -> None:
+        literal_ids = {literal: index for index, literal in enumerate(literals)}
+        prefilters: dict[str, list[int]] = {}
+        self._patterns: dict[int, re.Pattern[str]] = {}
+        self._unfiltered: list[int] = []
+        for offset, pattern in enumerate(patterns):
+            atom = len(literals) + offset
+            self._patterns[atom] = re.compile(pattern)
+            literal = required_literal(pattern)
+            if literal is None:
+                self._unfiltered.append(atom)
+            else:
+                prefilters.setdefault(literal, []).append(atom)
+        words = sorted(set(literals) | set(prefilters))
+        self._trie_re = re.compile(_trie_pattern(words)) if words else None
+        # ``prefilter(texte) is None`` garantit qu'aucun atome n'est présent ; à appeler
+        # avant ``atoms`` dans les boucles chaudes (``None`` : pas de préfiltre possible).
+        self.prefilter = self._trie_re.search if self._trie_re is not None and not self._unfiltered else None
+        # La regex en trie renvoie la plus longue sous-chaîne à une position donnée :
+        # celles qui en sont des préfixes sont présentes aussi.
+        self._implied: dict[str, tuple[tuple[int, ...], tuple[int, ...]]] = {}
+        for word in words:
+            prefixes = [word[:end] for end in range(1, len(word) + 1)]
+            self._implied[word] = (
+                tuple(literal_ids[prefix] for prefix in prefixes if prefix in literal_ids),
+                tuple(atom for prefix in prefixes for atom in prefilters.get(prefix, ())),
+            )
+
+    def atoms(self, text: str) -> set[int]:
+        match = self._trie_re.search(text) if self._trie_re is not None else None
+        if match is None and not self._unfiltered:
+            # Cas de loin le plus fréquent : aucun littéral du pack dans le texte.
+            return set()
+        found: set[int] = set()
+        to_check: set[int] = set()
+        if match is not None:
+            search = self._trie_re.search  # type: ignore[union-attr]
+            implied = self._implied
+            while match is not None:
+                literal_atoms, pattern_atoms = implied[match.group()]
+                found.update(literal_atoms)
+                to_check.update(pattern_atoms)
+                # Reprise à start + 1 : les occurrences qui se chevauchent sont aussi trouvées.
+                match = search(text, match.start() + 1)
+        to_check.update(self._unfiltered)
+        for atom in to_check:
+            if self._patterns[atom].search(text):
+                found.add(atom)
+        return found
+
+
+def _pack_digest(entries: list[list[Any]]) -> str:
+    return hashlib.sha1(json.dumps(entries, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+class RulePack:
+    """Pack compilé : ``match`` renvoie les indices des règles satisfaites par un texte."""
+
+    def __init__(self, rules: list[Rule], *, name: str = "custom") -> None:
+        seen: set[str] = set()
+        for rule in rules:
+            if rule.id in seen:
+                raise ValueError(f"Identifiant de règle dupliqué : {rule.id}")
+            seen.add(rule.id)
+        self.name = name
+        self.rules = rules
+        self.by_id = {rule.id: rule for rule in rules}
+        literals = sorted({literal for rule in rules for literal in rule.all + rule.any})
+        patterns = sorted({pattern for rule in rules for pattern in rule.regex})
+        literal_ids = {literal: index for index, literal in enumerate(literals)}
+        pattern_ids = {pattern: len(literals) + index for index, pattern in enumerate(patterns)}
+        self.matcher = SignatureMatcher(literals, patterns)
+        self.prefilter = self.matcher.prefilter
+        self._required: list[frozenset[int]] = []
+        self._optional: list[frozenset[int]] = []
+        for rule in rules:
+            self._required.append(
+                frozenset(
+                    [literal_ids[literal] for literal in rule.all] + [pattern_ids[pattern] for pattern in rule.regex]
+                )
+            )
+            self._optional.append(frozenset(literal_ids[literal] for literal in rule.any))
+        usage: dict[int, int] = {}
+        for atoms in self._required + self._optional:
+            for atom in atoms:
+                usage[atom] = usage.get(atom, 0) + 1
+        # Une règle n'est indexée que par son atome obligatoire le moins partagé : un
+        # mot courant (« apache ») ne réveille pas toutes les règles qui le citent.
+        self._by_atom: dict[int, list[int]] = {}
+        for index, (required, optional) in enumerate(zip(self._required, self._optional)):
+            keys = [min(required, key=usage.__getitem__)] if required else optional
+            for atom in keys:
+                self._by_atom.setdefault(atom, []).append(index)
+        self.service_rules = frozenset(index for index, rule in enumerate(rules) if rule.scope != "host")
+        self.host_rules = frozenset(index for index, rule in enumerate(rules) if rule.scope != "service")
+        self.columns = sorted({rule.column for rule in rules})
+        matching = [[rule.id, rule.column, rule.scope, rule.all, rule.any, rule.regex] for rule in rules]
+        # ``match_digest`` : ce qui détermine les features (clé du cache de features) ;
+        # ``digest`` y ajoute les poids, qui entrent dans le score heuristique (état
+        # différentiel, compatibilité du service de scoring).
+        self.match_digest = _pack_digest(matching)
+        self.digest = _pack_digest([[*entry, rule.weight] for entry, rule in zip(matching, rules)])
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def match(self, lowered: str) -> tuple[int, ...]:
+        atoms = self.matcher.atoms(lowered)
+        if not atoms:
+            return ()
+        candidates: set[int] = set()
+        for atom in atoms:
+            candidates.update(self._by_atom.get(atom, ()))
+        return tuple(
+            sorted(
+                index
+                for index in candidates
+                if self._required[index] <= atoms and (not self._optional[index] or self._optional[index] & atoms)
+            )
+        )
+
+    def scan(self, texts: Iterable[str], allowed: frozenset[int], hits: dict[int, None]) -> None:
+        """Ajoute à ``hits`` les règles de ``allowed`` déclenchées par au moins un texte.
+
+        Les textes sont concaténés et mis en minuscules en un seul appel : la regex
+        en trie parcourt tout le lot d'un coup et seuls les textes qui contiennent
+        un littéral sont évalués individuellement.
+        """
+
+        blob = TEXT_SEPARATOR.join(texts).lower()
+        if self.prefilter is None:
+            pieces: Iterable[str] = blob.split(TEXT_SEPARATOR)
+        else:
+            pieces = self._pieces_with_literals(blob)
+        for piece in pieces:
+            for index in self.match(piece):
+                if index in allowed:
+                    hits[index] = None
+
+    def _pieces_with_literals(self, blob: str) -> Iterator[str]:
+        search = self.prefilter
+        match = search(blob)  # type: ignore[misc]
+        while match is not None:
+            start = blob.rfind(TEXT_SEPARATOR, 0, match.start()) + 1
+            end = blob.find(TEXT_SEPARATOR, match.start())
+            if end < 0:
+                end = len(blob)
+            yield blob[start:end]
+            match = search(blob, end + 1)  # type: ignore[misc]
+
+    def columns_for(self, hits: Iterable[int]) -> dict[str, list[str]]:
+        """Regroupe des indices de règles par colonne : ``{colonne: [ids]}``."""
+
+        columns: dict[str, list[str]] = {}
+        for index in hits:
+            rule = self.rules[index]
+            columns.setdefault(rule.column, []).append(rule.id)
+        return columns
+
+
+def load_rule_pack(path: Path) -> RulePack:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    if not isinstance(data, dict) or not isinstance(data.get("rules"), list):
+        raise ValueError(f"{path} : pack de règles attendu sous la forme {{\"rules\": [...]}}")
+    return RulePack([Rule.from_dict(rule) for rule in data["rules"]], name=data.get("name") or path.stem)
+
+
+_ACTIVE: RulePack | None = None
+
+
+def get_rule_pack() -> RulePack:
+    """Pack utilisé par l'extraction (``SOC_RULE_PACK`` ou ``rules/default.json``)."""
+
+    global _ACTIVE
+    if _ACTIVE is None:
+        _ACTIVE = load_rule_pack(Path(os.environ.get("SOC_RULE_PACK") or DEFAULT_RULE_PACK))
+    return _ACTIVE
+
+
+def set_rule_pack(pack: RulePack) -> None:
+    global _ACTIVE
+    _ACTIVE = pack
+
+
+__all__ = [
+    "DEFAULT_RULE_PACK",
+    "Rule",
+    "RulePack",
+    "SignatureMatcher",
+    "get_rule_pack",
+    "load_rule_pack",
+    "set_rule_pack",
+]
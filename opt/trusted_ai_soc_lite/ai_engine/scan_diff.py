@@ -0,0 +1,239 @@
+"""Différentiel scan à scan : seuls les hôtes nouveaux ou modifiés sont re-scorés.
+
+Chaque hôte reçoit une empreinte (adresse + empreinte par port ouvert : service,
+produit, version, textes NSE ; plus une empreinte des scripts hôte, du nom et de
+l'OS). L'état du dernier scan d'un même périmètre (clé = scanner + cibles et
+options, hors options de sortie) est conservé dans un fichier JSON avec
+l'événement IA de chaque hôte, ce qui permet de réutiliser tel quel l'événement
+d'un hôte inchangé.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shlex
+import time
+import xml.etree.ElementTree as ET
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any, Iterable
+
+from feature_engineering import _iter_script_outputs
+from rule_pack import get_rule_pack
+from xml_features import _iter_script_texts
+
+STATE_VERSION = 1
+# Options de sortie Nmap : run_scan.sh horodate le chemin de -oX, qui ne décrit pas le périmètre.
+OUTPUT_OPTIONS = ("-oX", "-oN", "-oG", "-oA", "-oS", "-oM", "--stylesheet")
+
+
+def _digest(*parts: Any) -> str:
+    payload = json.dumps(parts, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _texts_digest(texts: Iterable[str]) -> str:
+    # Trié : l'ordre des scripts NSE peut varier d'un scan à l'autre. Les doublons
+    # restent comptés : l'extraction les prend en compte (avg_cvss).
+    return _digest(sorted(texts))
+
+
+def _fingerprint(
+    hostname: str | None,
+    os_name: str | None,
+    host_texts: Iterable[str],
+    ports: dict[str, str],
+) -> dict[str, Any]:
+    host_part = _digest(hostname, os_name, _texts_digest(host_texts))
+    return {
+        "digest": _digest(host_part, sorted(ports.items())),
+        "host": host_part,
+        "ports": ports,
+    }
+
+
+def fingerprint_host(host: dict[str, Any]) -> dict[str, Any]:
+    """Empreinte d'un hôte au format ``parse_nmap.py`` (JSON, JSONL, msgpack)."""
+
+    ports: dict[str, str] = {}
+    for svc in host.get("services", []):
+        if svc.get("state") != "open":
+            continue
+        service = svc.get("service") or {}
+        ports[f"{svc.get('protocol')}/{svc.get('portid')}"] = _digest(
+            service.get("name"),
+            service.get("product"),
+            service.get("version"),
+            _texts_digest(_iter_script_outputs(svc.get("scripts", []))),
+        )
+    return _fingerprint(
+        host.get("hostname"),
+        host.get("os"),
+        _iter_script_outputs(host.get("scripts", [])),
+        ports,
+    )
+
+
+def fingerprint_xml_host(host_elem: ET.Element) -> dict[str, Any]:
+    """Même empreinte que :func:`fingerprint_host`, calculée sur un ``<host>`` XML."""
+
+    ports: dict[str, str] = {}
+    ports_elem = host_elem.find("ports")
+    if ports_elem is not None:
+        for port in ports_elem.findall("port"):
+            state = port.find("state")
+            if state is None or state.attrib.get("state") != "open":
+                continue
+            service = port.find("service")
+            attrib = service.attrib if service is not None else {}
+            ports[f"{port.attrib.get('protocol')}/{port.attrib.get('portid')}"] = _digest(
+                attrib.get("name"),
+                attrib.get("product"),
+                attrib.get("version"),
+                _texts_digest(_iter_script_texts(port)),
+            )
+    hostname_elem = host_elem.find("hostnames/hostname")
+    osmatch = host_elem.find("os/osmatch")
+    return _fingerprint(
+        hostname_elem.attrib.get("name") if hostname_elem is not None else None,
+        osmatch.attrib.get("name") if osmatch is not None else None,
+        _iter_script_texts(host_elem.find("hostscript")),
+        ports,
+    )
+
+
+def normalize_scan_args(args: str | None) -> list[str]:
+    """Arguments du scan sans le programme ni les options de sortie (et leur valeur)."""
+
+    try:
+        tokens = shlex.split(args or "")
+    except ValueError:  # guillemet non fermé : découpage simple
+        tokens = (args or "").split()
+    normalized: list[str] = []
+    skip = False
+    for token in tokens[1:]:
+        if skip:
+            skip = False
+        elif token in OUTPUT_OPTIONS:
+            skip = True
+        elif not token.startswith(OUTPUT_OPTIONS):
+            normalized.append(token)
+    return normalized
+
+
+def target_key(metadata: dict[str, Any]) -> str:
+    """Identifie un périmètre de scan : même scanner, mêmes cibles (``-iL`` ou liste) et mêmes options.
+
+    Les options de sortie sont ignorées (voir :func:`normalize_scan_args`) : deux
+    scans successifs de ``run_scan.sh`` partagent la même clé.
+    """
+
+    return _digest(metadata.get("scanner"), normalize_scan_args(metadata.get("args")))
+
+
+def compare_fingerprints(previous: dict[str, Any], current: dict[str, Any]) -> dict[str, Any]:
+    old_ports = previous.get("ports") or {}
+    new_ports = current.get("ports") or {}
+    return {
+        "ports_added": sorted(set(new_ports) - set(old_ports)),
+        "ports_removed": sorted(set(old_ports) - set(new_ports)),
+        "ports_changed": sorted(
+            port for port in set(old_ports) & set(new_ports) if old_ports[port] != new_ports[port]
+        ),
+        "host_changed": previous.get("host") != current.get("host"),
+    }
+
+
+class ScanDiffState:
+    """Dernier état connu (empreintes + événements) par périmètre de scan."""
+
+    def __init__(self, path: Path, *, max_age: float | None = None) -> None:
+        self.path = path
+        self.max_age = max_age
+        self.targets: dict[str, dict[str, Any]] = {}
+        if path.exists():
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+            except json.JSONDecodeError:
+                data = {}
+            if isinstance(data, dict) and data.get("version") == STATE_VERSION:
+                self.targets = data.get("targets") or {}
+
+    def baseline(self, key: str, signature: str) -> tuple[str | None, dict[str, dict[str, Any]], bool]:
+        """Retourne ``(scan_id, hôtes, réutilisable)`` du dernier scan du périmètre.
+
+        Les événements ne sont pas réutilisables si le modèle ou les options de
+        scoring ont changé (``signature``) : le delta reste calculé mais tous les
+        hôtes sont re-scorés.
+        """
+
+        entry = self.targets.get(key)
+        if not entry:
+            return None, {}, False
+        return entry.get("scan_id"), dict(entry.get("hosts") or {}), entry.get("signature") == signature
+
+    def is_fresh(self, host: dict[str, Any]) -> bool:
+        # Au-delà de max_age, l'événement est recalculé (les données TI vieillissent).
+        if self.max_age is None:
+            return True
+        return time.time() - float(host.get("scored_at", 0)) <= self.max_age
+
+    def commit(self, key: str, scan_id: str, signature: str, hosts: dict[str, dict[str, Any]]) -> None:
+        self.targets[key] = {"scan_id": scan_id, "signature": signature, "hosts": hosts}
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        tmp_path.write_text(
+            json.dumps({"version": STATE_VERSION, "targets": self.targets}, ensure_ascii=False),
+            encoding="utf-8",
+        )
+        os.replace(tmp_path, self.path)
+
+
+def scoring_signature(
+    model_path: Path, model: Any, *, enable_shap: bool, enable_lime: bool, ti_offline: bool, explain: str = ""
+) -> str:
+    """Résume ce qui influence un événement en dehors de l'hôte lui-même."""
+
+    if model is None:
+        model_part = "heuristic"
+    else:
+        stat = model_path.stat()
+        model_part = f"{model_path.resolve()}:{stat.st_size}:{stat.st_mtime_ns}"
+    return _digest(model_part, enable_shap, enable_lime, explain, ti_offline, get_rule_pack().digest)
+
+
+def build_delta(
+    scan_id: str,
+    previous_scan_id: str | None,
+    key: str,
+    *,
+    added: list[dict[str, Any]],
+    removed: list[dict[str, Any]],
+    changed: list[dict[str, Any]],
+    unchanged: int,
+) -> dict[str, Any]:
+    return {
+        "timestamp": datetime.now(tz=UTC).isoformat().replace("+00:00", "Z"),
+        "scan_id": scan_id,
+        "previous_scan_id": previous_scan_id,
+        "target_key": key,
+        "added": added,
+        "removed": removed,
+        "changed": changed,
+        "unchanged": unchanged,
+    }
+
+
+__all__ = [
+    "ScanDiffState",
+    "build_delta",
+    "compare_fingerprints",
+    "fingerprint_host",
+    "fingerprint_xml_host",
+    "normalize_scan_args",
+    "scoring_signature",
+    "target_key",
+]
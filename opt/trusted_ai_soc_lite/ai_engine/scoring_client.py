@@ -0,0 +1,124 @@
+"""Client du service de scoring résident (``scoring_daemon.py``).
+
+Le protocole est volontairement minimal : une requête JSON par ligne sur un
+socket Unix local, une réponse JSON par ligne (``{"ok": true, ...}`` ou
+``{"ok": false, "error": "..."}``). Toute erreur (socket absent, service arrêté,
+réponse invalide) lève :class:`ScoringUnavailable` : l'appelant repasse alors au
+scoring dans son propre processus.
+"""
+from __future__ import annotations
+
+import json
+import socket
+from pathlib import Path
+from typing import Any, Sequence
+
+from feature_engineering import HostFeatures
+from ti_enricher import ThreatIntelResult
+
+DEFAULT_SOCKET = Path(__file__).resolve().parent / "logs/scoring.sock"
+CONNECT_TIMEOUT = 1.0
+# Un lot avec SHAP/LIME peut prendre du temps côté service.
+REQUEST_TIMEOUT = 600.0
+
+
+class ScoringUnavailable(RuntimeError):
+    """Le service de scoring ne peut pas traiter la requête."""
+
+
+class ScoringClient:
+    """Connexion à un ``scoring_daemon.py`` ; une requête à la fois."""
+
+    def __init__(self, socket_path: Path, *, timeout: float = REQUEST_TIMEOUT) -> None:
+        self.socket_path = socket_path
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self._sock.settimeout(CONNECT_TIMEOUT)
+            self._sock.connect(str(socket_path))
+            self._sock.settimeout(timeout)
+        except OSError as exc:
+            self._sock.close()
+            raise ScoringUnavailable(f"service de scoring injoignable ({socket_path}) : {exc}") from exc
+        self._reader = self._sock.makefile("rb")
+
+    @classmethod
+    def connect(cls, socket_path: Path) -> "ScoringClient | None":
+        """Client connecté, ou ``None`` si aucun service n'écoute sur ``socket_path``."""
+
+        if not socket_path.exists():
+            return None
+        try:
+            return cls(socket_path)
+        except ScoringUnavailable:
+            return None
+
+    def __enter__(self) -> "ScoringClient":
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._reader.close()
+        self._sock.close()
+
+    def request(self, payload: dict[str, Any]) -> dict[str, Any]:
+        try:
+            self._sock.sendall(json.dumps(payload, ensure_ascii=False).encode("utf-8") + b"\n")
+            line = self._reader.readline()
+        except OSError as exc:
+            raise ScoringUnavailable(f"service de scoring interrompu : {exc}") from exc
+        if not line:
+            raise ScoringUnavailable("service de scoring : connexion fermée")
+        try:
+            response = json.loads(line)
+        except json.JSONDecodeError as exc:
+            raise ScoringUnavailable(f"service de scoring : réponse invalide ({exc})") from exc
+        if not response.get("ok"):
+            raise ScoringUnavailable(f"service de scoring : {response.get('error', 'erreur inconnue')}")
+        return response
+
+    def status(self) -> dict[str, Any]:
+        """État du service : ``model_path``, ``model`` (empreinte ou ``None``), ``rule_pack``…"""
+
+        return self.request({"op": "status"})
+
+    def score(
+        self,
+        features: Sequence[HostFeatures],
+        *,
+        enable_shap: bool,
+        enable_lime: bool,
+        ti_cache: Path | None,
+        ti_offline: bool,
+        explain_min_level: str = "low",
+        explain_top: int = 0,
+    ) -> list[dict[str, Any]]:
+        """Score un lot d'hôtes ; un dict par hôte (``score``, ``reasons``, ``shap``, ``lime``, ``threat_intel``).
+
+        ``threat_intel`` est reconverti en :class:`ThreatIntelResult` (ou ``None``). SHAP/LIME ne
+        portent que sur les hôtes d'au moins ``explain_min_level`` (et les ``explain_top`` meilleurs).
+        """
+
+        response = self.request(
+            {
+                "op": "score",
+                "features": [feat.to_dict() for feat in features],
+                "shap": enable_shap,
+                "lime": enable_lime,
+                "explain_min_level": explain_min_level,
+                "explain_top": explain_top,
+                "ti_cache": str(ti_cache.resolve()) if ti_cache is not None else None,
+                "ti_offline": ti_offline,
+            }
+        )
+        results = response.get("results") or []
+        if len(results) != len(features):
+            raise ScoringUnavailable("service de scoring : nombre de résultats inattendu")
+        for result in results:
+            ti_data = result.get("threat_intel")
+            result["threat_intel"] = ThreatIntelResult(**ti_data) if ti_data else None
+        return results
+
+
+__all__ = ["DEFAULT_SOCKET", "ScoringClient", "ScoringUnavailable"]
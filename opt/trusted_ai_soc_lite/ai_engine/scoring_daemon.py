@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""Service de scoring résident sur socket Unix local.
+
+Garde en mémoire le modèle, l'explainer SHAP et les clients TI entre deux
+analyses : ``analyse_scan.py`` lui envoie ses lots de features au lieu de
+réimporter sklearn et de recharger ``model.pkl`` à chaque scan. Le fichier du
+modèle est surveillé (mtime/taille puis SHA-256) et rechargé à chaud ; un
+fichier illisible (copie en cours) laisse le modèle précédent en service.
+
+Exemple :
+    python3 scoring_daemon.py --model models/model.pkl --socket logs/scoring.sock
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+try:
+    import joblib
+except ModuleNotFoundError:  # pragma: no cover - dépendance optionnelle
+    joblib = None  # type: ignore
+
+from analyse_scan import DEFAULT_MODEL, DEFAULT_SHAP_CACHE, ExplainPolicy, heuristic_score, score_batch_with_model
+from feature_engineering import FEATURE_NAMES, FeatureMatrix, HostFeatures
+from history_store import RISK_LEVELS
+from lime_explainer import explain_with_lime
+from rule_pack import get_rule_pack, load_rule_pack, set_rule_pack
+from scoring_client import DEFAULT_SOCKET
+from shap_explainer import build_shap_explainer, explain_with_shap
+from ti_enricher import ThreatIntelClient
+
+
+class ResidentModel:
+    """Modèle chargé une fois puis rechargé quand le contenu de ``path`` change."""
+
+    def __init__(self, path: Path, *, shap_cache: Path | None = None) -> None:
+        self.path = path
+        self.shap_cache = shap_cache
+        self.model: Any = None
+        self.digest: str | None = None
+        self.loaded_at: float | None = None
+        self._stat: tuple[int, int] | None = None
+        self._shap_explainer: Any = None
+
+    def refresh(self) -> None:
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            if self.model is not None:
+                print(f"[WARN] Modèle {self.path} supprimé → heuristique intégrée", file=sys.stderr)
+            self.model = self.digest = self.loaded_at = self._stat = self._shap_explainer = None
+            return
+        if (stat.st_mtime_ns, stat.st_size) == self._stat:
+            return
+        data = self.path.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+        if digest != self.digest:
+            if joblib is None:
+                print("[WARN] joblib/scikit-learn non installés → heuristique intégrée", file=sys.stderr)
+                return
+            try:
+                # Chargé depuis les octets hachés : l'empreinte décrit exactement le modèle servi.
+                model = joblib.load(io.BytesIO(data))
+            except Exception as exc:  # noqa: BLE001 - fichier en cours d'écriture, pickle invalide…
+                print(f"[WARN] Rechargement de {self.path} impossible ({exc}) → modèle précédent conservé", file=sys.stderr)
+                return
+            self.model, self.digest, self.loaded_at = model, digest, time.time()
+            self._shap_explainer = None
+            print(f"[INFO] Modèle chargé : {self.path} ({digest[:12]})")
+        self._stat = (stat.st_mtime_ns, stat.st_size)
+
+    def shap_explainer(self) -> Any:
+        if self._shap_explainer is None and self.model is not None:
+            self._shap_explainer = build_shap_explainer(self.model, digest=self.digest, cache_dir=self.shap_cache)
+        return self._shap_explainer
+
+
+class ScoringService:
+    """Traite les requêtes du protocole ``scoring_client`` (une à la fois)."""
+
+    def __init__(self, model_path: Path, *, shap_cache: Path | None = None) -> None:
+        self.model = ResidentModel(model_path, shap_cache=shap_cache)
+        self.started_at = time.time()
+        self.requests = 0
+        self.hosts = 0
+        self._ti_clients: dict[tuple[str | None, bool], ThreatIntelClient] = {}
+        self._lock = threading.Lock()
+
+    def _ti_client(self, cache: str | None, offline: bool) -> ThreatIntelClient:
+        key = (cache, offline)
+        client = self._ti_clients.get(key)
+        if client is None:
+            client = self._ti_clients[key] = ThreatIntelClient(
+                cache_path=Path(cache) if cache else None, offline=offline
+            )
+        return client
+
+    def handle(self, request: dict[str, Any]) -> dict[str, Any]:
+        with self._lock:
+            self.requests += 1
+            self.model.refresh()
+            op = request.get("op")
+            if op == "status":
+                return {"ok": True, **self.status()}
+            if op == "score":
+                return {"ok": True, "model": self.model.digest, "results": self.score(request)}
+            return {"ok": False, "error": f"opération inconnue : {op!r}"}
+
+    def status(self) -> dict[str, Any]:
+        return {
+            "pid": os.getpid(),
+            "model_path": str(self.model.path.resolve()),
+            "model": self.model.digest,
+            "model_loaded_at": self.model.loaded_at,
+            "rule_pack": get_rule_pack().digest,
+            "uptime": time.time() - self.started_at,
+            "requests": self.requests,
+            "hosts": self.hosts,
+        }
+
+    def score(self, request: dict[str, Any]) -> list[dict[str, Any]]:
+        features = [HostFeatures.from_dict(item) for item in request.get("features") or []]
+        self.hosts += len(features)
+        model = self.model.model
+        matrix = FeatureMatrix.from_features(features)
+        if model is not None:
+            scores = score_batch_with_model(model, features, matrix)
+        else:
+            scores = [heuristic_score(feat) for feat in features]
+        # Client antérieur à la politique d'explication : tous les hôtes sont expliqués.
+        ti_client = self._ti_client(request.get("ti_cache"), bool(request.get("ti_offline")))
+        threat_intel = [ti_client.enrich(feat.host or feat.hostname, feat.cve_list) for feat in features]
+        level = request.get("explain_min_level")
+        explain = ExplainPolicy(level if level in RISK_LEVELS else "low", int(request.get("explain_top") or 0))
+        explained = model is not None and (request.get("shap") or request.get("lime"))
+        rows = explain.rows(scores, threat_intel) if explained else []
+        shap_payloads = (
+            explain_with_shap(model, matrix.values, FEATURE_NAMES, explainer=self.model.shap_explainer(), rows=rows)
+            if request.get("shap") and rows
+            else None
+        )
+        lime_payloads = (
+            explain_with_lime(model, matrix.values, FEATURE_NAMES, rows=rows) if request.get("lime") and rows else None
+        )
+
+        results: list[dict[str, Any]] = []
+        for pos, ((score, reasons), ti_data) in enumerate(zip(scores, threat_intel)):
+            results.append(
+                {
+                    "score": score,
+                    "reasons": reasons,
+                    "shap": shap_payloads[pos] if shap_payloads else None,
+                    "lime": lime_payloads[pos] if lime_payloads else None,
+                    "threat_intel": ti_data.to_dict() if ti_data else None,
+                }
+            )
+        return results
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        service: ScoringService = self.server.service  # type: ignore[attr-defined]
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                response = service.handle(json.loads(line))
+            except Exception as exc:  # noqa: BLE001 - la requête échoue, pas le service
+                response = {"ok": False, "error": f"{type(exc).__name__}: {exc}"}
+            self.wfile.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+
+
+class ScoringServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: Path, service: ScoringService) -> None:
+        self.service = service
+        super().__init__(str(socket_path), _RequestHandler)
+
+
+def _socket_in_use(socket_path: Path) -> bool:
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(str(socket_path))
+    except OSError:
+        return False
+    finally:
+        probe.close()
+    return True
+
+
+def serve(socket_path: Path, model_path: Path, *, shap_cache: Path | None = None) -> None:
+    if socket_path.exists():
+        if _socket_in_use(socket_path):
+            raise SystemExit(f"[ERREUR] Un service de scoring écoute déjà sur {socket_path}")
+        socket_path.unlink()  # socket orphelin d'un service arrêté brutalement
+    socket_path.parent.mkdir(parents=True, exist_ok=True)
+
+    service = ScoringService(model_path, shap_cache=shap_cache)
+    service.model.refresh()
+    previous_umask = os.umask(0o077)  # socket accessible au seul utilisateur du service
+    try:
+        server = ScoringServer(socket_path, service)
+    finally:
+        os.umask(previous_umask)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    print(f"[INFO] Service de scoring à l'écoute sur {socket_path} (pid {os.getpid()})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)  # un second signal n'interrompt pas le nettoyage
+        server.server_close()
+        socket_path.unlink(missing_ok=True)
+        print(f"[INFO] Service de scoring arrêté ({service.requests} requêtes, {service.hosts} hôtes)")
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Service de scoring IA résident (socket Unix)")
+    parser.add_argument("--socket", type=Path, default=DEFAULT_SOCKET)
+    parser.add_argument("--model", type=Path, default=DEFAULT_MODEL)
+    parser.add_argument(
+        "--rule-pack",
+        type=Path,
+        default=None,
+        help="Pack de signatures JSON (défaut : $SOC_RULE_PACK ou rules/default.json)",
+    )
+    parser.add_argument(
+        "--shap-cache",
+        type=Path,
+        default=DEFAULT_SHAP_CACHE,
+        help="Dossier des explainers SHAP sérialisés par empreinte de modèle",
+    )
+    parser.add_argument(
+        "--no-shap-cache", action="store_true", help="Reconstruit l'explainer SHAP à chaque chargement du modèle"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str]) -> int:
+    args = parse_args(argv)
+    sys.stdout.reconfigure(line_buffering=True)  # journal lisible en direct (service en arrière-plan)
+    if args.rule_pack is not None:
+        set_rule_pack(load_rule_pack(args.rule_pack))
+    serve(args.socket, args.model, shap_cache=None if args.no_shap_cache else args.shap_cache)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -1,12 +1,105 @@
 """Utilities to generate SHAP explanations (with graceful fallbacks)."""
 from __future__ import annotations
 
+import hashlib
+import os
+import pickle
+from pathlib import Path
 from typing import Sequence
 
-try:  # pragma: no cover - optional dependency
-    import shap  # type: ignore
-except ModuleNotFoundError:  # pragma: no cover - shap absent in CI
-    shap = None  # type: ignore
+from lazy_imports import optional_import
+
+# Explainers already built in this process (batch mode, --follow, scoring daemon), per model digest.
+_EXPLAINERS: dict[str, object] = {}
+# A daemon reloading successive models keeps only the most recent ones.
+_MAX_EXPLAINERS = 4
+
+
+def _tree_model(model: object) -> object:
+    """Compiled forests (``forest_eval.PackedForest``) hand SHAP their sklearn source model."""
+
+    source_model = getattr(model, "source_model", None)
+    return source_model() if callable(source_model) else model
+
+
+def model_digest(model: object, model_path: Path | None = None) -> str | None:
+    """SHA-256 identifying the trees of ``model``.
+
+    Compiled forests carry the digest of their source ``model.pkl``; otherwise
+    ``model_path`` is hashed.
+    """
+
+    digest = getattr(model, "source_digest", None)
+    if digest:
+        return digest
+    if model_path is None:
+        return None
+    try:
+        return hashlib.sha256(model_path.read_bytes()).hexdigest()
+    except OSError:
+        return None
+
+
+def _cache_file(cache_dir: Path, digest: str, shap: object) -> Path:
+    # A pickle from another SHAP release may not load: the version is part of the name.
+    return cache_dir / f"{digest}-shap{getattr(shap, '__version__', 'unknown')}.pkl"
+
+
+def _load_cached(path: Path) -> object | None:
+    try:
+        with path.open("rb") as fh:
+            return pickle.load(fh)
+    except Exception:  # noqa: BLE001 - missing, truncated or stale pickle: rebuilt by the caller
+        return None
+
+
+def _save_cached(path: Path, explainer: object) -> None:
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tmp.open("wb") as fh:
+            pickle.dump(explainer, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except Exception:  # noqa: BLE001 - the cache is only an optimisation
+        tmp.unlink(missing_ok=True)
+
+
+def build_shap_explainer(
+    model: object,
+    *,
+    model_path: Path | None = None,
+    digest: str | None = None,
+    cache_dir: Path | None = None,
+) -> object | None:
+    """Build a reusable ``TreeExplainer`` for ``model`` (``None`` if unavailable).
+
+    When the model content is known (``digest``, or the compiled forest /
+    ``model_path`` via :func:`model_digest`), the explainer is kept for the
+    rest of the process and, with ``cache_dir``, pickled there so the next run
+    skips the tree conversion. The cache only holds explainers of models this
+    host already loads from ``models/``.
+    """
+
+    shap = optional_import("shap") if model is not None else None
+    if shap is None:
+        return None
+    digest = digest or model_digest(model, model_path)
+    if digest is not None and digest in _EXPLAINERS:
+        return _EXPLAINERS[digest]
+    path = _cache_file(cache_dir, digest, shap) if digest is not None and cache_dir is not None else None
+    explainer = _load_cached(path) if path is not None else None
+    if explainer is None:
+        try:
+            explainer = shap.TreeExplainer(_tree_model(model))
+        except Exception:  # noqa: BLE001 - graceful fallback
+            return None
+        if path is not None:
+            _save_cached(path, explainer)
+    if digest is not None:
+        if len(_EXPLAINERS) >= _MAX_EXPLAINERS:
+            _EXPLAINERS.pop(next(iter(_EXPLAINERS)))
+        _EXPLAINERS[digest] = explainer
+    return explainer
 
 
 def explain_with_shap(
@@ -15,26 +108,45 @@ def explain_with_shap(
     feature_names: Sequence[str],
     *,
     top_k: int = 5,
-) -> list[list[dict[str, float]]] | None:
+    explainer: object | None = None,
+    rows: Sequence[int] | None = None,
+) -> list[list[dict[str, float]] | None] | None:
     """Return the top-K SHAP contributors per host.
 
-    When the SHAP library is unavailable (or fails at runtime) the function
+    ``feature_vectors`` may be a NumPy matrix (``FeatureMatrix.values``), which
+    is handed to SHAP as-is. When the SHAP library is unavailable (or fails at runtime) the function
     returns ``None`` so that the IA pipeline can continue without interruption.
+    A long-lived caller (scoring daemon) may pass an ``explainer`` built once
+    with :func:`build_shap_explainer`. With ``rows``, only those rows are
+    explained and the other hosts get ``None``. SHAP is only imported here,
+    never at module load.
     """
 
-    if shap is None or model is None or not feature_vectors:
+    if model is None or len(feature_vectors) == 0 or (rows is not None and not rows):
+        return None
+    shap = optional_import("shap")
+    if shap is None:
         return None
+    selected = feature_vectors
+    if rows is not None:
+        np = optional_import("numpy")
+        if np is None:
+            return None
+        selected = np.asarray(feature_vectors, dtype=np.float64)[list(rows)]
 
+    if explainer is None:
+        explainer = build_shap_explainer(model)
+        if explainer is None:
+            return None
     try:
-        explainer = shap.TreeExplainer(model)
-        shap_values = explainer.shap_values(feature_vectors)
+        shap_values = explainer.shap_values(selected)
     except Exception:  # noqa: BLE001 - propagate as graceful fallback
         return None
 
     if isinstance(shap_values, list):
         shap_values = shap_values[-1]
 
-    payload: list[list[dict[str, float]]] = []
+    payload: list[list[dict[str, float]] | None] = []
     for row in shap_values:
         pairs = sorted(
             zip(feature_names, row), key=lambda item: abs(item[1]), reverse=True
@@ -45,7 +157,12 @@ def explain_with_shap(
                 for name, value in pairs[:top_k]
             ]
         )
-    return payload
+    if rows is None:
+        return payload
+    scattered: list[list[dict[str, float]] | None] = [None] * len(feature_vectors)
+    for pos, contribution in zip(rows, payload):
+        scattered[pos] = contribution
+    return scattered
 
 
-__all__ = ["explain_with_shap"]
+__all__ = ["build_shap_explainer", "explain_with_shap", "model_digest"]
@@ -0,0 +1,81 @@
+"""Profil du démarrage d'``analyse_scan.py`` (``--profile-startup``).
+
+L'analyse est relancée dans un sous-processus ``python -X importtime`` : les
+imports faits au chargement des modules comme ceux différés jusqu'à leur premier
+usage (modèle, SHAP, LIME…) sont mesurés par l'interpréteur lui-même. Les autres
+messages d'erreur standard de l'analyse sont retransmis tels quels.
+"""
+from __future__ import annotations
+
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Sequence, TextIO
+
+IMPORTTIME_PREFIX = "import time:"
+
+
+@dataclass(slots=True)
+class ImportTiming:
+    module: str
+    depth: int
+    self_us: int
+    cumulative_us: int
+
+
+def parse_importtime(lines: Iterable[str]) -> tuple[list[ImportTiming], list[str]]:
+    """Sépare les lignes ``-X importtime`` (dans l'ordre de fin d'import) des autres messages."""
+
+    timings: list[ImportTiming] = []
+    messages: list[str] = []
+    for line in lines:
+        if not line.startswith(IMPORTTIME_PREFIX):
+            messages.append(line)
+            continue
+        self_part, cumulative_part, name = line[len(IMPORTTIME_PREFIX) :].split("|", 2)
+        if not self_part.strip().isdigit():
+            continue  # en-tête « self [us] | cumulative | imported package »
+        module = name.lstrip()
+        timings.append(
+            ImportTiming(
+                module=module,
+                depth=(len(name) - len(module) - 1) // 2,
+                self_us=int(self_part),
+                cumulative_us=int(cumulative_part),
+            )
+        )
+    return timings, messages
+
+
+def format_report(timings: Sequence[ImportTiming], elapsed: float, *, top: int = 15) -> list[str]:
+    """Imports de premier niveau (chargés par le script ou à la demande) triés par coût cumulé."""
+
+    total_us = sum(timing.self_us for timing in timings)
+    lines = [f"[PROFIL] Exécution {elapsed:.3f} s, imports {total_us / 1e6:.3f} s ({len(timings)} modules)"]
+    if not timings:
+        return lines
+    depth = min(timing.depth for timing in timings)
+    roots = sorted((t for t in timings if t.depth == depth), key=lambda t: t.cumulative_us, reverse=True)
+    lines.append(f"{'cumulé (ms)':>12}  {'propre (ms)':>12}  module")
+    for timing in roots[:top]:
+        lines.append(f"{timing.cumulative_us / 1e3:>12.1f}  {timing.self_us / 1e3:>12.1f}  {timing.module}")
+    return lines
+
+
+def profile_startup(script: Path, argv: Sequence[str], *, top: int = 15, stream: TextIO = sys.stderr) -> int:
+    """Exécute ``script argv`` sous ``-X importtime`` et écrit le profil sur ``stream``."""
+
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", str(script), *argv], stderr=subprocess.PIPE, text=True
+    )
+    elapsed = time.perf_counter() - started
+    timings, messages = parse_importtime(proc.stderr.splitlines())
+    for line in [*messages, *format_report(timings, elapsed, top=top)]:
+        print(line, file=stream)
+    return proc.returncode
+
+
+__all__ = ["ImportTiming", "format_report", "parse_importtime", "profile_startup"]
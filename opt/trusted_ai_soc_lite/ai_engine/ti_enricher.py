@@ -5,12 +5,9 @@ import json
 import os
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Set
 
-try:  # pragma: no cover - optional dependency
-    import requests
-except ModuleNotFoundError:  # pragma: no cover
-    requests = None  # type: ignore
+from lazy_imports import module_available, optional_import
 
 BUILTIN_CVE_DB = {
     "CVE-2024-36391": {
@@ -56,10 +53,16 @@ class ThreatIntelResult:
 class ThreatIntelClient:
     """Performs lightweight TI lookups (offline first)."""
 
-    def __init__(self, cache_path: Path | None = None, offline: bool = False) -> None:
+    def __init__(self, cache_path: Path | None = None, offline: bool = False, *, autosave: bool = True) -> None:
+        """With ``autosave=False`` (batch runs) the cache is only written by :meth:`save`."""
         self.cache_path = cache_path
-        self.offline = offline or requests is None
+        self.offline = offline or not module_available("requests")
+        self.autosave = autosave
         self.cache: Dict[str, Any] = {}
+        self._dirty: Set[str] = set()
+        # CVE/host lookups answered from the cache vs resolved again (pipeline metrics).
+        self.hits = 0
+        self.misses = 0
         if cache_path and cache_path.exists():
             try:
                 self.cache = json.loads(cache_path.read_text(encoding="utf-8"))
@@ -71,6 +74,22 @@ class ThreatIntelClient:
             return
         self.cache_path.parent.mkdir(parents=True, exist_ok=True)
         self.cache_path.write_text(json.dumps(self.cache, indent=2), encoding="utf-8")
+        self._dirty.clear()
+
+    def save(self) -> None:
+        """Write the cache if lookups added entries since the last save."""
+        if self._dirty:
+            self._save_cache()
+
+    def take_pending_entries(self) -> Dict[str, Any]:
+        """Return and forget entries added since the last save (a worker hands them to its parent)."""
+        entries = {key: self.cache[key] for key in self._dirty}
+        self._dirty.clear()
+        return entries
+
+    def merge(self, entries: Dict[str, Any]) -> None:
+        self.cache.update(entries)
+        self._dirty.update(entries)
 
     def enrich(self, host: str | None, cves: Iterable[str]) -> ThreatIntelResult | None:
         cve_list = list(dict.fromkeys(cves))
@@ -89,24 +108,30 @@ class ThreatIntelClient:
 
         result = ThreatIntelResult(matches, reputation, min(score_bonus, 15))
         if self.cache_path:
-            self.cache[f"{host}:{','.join(cve_list)}"] = result.to_dict()
-            self._save_cache()
+            key = f"{host}:{','.join(cve_list)}"
+            self.cache[key] = result.to_dict()
+            self._dirty.add(key)
+            if self.autosave:
+                self._save_cache()
         return result
 
     def _lookup_cve(self, cve_id: str) -> Dict[str, Any] | None:
         cache_key = f"cve:{cve_id}"
         if cache_key in self.cache:
+            self.hits += 1
             return self.cache[cache_key]
+        self.misses += 1
 
         if cve_id in BUILTIN_CVE_DB:
             data = {"cve": cve_id, **BUILTIN_CVE_DB[cve_id]}
-        elif not self.offline and requests is not None:
+        elif not self.offline:
             data = self._query_remote_cve(cve_id)
         else:
             data = None
 
         if data and self.cache_path:
             self.cache[cache_key] = data
+            self._dirty.add(cache_key)
         return data
 
     def _lookup_host(self, host: str | None) -> Dict[str, Any] | None:
@@ -114,7 +139,9 @@ class ThreatIntelClient:
             return None
         cache_key = f"host:{host}"
         if cache_key in self.cache:
+            self.hits += 1
             return self.cache[cache_key]
+        self.misses += 1
 
         if host in SUSPICIOUS_HOSTS:
             data = {"host": host, **SUSPICIOUS_HOSTS[host]}
@@ -123,14 +150,16 @@ class ThreatIntelClient:
 
         if data and self.cache_path:
             self.cache[cache_key] = data
+            self._dirty.add(cache_key)
         return data
 
     def _query_remote_cve(self, cve_id: str) -> Dict[str, Any] | None:
-        if requests is None:
-            return None
         api_key = os.getenv("OTX_API_KEY") or os.getenv("VT_API_KEY")
         if not api_key:
             return None
+        requests = optional_import("requests")  # only needed for live lookups
+        if requests is None:
+            return None
         headers = {"X-OTX-API-KEY": api_key}
         url = f"https://otx.alienvault.com/api/v1/indicators/cve/{cve_id}"
         try:
@@ -4,13 +4,16 @@ from __future__ import annotations
 
 import argparse
 import json
+import sys
 from pathlib import Path
 from typing import Any
 
 import joblib
 from sklearn.ensemble import RandomForestClassifier
 
-from feature_engineering import extract_features_from_scan
+from feature_engineering import FeatureMatrix, load_scan_payload
+from forest_eval import export_packed_forest
+from parallel_extract import extract_features_parallel
 
 LABEL_ORDER = ["low", "medium", "high", "critical"]
 LABEL_TO_INT = {label: idx for idx, label in enumerate(LABEL_ORDER)}
@@ -34,32 +37,29 @@ def match_label(host: dict[str, Any], labels: list[dict[str, Any]], scan_id: str
     return None
 
 
-def build_dataset(reports: list[Path], labels_file: Path) -> tuple[list[list[int]], list[int]]:
+def build_dataset(
+    reports: list[Path], labels_file: Path, *, workers: int = 1, chunk_size: int | None = None
+) -> tuple[Any, list[int]]:
+    """Retourne la matrice ``FeatureMatrix.values`` (colonnes ``FEATURE_NAMES``) et les labels.
+
+    Seuls les hôtes étiquetés sont extraits, en parallèle si ``workers`` ≠ 1.
+    """
+
     labels = load_labels(labels_file)
-    X: list[list[int]] = []
+    labelled: list[dict[str, Any]] = []
     y: list[int] = []
     for report in reports:
-        features = extract_features_from_scan(report)
         scan_id = report.stem
-        for feat in features:
-            label = match_label(feat.to_dict(), labels, scan_id)
+        for host in load_scan_payload(report).get("hosts", []):
+            label = match_label(host, labels, scan_id)
             if label is None or label not in LABEL_TO_INT:
                 continue
-            X.append(
-                [
-                    feat.open_ports,
-                    feat.risky_services,
-                    feat.cve_count,
-                    int(feat.has_anonymous_ftp),
-                    int(feat.has_default_http_admin),
-                    feat.max_cvss,
-                    feat.avg_cvss,
-                ]
-            )
+            labelled.append(host)
             y.append(LABEL_TO_INT[label])
-    if not X:
+    if not labelled:
         raise ValueError("Aucune donnée étiquetée n'a été trouvée. Complétez labels.json")
-    return X, y
+    features = extract_features_parallel(labelled, workers=workers, chunk_size=chunk_size)
+    return FeatureMatrix.from_features(features).values, y
 
 
 def parse_args(argv: list[str]) -> argparse.Namespace:
@@ -68,20 +68,24 @@ def parse_args(argv: list[str]) -> argparse.Namespace:
     parser.add_argument("--labels", type=Path, default=Path("labels.json"), help="Fichier JSON listant host + label")
     parser.add_argument("--output", type=Path, default=Path("models/model.pkl"))
     parser.add_argument("--trees", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=1, help="Processus pour l'extraction (0 = tous les CPU)")
+    parser.add_argument("--chunk-size", type=int, default=None, help="Avec --workers : hôtes par lot")
     return parser.parse_args(argv)
 
 
 def main(argv: list[str]) -> int:
     args = parse_args(argv)
-    reports = sorted(args.reports.glob("*.json"))
+    reports = sorted([*args.reports.glob("*.json"), *args.reports.glob("*.jsonl")])
     if not reports:
         raise SystemExit("Aucun rapport JSON détecté dans le dossier spécifié")
-    X, y = build_dataset(reports, args.labels)
+    X, y = build_dataset(reports, args.labels, workers=args.workers, chunk_size=args.chunk_size)
     model = RandomForestClassifier(n_estimators=args.trees, max_depth=12, random_state=42)
     model.fit(X, y)
     args.output.parent.mkdir(parents=True, exist_ok=True)
     joblib.dump(model, args.output)
     print(f"[INFO] Modèle entraîné sauvegardé dans {args.output}")
+    packed_path = export_packed_forest(model, args.output)
+    print(f"[INFO] Forêt compilée (scoring sans scikit-learn) : {packed_path}")
     return 0
 
 
@@ -0,0 +1,306 @@
+"""Chemin rapide XML Nmap → features, sans rapport JSON intermédiaire.
+
+Le XML est parcouru une seule fois (``iterparse``) : chaque ``<host>`` est
+transformé directement en :class:`HostFeatures` puis libéré. Les résultats sont
+identiques à la chaîne ``parse_nmap.py`` → JSON → ``extract_features_from_scan``.
+"""
+from __future__ import annotations
+
+import re
+import time
+import xml.etree.ElementTree as ET
+from array import array
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+from feature_engineering import (
+    RISKY_SERVICES,
+    HostFeatures,
+    ScriptFindingsRef,
+    ScriptTextScanner,
+    build_host_features,
+    feature_vector,
+)
+
+HOST_TAG = re.compile(rb"<host[\s>]")
+INDEX_CHUNK = 1 << 20
+
+
+def _iter_table_texts(table: ET.Element) -> Iterator[str]:
+    # Reproduit parse_nmap.parse_table + _iter_table_strings : une clé répétée
+    # devient une liste dont seules les sous-tables sont parcourues.
+    groups: dict[str, list[ET.Element]] = {}
+    for elem in table.findall("elem"):
+        groups.setdefault(elem.attrib.get("key") or "items", []).append(elem)
+    for sub_table in table.findall("table"):
+        groups.setdefault(sub_table.attrib.get("key") or "tables", []).append(sub_table)
+
+    for members in groups.values():
+        if len(members) == 1:
+            member = members[0]
+            if member.tag == "table":
+                yield from _iter_table_texts(member)
+            else:
+                value = (member.text or "").strip()
+                if value:
+                    yield value
+            continue
+        for member in members:
+            if member.tag == "table":
+                yield from _iter_table_texts(member)
+
+
+def _iter_script_texts(parent: ET.Element | None) -> Iterator[str]:
+    if parent is None:
+        return
+    for script in parent.findall("script"):
+        output = script.attrib.get("output")
+        if output:
+            yield output
+        for elem in script.findall("elem"):
+            value = (elem.text or "").strip()
+            if value:
+                yield value
+        for table in script.findall("table"):
+            yield from _iter_table_texts(table)
+
+
+def _iter_open_ports(host_elem: ET.Element) -> Iterator[ET.Element]:
+    ports_elem = host_elem.find("ports")
+    if ports_elem is None:
+        return
+    for port in ports_elem.findall("port"):
+        state = port.find("state")
+        if state is not None and state.attrib.get("state") == "open":
+            yield port
+
+
+def extract_features_from_xml_host(
+    host_elem: ET.Element, findings_ref: ScriptFindingsRef | None = None
+) -> HostFeatures:
+    addr = host_elem.find("address")
+    hostname_elem = host_elem.find("hostnames/hostname")
+    osmatch = host_elem.find("os/osmatch")
+
+    texts = ScriptTextScanner()
+    texts.add_texts(_iter_script_texts(host_elem.find("hostscript")), service=False)
+    open_ports = 0
+    risky_services = 0
+    for port in _iter_open_ports(host_elem):
+        open_ports += 1
+        service = port.find("service")
+        if service is not None and service.attrib.get("name") in RISKY_SERVICES:
+            risky_services += 1
+        texts.add_texts(_iter_script_texts(port), service=True)
+
+    return build_host_features(
+        host=addr.attrib.get("addr") if addr is not None else None,
+        hostname=hostname_elem.attrib.get("name") if hostname_elem is not None else None,
+        os=osmatch.attrib.get("name") if osmatch is not None else None,
+        open_ports=open_ports,
+        risky_services=risky_services,
+        texts=texts,
+        findings_ref=findings_ref,
+    )
+
+
+def xml_host_offsets(xml_path: Path) -> array:
+    """Position (octets) de chaque ``<host>`` du XML, dans l'ordre d'``iter_host_elements``.
+
+    Simple recherche d'octets : dans un XML Nmap, ``<`` est échappé dans les
+    attributs et les textes, donc ``<host`` suivi d'un blanc ou de ``>`` n'apparaît
+    que comme balise d'hôte (``<hostnames>``, ``<hosthint>`` sont écartés).
+    """
+
+    offsets = array("q")
+    tail, position = b"", 0
+    with xml_path.open("rb") as fh:
+        while chunk := fh.read(INDEX_CHUNK):
+            data = tail + chunk
+            base = position - len(tail)
+            offsets.extend(base + match.start() for match in HOST_TAG.finditer(data))
+            # Une balise coupée entre deux blocs commence dans ces derniers octets.
+            tail = data[-len(b"<host") :]
+            position += len(chunk)
+    return offsets
+
+
+def xml_script_findings(xml_path: Path, offset: int) -> list[str]:
+    """Textes NSE distincts du ``<host>`` commençant à ``offset`` (cf. ``ScriptFindingsRef``)."""
+
+    parser = ET.XMLPullParser(events=("end",))
+    with xml_path.open("rb") as fh:
+        fh.seek(offset)
+        while chunk := fh.read(INDEX_CHUNK):
+            parser.feed(chunk)
+            # L'hôte est la racine du fragment : ce qui suit sa fermeture n'est jamais lu.
+            for _, elem in parser.read_events():
+                if elem.tag == "host":
+                    texts = list(_iter_script_texts(elem.find("hostscript")))
+                    for port in _iter_open_ports(elem):
+                        texts.extend(_iter_script_texts(port))
+                    return list(dict.fromkeys(texts))
+    return []
+
+
+def _scan_metadata(root_attrib: dict[str, str], scan_info: ET.Element | None) -> dict[str, Any]:
+    start_attr = root_attrib.get("start")
+    return {
+        "scanner": root_attrib.get("scanner"),
+        "args": root_attrib.get("args"),
+        "start": (
+            datetime.fromtimestamp(int(start_attr), tz=UTC).isoformat().replace("+00:00", "Z")
+            if start_attr is not None
+            else None
+        ),
+        "scan_type": scan_info.attrib.get("type") if scan_info is not None else None,
+    }
+
+
+class _ScanEventHandler:
+    """Transforme les événements start/end du XML Nmap en features hôte."""
+
+    def __init__(self, metadata: dict[str, Any]) -> None:
+        self.metadata = metadata
+        self.root: ET.Element | None = None
+        self.root_attrib: dict[str, str] = {}
+        self.scan_info: ET.Element | None = None
+        self.finished = False
+
+    def handle(self, event: str, elem: ET.Element) -> ET.Element | None:
+        """Retourne l'élément ``<host>`` complet, à traiter avant :meth:`release`."""
+
+        if event == "start":
+            if self.root is None:
+                self.root = elem
+                self.root_attrib = dict(elem.attrib)
+            return None
+        if elem.tag == "scaninfo" and self.scan_info is None:
+            self.scan_info = elem
+        elif elem.tag == "host":
+            if not self.metadata:
+                self.metadata.update(_scan_metadata(self.root_attrib, self.scan_info))
+            return elem
+        elif elem.tag == "finished":
+            self.metadata.update(_scan_metadata(self.root_attrib, self.scan_info))
+            self.metadata["elapsed"] = float(elem.attrib.get("elapsed", 0))
+            self.metadata["hosts_up"] = int(elem.attrib.get("hosts_up", 0))
+            self.metadata["hosts_total"] = int(elem.attrib.get("hosts_total", 0))
+        elif elem is self.root:
+            self.finished = True
+        return None
+
+    def release(self) -> None:
+        # Vide la racine : l'hôte traité et les éléments annexes ne restent pas en mémoire.
+        if self.root is not None:
+            self.root.clear()
+
+    def close(self) -> None:
+        if not self.metadata:
+            self.metadata.update(_scan_metadata(self.root_attrib, self.scan_info))
+
+
+def iter_host_elements(xml_path: Path, metadata: dict[str, Any] | None = None) -> Iterator[ET.Element]:
+    """Produit chaque ``<host>`` complet du XML Nmap.
+
+    L'élément n'est valide que jusqu'à la demande de l'hôte suivant (il est
+    ensuite libéré). Si ``metadata`` est fourni, il est complété avec les mêmes
+    champs que ``parse_nmap.py`` (``start``, ``elapsed``, ``hosts_up``…).
+    """
+
+    handler = _ScanEventHandler(metadata if metadata is not None else {})
+    for event, elem in ET.iterparse(xml_path, events=("start", "end")):
+        host_elem = handler.handle(event, elem)
+        if host_elem is not None:
+            yield host_elem
+            handler.release()
+    handler.close()
+
+
+def iter_features_from_xml(
+    xml_path: Path, metadata: dict[str, Any] | None = None
+) -> Iterator[HostFeatures]:
+    """Produit les features hôte par hôte directement depuis le XML Nmap."""
+
+    for index, host_elem in enumerate(iter_host_elements(xml_path, metadata)):
+        yield extract_features_from_xml_host(host_elem, ScriptFindingsRef(xml_path, index))
+
+
+def follow_features_from_xml(
+    xml_path: Path,
+    metadata: dict[str, Any] | None = None,
+    *,
+    poll_interval: float = 1.0,
+    idle_timeout: float | None = None,
+    should_stop: Callable[[], bool] | None = None,
+    chunk_size: int = 64 * 1024,
+) -> Iterator[HostFeatures]:
+    """Suit un XML Nmap en cours d'écriture (``nmap -oX``) façon ``tail -f``.
+
+    Chaque ``<host>`` complet est produit dès qu'il apparaît dans le fichier. Le
+    suivi s'arrête à la fermeture de ``</nmaprun>``, lorsque ``should_stop()``
+    devient vrai (ex. processus Nmap terminé) une fois le fichier relu jusqu'au
+    bout, ou après ``idle_timeout`` secondes sans nouvelles données.
+    """
+
+    handler = _ScanEventHandler(metadata if metadata is not None else {})
+    parser = ET.XMLPullParser(events=("start", "end"))
+    idle_since = time.monotonic()
+    count = 0
+
+    def drain() -> Iterator[HostFeatures]:
+        nonlocal count
+        for event, elem in parser.read_events():
+            host_elem = handler.handle(event, elem)
+            if host_elem is not None:
+                features = extract_features_from_xml_host(host_elem, ScriptFindingsRef(xml_path, count))
+                count += 1
+                handler.release()
+                yield features
+
+    while not xml_path.exists():
+        if (should_stop and should_stop()) or (
+            idle_timeout is not None and time.monotonic() - idle_since > idle_timeout
+        ):
+            return
+        time.sleep(poll_interval)
+
+    with xml_path.open("rb") as fh:
+        while not handler.finished:
+            chunk = fh.read(chunk_size)
+            if chunk:
+                idle_since = time.monotonic()
+                parser.feed(chunk)
+                yield from drain()
+                continue
+            # Vérifie l'arrêt *avant* la pause puis relit une dernière fois le
+            # fichier, pour ne pas perdre les derniers hôtes écrits.
+            stopping = bool(should_stop and should_stop())
+            if idle_timeout is not None and time.monotonic() - idle_since > idle_timeout:
+                stopping = True
+            if stopping:
+                tail = fh.read()
+                if tail:
+                    parser.feed(tail)
+                    yield from drain()
+                break
+            time.sleep(poll_interval)
+    handler.close()
+
+
+def iter_feature_rows_from_xml(
+    xml_path: Path, metadata: dict[str, Any] | None = None
+) -> Iterator[tuple[HostFeatures, list[float]]]:
+    for features in iter_features_from_xml(xml_path, metadata):
+        yield features, feature_vector(features)
+
+
+__all__ = [
+    "extract_features_from_xml_host",
+    "follow_features_from_xml",
+    "iter_host_elements",
+    "iter_feature_rows_from_xml",
+    "iter_features_from_xml",
+    "xml_script_findings",
+]
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Ajout d'un scan à un audit déjà volumineux : tableau JSON réécrit vs journal segmenté.
+
+Pour chaque taille d'historique (``--sizes``), un audit de N décisions est créé
+puis un scan de ``--batch`` événements y est ajouté : ancienne méthode (relecture
+et réécriture de tout ``ia_decisions.json`` à chaque événement), journal
+``audit_store.py`` événement par événement (mode ``--follow``) et en un seul lot
+(mode normal). L'export JSON du journal est mesuré et comparé au fichier de
+l'ancienne méthode.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any
+
+from bench_common import print_table, setup_paths, timed
+
+setup_paths()
+
+from audit_store import AuditStore  # noqa: E402
+
+
+def synthetic_event(index: int) -> dict[str, Any]:
+    return {
+        "timestamp": f"2024-01-01T00:00:{index % 60:02d}Z",
+        "scan_id": f"scan_{index // 500}",
+        "host": f"10.{index // 65536 % 256}.{index // 256 % 256}.{index % 256}",
+        "hostname": f"host-{index}",
+        "risk_score": index % 100,
+        "risk_level": ("low", "medium", "high", "critical")[index % 4],
+        "reasons": ["Service sensible exposé", f"{index % 7} CVE connues"],
+        "features": {"open_ports": index % 20, "cve_count": index % 7, "os": "Linux 5.x"},
+        "threat_intel": {"cves": [f"CVE-2024-{index % 9000:04d}"], "source": "offline"},
+    }
+
+
+def legacy_update(event: dict[str, Any], path: Path) -> None:
+    """Ancien ``analyse_scan.update_audit_file`` (lecture + réécriture complète)."""
+
+    history = json.loads(path.read_text(encoding="utf-8")) if path.exists() else []
+    history.append(event)
+    path.write_text(json.dumps(history, indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="1000,10000,50000", help="Tailles d'historique séparées par des virgules")
+    parser.add_argument("--batch", type=int, default=20, help="Événements ajoutés par scan")
+    parser.add_argument("--no-fsync", action="store_true", help="Journal sans fsync (mesure le coût CPU seul)")
+    args = parser.parse_args(argv)
+
+    rows = []
+    status = 0
+    for size in (int(value) for value in args.sizes.split(",")):
+        history = [synthetic_event(index) for index in range(size)]
+        scan = [synthetic_event(size + index) for index in range(args.batch)]
+        with tempfile.TemporaryDirectory() as tmp:
+            workdir = Path(tmp)
+            legacy_path = workdir / "legacy.json"
+            legacy_path.write_text(json.dumps(history, indent=2, ensure_ascii=False), encoding="utf-8")
+            legacy_time, _ = timed(lambda: [legacy_update(event, legacy_path) for event in scan])
+
+            stores = []
+            for name in ("follow", "batch"):
+                store = AuditStore(workdir / f"{name}.segments", fsync=not args.no_fsync)
+                store.append_many(history)
+                stores.append(store)
+            follow_time, _ = timed(lambda: [stores[0].append(event) for event in scan])
+            batch_time, _ = timed(lambda: stores[1].append_many(scan))
+
+            export_path = workdir / "export.json"
+            export_time, _ = timed(lambda: stores[1].export_json(export_path))
+            identical = export_path.read_bytes() == legacy_path.read_bytes()
+            status |= not identical
+
+        per_event = lambda seconds: f"{seconds / args.batch * 1e3:.3f}"  # noqa: E731
+        rows.append(
+            [
+                size,
+                per_event(legacy_time),
+                per_event(follow_time),
+                per_event(batch_time),
+                f"{export_time:.3f}",
+                "oui" if identical else "NON",
+            ]
+        )
+
+    print(f"[INFO] Scan de {args.batch} événements ajouté à l'audit (ms par événement)")
+    print_table(
+        ["historique", "JSON réécrit", "journal/événement", "journal/lot", "export (s)", "export identique"],
+        rows,
+    )
+    if status:
+        print("[ERREUR] L'export du journal diffère du tableau JSON historique", file=sys.stderr)
+    return status
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Re-scoring d'un arriéré de rapports : un ``analyse_scan.py`` par rapport vs mode lot.
+
+Génère ``--reports`` rapports XML synthétiques et un RandomForest (exporté comme
+``train_model.py`` : ``model.pkl`` + forêt compilée, sauf ``--no-packed``), puis
+compare une invocation par rapport, le mode lot séquentiel (dossier en argument)
+et le mode lot réparti sur ``--workers`` processus. Les décisions d'audit
+(horodatage exclu) doivent être identiques dans les trois cas.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from bench_batched_scoring import synthetic_features
+from bench_common import AI_ENGINE_DIR, print_table, setup_paths, timed
+from synthetic_nmap import write_synthetic_scan
+
+setup_paths()
+
+from audit_store import open_audit_store  # noqa: E402
+from feature_engineering import FEATURE_NAMES, FeatureMatrix  # noqa: E402
+from forest_eval import export_packed_forest  # noqa: E402
+
+try:
+    import joblib
+    from sklearn.ensemble import RandomForestClassifier
+except ModuleNotFoundError:  # pragma: no cover
+    RandomForestClassifier = None  # type: ignore
+
+
+def analyse_command(sources: list[Path], model_path: Path, outputs: Path) -> list[str]:
+    outputs.mkdir(exist_ok=True)
+    return [
+        sys.executable,
+        str(AI_ENGINE_DIR / "analyse_scan.py"),
+        *map(str, sources),
+        "--model",
+        str(model_path),
+        "--disable-lime",
+        "--ti-offline",
+        "--no-scoring-daemon",
+        "--ti-cache",
+        str(outputs / "ti_cache.json"),
+        "--log-file",
+        str(outputs / "ia_events.log"),
+        "--audit-file",
+        str(outputs / "ia_decisions.json"),
+        "--scan-history",
+        str(outputs / "scan_history.json"),
+        "--features-file",
+        str(outputs / "last_features.json"),
+    ]
+
+
+def decisions(outputs: Path) -> list[dict]:
+    records = list(open_audit_store(outputs / "ia_decisions.json").iter_records())
+    for record in records:
+        record.pop("timestamp", None)
+    return records
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--reports", type=int, default=40)
+    parser.add_argument("--hosts", type=int, default=50, help="Hôtes par rapport")
+    parser.add_argument("--workers", type=int, default=0, help="Processus du mode lot parallèle (0 = tous les CPU)")
+    parser.add_argument("--trees", type=int, default=200)
+    parser.add_argument("--no-packed", action="store_true", help="Sans forêt compilée (chargement sklearn à chaque run)")
+    args = parser.parse_args(argv)
+
+    if RandomForestClassifier is None:
+        print("[ERREUR] scikit-learn non installé", file=sys.stderr)
+        return 1
+
+    rng = random.Random(42)
+    train = FeatureMatrix.from_features(synthetic_features(2000, rng))
+    max_cvss, anonymous = FEATURE_NAMES.index("max_cvss"), FEATURE_NAMES.index("has_anonymous_ftp")
+    labels = [int(row[max_cvss] >= 7.0 or row[anonymous] > 0) for row in train.values]
+    model = RandomForestClassifier(n_estimators=args.trees, max_depth=12, random_state=42).fit(train.values, labels)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        model_path = workdir / "model.pkl"
+        joblib.dump(model, model_path)
+        if not args.no_packed:
+            export_packed_forest(model, model_path)
+        reports_dir = workdir / "reports"
+        reports_dir.mkdir()
+        reports = [
+            write_synthetic_scan(reports_dir / f"scan_{index:04d}.xml", hosts=args.hosts, seed=index)
+            for index in range(args.reports)
+        ]
+
+        runs = {
+            "un processus par rapport": lambda: [
+                subprocess.run(analyse_command([report], model_path, workdir / "single"), check=True, capture_output=True)
+                for report in reports
+            ],
+            "lot séquentiel": lambda: subprocess.run(
+                analyse_command([reports_dir], model_path, workdir / "batch"), check=True, capture_output=True
+            ),
+            f"lot parallèle (--workers {args.workers})": lambda: subprocess.run(
+                [*analyse_command([reports_dir], model_path, workdir / "parallel"), "--workers", str(args.workers)],
+                check=True,
+                capture_output=True,
+            ),
+        }
+        rows = []
+        for label, run in runs.items():
+            elapsed, _ = timed(run)
+            rows.append([label, f"{elapsed:.2f}", f"{elapsed / args.reports * 1e3:.0f}"])
+
+        reference = decisions(workdir / "single")
+        identical = all(decisions(workdir / name) == reference for name in ("batch", "parallel"))
+
+    print(
+        f"[INFO] {args.reports} rapports × {args.hosts} hôtes, RandomForest {args.trees} arbres"
+        f"{' sans forêt compilée' if args.no_packed else ''}"
+    )
+    print_table(["mode", "secondes", "ms/rapport"], rows)
+    print(f"[INFO] Décisions identiques dans les trois modes : {'oui' if identical else 'NON'}")
+    return 0 if identical else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Compare le scoring ML hôte par hôte au ``predict_proba`` groupé d'``analyse_scan.py``.
+
+Le modèle est un RandomForest entraîné comme ``train_model.py`` (mêmes
+hyperparamètres) sur des features synthétiques. Le mode hôte par hôte est mesuré
+sur ``--sample`` hôtes au plus puis extrapolé (plusieurs minutes sinon à 100k).
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+
+from bench_common import print_table, setup_paths, timed
+
+setup_paths()
+
+from analyse_scan import score_batch_with_model, score_with_model  # noqa: E402
+from feature_engineering import FEATURE_NAMES, FeatureMatrix, HostFeatures  # noqa: E402
+
+try:
+    from sklearn.ensemble import RandomForestClassifier
+except ModuleNotFoundError:  # pragma: no cover
+    RandomForestClassifier = None  # type: ignore
+
+
+def synthetic_features(count: int, rng: random.Random) -> list[HostFeatures]:
+    features = []
+    for index in range(count):
+        cves = rng.randint(0, 40)
+        max_cvss = rng.uniform(0.0, 10.0) if cves else 0.0
+        features.append(
+            HostFeatures(
+                host=f"10.0.{index >> 8 & 255}.{index & 255}",
+                hostname=None,
+                os=None,
+                open_ports=rng.randint(0, 20),
+                risky_services=rng.randint(0, 4),
+                cve_count=cves,
+                cve_list=(),
+                has_anonymous_ftp=rng.random() < 0.05,
+                has_default_http_admin=rng.random() < 0.1,
+                max_cvss=max_cvss,
+                avg_cvss=max_cvss * rng.uniform(0.4, 1.0),
+            )
+        )
+    return features
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="100,10000,100000", help="Nombres d'hôtes séparés par des virgules")
+    parser.add_argument("--trees", type=int, default=200)
+    parser.add_argument("--sample", type=int, default=200, help="Hôtes mesurés en mode hôte par hôte")
+    args = parser.parse_args(argv)
+
+    if RandomForestClassifier is None:
+        print("[ERREUR] scikit-learn non installé", file=sys.stderr)
+        return 1
+
+    rng = random.Random(42)
+    train = FeatureMatrix.from_features(synthetic_features(2000, rng))
+    max_cvss, anonymous = FEATURE_NAMES.index("max_cvss"), FEATURE_NAMES.index("has_anonymous_ftp")
+    labels = [int(row[max_cvss] >= 7.0 or row[anonymous] > 0) for row in train.values]
+    model = RandomForestClassifier(n_estimators=args.trees, max_depth=12, random_state=42).fit(train.values, labels)
+
+    rows = []
+    for size in (int(value) for value in args.sizes.split(",")):
+        features = synthetic_features(size, rng)
+        matrix = FeatureMatrix.from_features(features)
+        sample = min(size, args.sample)
+        single_time, single = timed(
+            lambda: [score_with_model(model, matrix.row(idx), features[idx]) for idx in range(sample)]
+        )
+        single_time *= size / sample
+        batch_time, batched = timed(lambda: score_batch_with_model(model, features, matrix))
+        if batched[:sample] != single:
+            print("[ERREUR] Les scores groupés diffèrent du scoring hôte par hôte", file=sys.stderr)
+            return 1
+        rows.append(
+            [
+                size,
+                f"{single_time:.3f}" + ("*" if sample < size else ""),
+                f"{batch_time:.3f}",
+                f"{single_time / size * 1e6:,.1f}",
+                f"{batch_time / size * 1e6:,.1f}",
+                f"x{single_time / batch_time:,.0f}",
+            ]
+        )
+
+    print(f"[INFO] RandomForest {args.trees} arbres, max_depth=12")
+    print_table(["hôtes", "hôte/hôte (s)", "groupé (s)", "µs/hôte", "µs/hôte groupé", "gain"], rows)
+    print(f"[INFO] * extrapolé depuis {args.sample} hôtes")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
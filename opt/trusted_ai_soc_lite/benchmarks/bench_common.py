@@ -0,0 +1,65 @@
+"""Outils partagés par les scripts de benchmark."""
+from __future__ import annotations
+
+import resource
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+AI_ENGINE_DIR = PROJECT_ROOT / "ai_engine"
+NMAP_SCANNER_DIR = PROJECT_ROOT / "nmap_scanner"
+RESPONSE_ENGINE_DIR = PROJECT_ROOT / "response_engine"
+
+
+def setup_paths() -> None:
+    """Rend importables les modules de ai_engine/ et nmap_scanner/."""
+
+    for directory in (AI_ENGINE_DIR, NMAP_SCANNER_DIR):
+        if str(directory) not in sys.path:
+            sys.path.insert(0, str(directory))
+
+
+def timed(fn: Callable[[], Any], *, repeat: int = 1) -> tuple[float, Any]:
+    """Retourne le meilleur temps (secondes) sur ``repeat`` exécutions et le dernier résultat."""
+
+    best = float("inf")
+    result: Any = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def reset_peak_rss() -> bool:
+    """Remet à zéro le pic de RSS du processus (Linux ≥ 4.0) ; ``False`` si impossible."""
+
+    try:
+        Path("/proc/self/clear_refs").write_text("5")
+    except OSError:
+        return False
+    return True
+
+
+def peak_rss_mb() -> float:
+    """Pic de RSS depuis le dernier :func:`reset_peak_rss` (depuis le démarrage à défaut)."""
+
+    try:
+        for line in Path("/proc/self/status").read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / (1024 * 1024) if sys.platform == "darwin" else maxrss / 1024
+
+
+def print_table(headers: list[str], rows: list[list[Any]]) -> None:
+    widths = [max(len(str(cell)) for cell in column) for column in zip(headers, *rows)]
+    line = "  ".join(str(header).ljust(width) for header, width in zip(headers, widths))
+    print(line)
+    print("-" * len(line))
+    for row in rows:
+        print("  ".join(str(cell).ljust(width) for cell, width in zip(row, widths)))
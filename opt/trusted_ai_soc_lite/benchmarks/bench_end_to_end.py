@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""Pipeline complet sur un parc synthétique : XML Nmap → réponse automatique.
+
+Pour chaque taille de ``--sizes`` (1k, 10k et 100k hôtes par défaut), génère un
+scan réaliste avec ``synthetic_nmap.py`` : nombre de ports géométrique, part
+``--script-density`` de ports avec une table vulners, plusieurs ``osmatch``.
+Les étapes s'enchaînent ensuite dans ce processus :
+
+1. ``parse`` : ``parse_nmap.convert`` (XML → JSON, défaut de ``run_scan.sh``)
+   ou conversion en flux avec ``--report-format jsonl|msgpack`` ;
+2. ``features`` : ``extract_features_from_scan`` sur le rapport converti ;
+3. ``score`` : RandomForest entraîné sur des features synthétiques, exporté comme
+   ``train_model.py`` (forêt compilée) et chargé par ``select_scorer`` ;
+4. ``shap`` / ``lime`` : explications des ``--explain-hosts`` premiers hôtes ;
+5. ``events`` : ``build_host_event`` (TI hors ligne), ``ia_events.log`` et audit ;
+6. ``respond`` : ``responder.orchestrate`` avec un script ufw factice et
+   l'envoi SMTP remplacé par un compteur.
+
+Chaque étape est mesurée en hôtes/s et en pic de RSS (``VmHWM`` remis à zéro
+avant l'étape ; il inclut les données gardées des étapes précédentes).
+``--save-baseline`` enregistre les résultats ; avec ``--baseline``, le script
+échoue si une étape perd plus de ``--threshold`` de débit ou prend autant de RSS
+(étapes de moins de ``--min-seconds`` ignorées pour le débit).
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from bench_batched_scoring import synthetic_features
+from bench_common import RESPONSE_ENGINE_DIR, peak_rss_mb, print_table, reset_peak_rss, setup_paths
+from synthetic_nmap import write_synthetic_scan
+
+setup_paths()
+sys.path.insert(0, str(RESPONSE_ENGINE_DIR))
+
+import parse_nmap  # noqa: E402
+import responder  # noqa: E402
+from analyse_scan import build_host_event, select_scorer, update_audit_file  # noqa: E402
+from event_log import EventLogWriter  # noqa: E402
+from feature_engineering import FEATURE_NAMES, FeatureMatrix, extract_features_from_scan  # noqa: E402
+from lime_explainer import explain_with_lime  # noqa: E402
+from shap_explainer import explain_with_shap  # noqa: E402
+from ti_enricher import ThreatIntelClient  # noqa: E402
+
+try:
+    import joblib
+    from sklearn.ensemble import RandomForestClassifier
+
+    from forest_eval import export_packed_forest
+except ModuleNotFoundError:  # pragma: no cover
+    RandomForestClassifier = None  # type: ignore
+
+
+def train_model(path: Path, trees: int) -> Path:
+    """``model.pkl`` + forêt compilée ; sans scikit-learn, ``select_scorer`` prend l'heuristique."""
+
+    if RandomForestClassifier is None:
+        print("[WARN] scikit-learn non installé → scoring heuristique", file=sys.stderr)
+        return path
+    train = FeatureMatrix.from_features(synthetic_features(2000, random.Random(42)))
+    max_cvss, anonymous = FEATURE_NAMES.index("max_cvss"), FEATURE_NAMES.index("has_anonymous_ftp")
+    labels = [int(row[max_cvss] >= 7.0 or row[anonymous] > 0) for row in train.values]
+    model = RandomForestClassifier(n_estimators=trees, max_depth=12, random_state=42).fit(train.values, labels)
+    joblib.dump(model, path)
+    export_packed_forest(model, path)
+    return path
+
+
+def run_stage(
+    results: dict[str, dict[str, Any]], name: str, hosts: int, fn: Callable[[], Any], *, optional: bool = False
+) -> Any:
+    gc.collect()
+    reset_peak_rss()
+    started = time.perf_counter()
+    output = fn()
+    elapsed = time.perf_counter() - started
+    results[name] = {
+        "hosts": hosts,
+        "seconds": round(elapsed, 4),
+        # Un explainer absent (shap/lime non installés) renvoie None : pas de débit à comparer.
+        "hosts_per_second": None if (optional and output is None) or elapsed <= 0 else round(hosts / elapsed, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+    return output
+
+
+def build_events(
+    features: list[Any],
+    scores: list[tuple[int, list[str]]],
+    shap_payloads: list[Any] | None,
+    lime_payloads: list[Any] | None,
+    log_path: Path,
+    audit_path: Path,
+) -> list[dict[str, Any]]:
+    ti_client = ThreatIntelClient(offline=True)
+    events = []
+    with EventLogWriter(log_path) as event_log:
+        for pos, host_features in enumerate(features):
+            score, reasons = scores[pos]
+            event = build_host_event(
+                host_features,
+                "scan_bench",
+                score,
+                reasons,
+                ti_client,
+                shap_payload=shap_payloads[pos] if shap_payloads and pos < len(shap_payloads) else None,
+                lime_payload=lime_payloads[pos] if lime_payloads and pos < len(lime_payloads) else None,
+            )
+            event_log.write(event)
+            events.append(event)
+    update_audit_file(events, audit_path)
+    return events
+
+
+def respond(workdir: Path, log_path: Path, ufw_stub: Path, emails: list[str]) -> int:
+    args = argparse.Namespace(
+        ai_log=str(log_path),
+        actions_log=str(workdir / "actions.log"),
+        audit_file=str(workdir / "response_actions.json"),
+        state_file=str(workdir / "responder_state.json"),
+        ufw_script=str(ufw_stub),
+        mailto="soc@example.invalid",
+        disable_email=False,
+        disable_ufw=False,
+        dry_run=False,
+    )
+    responder.send_alert = lambda recipient, subject, body, **_: emails.append(subject)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return responder.orchestrate(args)
+
+
+def run_size(args: argparse.Namespace, size: int, model_path: Path, ufw_stub: Path) -> tuple[dict[str, Any], str]:
+    results: dict[str, dict[str, Any]] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        xml_path = write_synthetic_scan(
+            workdir / "scan.xml",
+            hosts=size,
+            ports=args.ports,
+            cves=args.cves,
+            cve_pool=args.cve_pool,
+            port_distribution="geometric",
+            script_density=args.script_density,
+            os_matches=args.os_matches,
+        )
+        json_path = workdir / f"scan{parse_nmap.OUTPUT_SUFFIXES[args.report_format]}"
+        run_stage(results, "parse", size, lambda: parse_nmap.convert_to(xml_path, json_path, args.report_format))
+        features = run_stage(results, "features", size, lambda: extract_features_from_scan(json_path))
+        model, scorer = select_scorer(model_path)
+        matrix = FeatureMatrix.from_features(features)
+        scores = run_stage(results, "score", size, lambda: scorer(features, matrix))
+        explained = min(size, args.explain_hosts)
+        sample = matrix.values[:explained]
+        shap_payloads = run_stage(
+            results, "shap", explained, lambda: explain_with_shap(model, sample, FEATURE_NAMES), optional=True
+        )
+        lime_payloads = run_stage(
+            results, "lime", explained, lambda: explain_with_lime(model, sample, FEATURE_NAMES), optional=True
+        )
+        log_path = workdir / "ia_events.log"
+        events = run_stage(
+            results,
+            "events",
+            size,
+            lambda: build_events(features, scores, shap_payloads, lime_payloads, log_path, workdir / "decisions.json"),
+        )
+        emails: list[str] = []
+        run_stage(results, "respond", size, lambda: respond(workdir, log_path, ufw_stub, emails))
+        blocked = sum(event["risk_level"] == "critical" for event in events)
+        note = f"{blocked} blocages ufw, {len(emails)} e-mails"
+    return results, note
+
+
+def compare(
+    current: dict[str, dict[str, Any]], baseline: dict[str, dict[str, Any]], threshold: float, min_seconds: float
+) -> list[str]:
+    regressions = []
+    for size, stages in current.items():
+        for name, result in stages.items():
+            reference = baseline.get(size, {}).get(name)
+            if reference is None:
+                continue
+            rate, old_rate = result["hosts_per_second"], reference.get("hosts_per_second")
+            if rate and old_rate and reference["seconds"] >= min_seconds and rate < old_rate * (1 - threshold):
+                regressions.append(f"{size} hôtes / {name} : {rate:.0f} hôtes/s contre {old_rate:.0f}")
+            rss, old_rss = result["peak_rss_mb"], reference.get("peak_rss_mb")
+            if old_rss and rss > old_rss * (1 + threshold):
+                regressions.append(f"{size} hôtes / {name} : pic RSS {rss:.0f} Mo contre {old_rss:.0f}")
+    return regressions
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Nombres d'hôtes séparés par des virgules")
+    parser.add_argument("--ports", type=int, default=4, help="Ports ouverts par hôte (moyenne)")
+    parser.add_argument("--cves", type=int, default=6, help="CVE max par table vulners")
+    parser.add_argument("--cve-pool", type=int, default=2000, help="CVE distinctes dans le parc")
+    parser.add_argument("--script-density", type=float, default=0.6, help="Part des ports avec une table vulners")
+    parser.add_argument("--os-matches", type=int, default=3)
+    parser.add_argument("--report-format", choices=sorted(parse_nmap.OUTPUT_SUFFIXES), default="json")
+    parser.add_argument("--trees", type=int, default=100)
+    parser.add_argument("--explain-hosts", type=int, default=500, help="Hôtes expliqués par SHAP et LIME")
+    parser.add_argument("--baseline", type=Path, help="Référence (--save-baseline d'un run précédent)")
+    parser.add_argument("--save-baseline", type=Path, help="Enregistre les résultats de ce run")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Perte de débit / hausse de RSS tolérée")
+    parser.add_argument("--min-seconds", type=float, default=0.05, help="Durée min. pour comparer un débit")
+    args = parser.parse_args(argv)
+
+    current: dict[str, dict[str, Any]] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = train_model(Path(tmp) / "model.pkl", args.trees)
+        ufw_stub = Path(tmp) / "ufw_stub.sh"
+        ufw_stub.write_text("#!/bin/sh\nexit 0\n")
+        ufw_stub.chmod(0o755)
+        for size in (int(value) for value in args.sizes.split(",")):
+            results, note = run_size(args, size, model_path, ufw_stub)
+            current[str(size)] = results
+            print(f"\n[INFO] {size} hôtes ({note})")
+            print_table(
+                ["étape", "hôtes", "secondes", "hôtes/s", "pic RSS (Mo)"],
+                [
+                    [name, r["hosts"], f"{r['seconds']:.3f}", r["hosts_per_second"] or "indisponible", r["peak_rss_mb"]]
+                    for name, r in results.items()
+                ],
+            )
+
+    if args.save_baseline is not None:
+        args.save_baseline.write_text(json.dumps(current, indent=2), encoding="utf-8")
+        print(f"\n[OK] Référence enregistrée dans {args.save_baseline}")
+    if args.baseline is None:
+        return 0
+    regressions = compare(
+        current, json.loads(args.baseline.read_text(encoding="utf-8")), args.threshold, args.min_seconds
+    )
+    for regression in regressions:
+        print(f"[ERREUR] Régression : {regression}", file=sys.stderr)
+    if not regressions:
+        print(f"[OK] Aucune régression au-delà de {args.threshold:.0%} par rapport à {args.baseline}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Journal d'événements IA : une ouverture par ligne vs ``EventLogWriter`` par lots.
+
+Écrit ``--events`` événements synthétiques (taille proche d'un événement réel
+avec raisons et TI) avec l'ancien ``persist_json_line`` puis avec
+``event_log.EventLogWriter`` pour chaque politique fsync. Un second processus
+lit le journal en continu avec ``responder.read_new_events`` pendant l'écriture
+groupée : il doit retrouver exactement les événements écrits, sans ligne partielle.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from bench_common import RESPONSE_ENGINE_DIR, print_table, setup_paths, timed
+
+setup_paths()
+sys.path.insert(0, str(RESPONSE_ENGINE_DIR))
+
+from event_log import FSYNC_POLICIES, EventLogWriter  # noqa: E402
+from responder import read_new_events  # noqa: E402
+
+
+def synthetic_event(index: int) -> dict[str, Any]:
+    return {
+        "timestamp": "2024-01-01T00:00:00Z",
+        "scan_id": "scan_bench",
+        "host": f"10.0.{index // 256 % 256}.{index % 256}",
+        "risk_score": index % 100,
+        "risk_level": ("low", "medium", "high", "critical")[index % 4],
+        "reasons": ["Service sensible exposé : ssh", "CVE critiques détectées", "é" * (index % 50)],
+        "threat_intel": {"cves": [f"CVE-2024-{index % 9000:04d}"], "notes": "x" * 200},
+    }
+
+
+def legacy_persist(payload: dict[str, Any], path: Path) -> None:
+    """Ancien ``analyse_scan.persist_json_line`` (ouverture/fermeture par événement)."""
+
+    with path.open("a", encoding="utf-8") as fh:
+        fh.write(json.dumps(payload, ensure_ascii=False) + "\n")
+
+
+def tail(path: str, expected: int, queue: Any) -> None:
+    """Lecteur concurrent : relit le journal comme ``responder.py --watch``."""
+
+    offset, seen, partial = 0, 0, 0
+    deadline = time.monotonic() + 120
+    while seen < expected and time.monotonic() < deadline:
+        events, offset = read_new_events(Path(path), offset)
+        for event in events:
+            partial += "host" not in event
+        seen += len(events)
+    queue.put((seen, partial))
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--batch-bytes", type=int, default=64 * 1024)
+    args = parser.parse_args(argv)
+    events = [synthetic_event(index) for index in range(args.events)]
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = Path(tmp) / "legacy.log"
+        legacy_time, _ = timed(lambda: [legacy_persist(event, legacy_path) for event in events])
+        rows.append(["une ouverture par ligne", "-", args.events, f"{legacy_time:.3f}"])
+
+        for policy in FSYNC_POLICIES:
+            path = Path(tmp) / f"{policy}.log"
+            writer = EventLogWriter(path, max_batch_bytes=args.batch_bytes, fsync=policy)
+
+            def run() -> None:
+                with writer:
+                    writer.write_many(events)
+
+            elapsed, _ = timed(run)
+            if path.read_bytes() != legacy_path.read_bytes():
+                print(f"[ERREUR] Contenu différent avec fsync={policy}", file=sys.stderr)
+                return 1
+            rows.append([f"EventLogWriter fsync={policy}", writer.batches, args.events, f"{elapsed:.3f}"])
+
+        # Lecture concurrente : le lecteur ne doit voir que des lignes complètes.
+        path = Path(tmp) / "tailed.log"
+        path.touch()
+        queue: Any = multiprocessing.Queue()
+        reader = multiprocessing.Process(target=tail, args=(str(path), args.events, queue))
+        reader.start()
+        with EventLogWriter(path, max_batch_bytes=args.batch_bytes, fsync="never") as writer:
+            for event in events:
+                writer.write(event)
+        seen, partial = queue.get(timeout=150)
+        reader.join()
+
+    print(f"[INFO] {args.events} événements, lots de {args.batch_bytes // 1024} Kio")
+    print_table(["écriture", "lots", "événements", "secondes"], rows)
+    print(f"[INFO] Lecteur concurrent : {seen}/{args.events} événements lus, {partial} lignes partielles")
+    return 0 if seen == args.events and not partial else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
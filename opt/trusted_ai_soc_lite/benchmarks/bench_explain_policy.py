@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""Coût des explications SHAP selon la politique d'explication et le cache d'explainer.
+
+Sur ``--hosts`` hôtes synthétiques scorés par un RandomForest, mesure :
+
+- la construction du ``TreeExplainer`` : à froid, relu du cache disque
+  (``--shap-cache`` d'``analyse_scan.py``) et repris en mémoire ;
+- le temps SHAP pour chaque politique (``ExplainPolicy``) : tous les hôtes,
+  ``medium`` et plus (défaut), ``high`` et plus, ``medium`` limité aux
+  ``--top`` meilleurs scores.
+
+Sans la bibliothèque shap, seuls les nombres d'hôtes expliqués sont affichés.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+from bench_batched_scoring import synthetic_features
+from bench_common import print_table, setup_paths, timed
+from bench_end_to_end import train_model
+
+setup_paths()
+
+import shap_explainer  # noqa: E402
+from analyse_scan import ExplainPolicy, select_scorer  # noqa: E402
+from feature_engineering import FEATURE_NAMES, FeatureMatrix  # noqa: E402
+from lazy_imports import optional_import  # noqa: E402
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hosts", type=int, default=10_000)
+    parser.add_argument("--trees", type=int, default=100)
+    parser.add_argument("--top", type=int, default=100, help="Hôtes gardés par la politique medium + top")
+    args = parser.parse_args(argv)
+
+    available = optional_import("shap") is not None
+    if not available:
+        print("[WARN] shap non installé → nombres d'hôtes expliqués seulement", file=sys.stderr)
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = train_model(Path(tmp) / "model.pkl", args.trees)
+        model, scorer = select_scorer(model_path)
+        features = synthetic_features(args.hosts, random.Random(7))
+        matrix = FeatureMatrix.from_features(features)
+        scores = scorer(features, matrix)
+
+        if available:
+            cache_dir = Path(tmp) / "shap_cache"
+
+            def build() -> object | None:
+                return shap_explainer.build_shap_explainer(model, model_path=model_path, cache_dir=cache_dir)
+
+            cold, _ = timed(build)
+            shap_explainer._EXPLAINERS.clear()
+            from_disk, _ = timed(build)
+            in_memory, explainer = timed(build)
+            print_table(
+                ["explainer", "secondes"],
+                [
+                    ["construit", f"{cold:.4f}"],
+                    ["cache disque", f"{from_disk:.4f}"],
+                    ["en mémoire", f"{in_memory:.6f}"],
+                ],
+            )
+            print()
+
+        policies = [
+            ("tous (low)", ExplainPolicy("low")),
+            ("medium et plus (défaut)", ExplainPolicy("medium")),
+            ("high et plus", ExplainPolicy("high")),
+            (f"medium, top {args.top}", ExplainPolicy("medium", args.top)),
+        ]
+        rows = []
+        for label, policy in policies:
+            selected = policy.rows(scores)
+            seconds = "indisponible"
+            if available and selected:
+                elapsed, _ = timed(
+                    lambda: shap_explainer.explain_with_shap(
+                        model, matrix.values, FEATURE_NAMES, explainer=explainer, rows=selected
+                    )
+                )
+                seconds = f"{elapsed:.3f}"
+            elif available:
+                seconds = "0.000"
+            rows.append([label, len(selected), f"{len(selected) / len(scores):.1%}", seconds])
+    print_table(["politique", "hôtes expliqués", "part", "SHAP (s)"], rows)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
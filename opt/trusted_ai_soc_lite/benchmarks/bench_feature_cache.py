@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Mesure le gain du cache de features (feature_cache.py) sur des scans répétés d'un parc stable.
+
+Compare l'extraction directe, un premier run (cache vide : extraction + écriture),
+un second run dans un nouveau processus simulé (LRU vide, lecture SQLite) et un
+run servi par le LRU mémoire.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+from bench_common import print_table, setup_paths, timed
+from synthetic_nmap import write_synthetic_scan
+
+setup_paths()
+
+import parse_nmap  # noqa: E402
+from feature_cache import FeatureCache, host_cache_key  # noqa: E402
+from feature_engineering import extract_features_from_host  # noqa: E402
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hosts", type=int, default=5000)
+    parser.add_argument("--ports", type=int, default=8)
+    parser.add_argument("--cves", type=int, default=40, help="CVE max par port (densité des scripts)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        xml_path = write_synthetic_scan(Path(tmp) / "scan.xml", hosts=args.hosts, ports=args.ports, cves=args.cves)
+        hosts = [record["host"] for record in parse_nmap.iter_scan_records(xml_path) if record["record"] == "host"]
+        db_path = Path(tmp) / "feature_cache.sqlite"
+
+        def run(cache: FeatureCache) -> list:
+            return [cache.get_or_extract(host_cache_key(host), lambda host=host: extract_features_from_host(host)) for host in hosts]
+
+        direct_time, reference = timed(lambda: [extract_features_from_host(host) for host in hosts])
+        key_time, _ = timed(lambda: [host_cache_key(host) for host in hosts])
+
+        cold = FeatureCache(db_path, memory_entries=args.hosts)
+        cold_time, _ = timed(lambda: (run(cold), cold.flush()))
+        cold_stats = cold.stats()
+
+        disk = FeatureCache(db_path, memory_entries=args.hosts)
+        disk_time, from_disk = timed(lambda: run(disk))
+        disk_stats = disk.stats()
+        memory_time, _ = timed(lambda: run(disk))
+        disk.close()
+        cold.close()
+
+    if [feat.to_dict() for feat in reference] != [feat.to_dict() for feat in from_disk]:
+        print("[ERREUR] Les features relues du cache diffèrent de l'extraction", file=sys.stderr)
+        return 1
+
+    def per_host(seconds: float) -> str:
+        return f"{seconds / len(hosts) * 1e6:,.0f}"
+
+    print(f"[INFO] {len(hosts)} hôtes, clé de cache seule : {per_host(key_time)} µs/hôte")
+    print_table(
+        ["run", "temps (s)", "µs/hôte", "hits", "misses"],
+        [
+            ["extraction directe", f"{direct_time:.3f}", per_host(direct_time), "-", "-"],
+            ["cache vide (1er scan)", f"{cold_time:.3f}", per_host(cold_time), cold_stats["hits"], cold_stats["misses"]],
+            ["cache SQLite (2e scan)", f"{disk_time:.3f}", per_host(disk_time), disk_stats["hits"], disk_stats["misses"]],
+            ["LRU mémoire", f"{memory_time:.3f}", per_host(memory_time), "-", "-"],
+        ],
+    )
+    print(f"[INFO] Gain 2e scan : x{direct_time / disk_time:.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""Compare XML → JSON → features (deux étapes) au chemin rapide xml_features."""
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+from bench_common import print_table, setup_paths, timed
+from synthetic_nmap import write_synthetic_scan
+
+setup_paths()
+
+import parse_nmap  # noqa: E402
+from feature_engineering import extract_features_from_scan  # noqa: E402
+from xml_features import iter_features_from_xml  # noqa: E402
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hosts", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        xml_path = write_synthetic_scan(Path(tmp) / "scan.xml", hosts=args.hosts)
+        json_path = Path(tmp) / "scan.json"
+
+        def two_step():
+            parse_nmap.convert(xml_path, json_path)
+            return extract_features_from_scan(json_path)
+
+        def fused():
+            return list(iter_features_from_xml(xml_path))
+
+        two_step_time, reference = timed(two_step, repeat=args.repeat)
+        fused_time, candidate = timed(fused, repeat=args.repeat)
+
+    if [feat.to_dict() for feat in reference] != [feat.to_dict() for feat in candidate]:
+        print("[ERREUR] Les deux chemins ne produisent pas les mêmes features", file=sys.stderr)
+        return 1
+
+    print_table(
+        ["chemin", "temps (s)", "hôtes/s"],
+        [
+            ["XML → JSON → features", f"{two_step_time:.2f}", f"{args.hosts / two_step_time:,.0f}"],
+            ["XML → features (fused)", f"{fused_time:.2f}", f"{args.hosts / fused_time:,.0f}"],
+        ],
+    )
+    print(f"[INFO] Gain : x{two_step_time / fused_time:.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Historique des scans : liste JSON réécrite vs ``history_store.py`` (instantanés + agrégats).
+
+Pour chaque taille d'historique (``--sizes``, un instantané toutes les 15 minutes),
+mesure l'ajout d'un scan (ancienne réécriture de ``scan_history.json`` vs ajout au
+journal et mise à jour des agrégats), puis une tendance journalière sur 30 jours :
+agrégation de la liste brute comme le dashboard vs lecture des agrégats. Les deux
+tendances doivent être identiques.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import tempfile
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from bench_common import print_table, setup_paths, timed
+
+setup_paths()
+
+from audit_store import AuditStore, parse_timestamp  # noqa: E402
+from history_store import RISK_LEVELS, ScanHistoryStore, bucket_of, build_snapshot  # noqa: E402
+
+START = 1_700_000_000
+STEP = 900
+
+
+def synthetic_snapshot(index: int) -> dict[str, Any]:
+    events = [
+        {"risk_level": RISK_LEVELS[(index + host) % 4], "risk_score": (index * 7 + host * 13) % 101}
+        for host in range(index % 12)
+    ]
+    timestamp = datetime.fromtimestamp(START + index * STEP, tz=UTC).isoformat().replace("+00:00", "Z")
+    return build_snapshot(f"scan_{index}", events, timestamp)
+
+
+def legacy_append(snapshot: dict[str, Any], path: Path) -> None:
+    history = json.loads(path.read_text(encoding="utf-8")) if path.exists() else []
+    history.append(snapshot)
+    path.write_text(json.dumps(history, indent=2), encoding="utf-8")
+
+
+def raw_daily_trend(path: Path, since: float) -> dict[int, tuple[int, int, float]]:
+    """Agrégation faite à partir de la liste brute (comme le navigateur)."""
+
+    trend: dict[int, tuple[int, int, float]] = {}
+    for snapshot in json.loads(path.read_text(encoding="utf-8")):
+        epoch = parse_timestamp(snapshot["timestamp"])
+        if epoch < since:
+            continue
+        day = bucket_of("day", epoch)
+        scans, hosts, score_sum = trend.get(day, (0, 0, 0.0))
+        count = snapshot["host_count"]
+        trend[day] = (scans + 1, hosts + count, score_sum + snapshot["average_score"] * count)
+    return trend
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="1000,10000,35000", help="Instantanés existants (35 000 ≈ 1 an)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    rows = []
+    status = 0
+    for size in (int(value) for value in args.sizes.split(",")):
+        history = [synthetic_snapshot(index) for index in range(size)]
+        with tempfile.TemporaryDirectory() as tmp:
+            legacy_path = Path(tmp) / "scan_history.json"
+            legacy_path.write_text(json.dumps(history, indent=2), encoding="utf-8")
+            store = ScanHistoryStore(AuditStore(Path(tmp) / "scan_history.segments"))
+            store.append_many(history)
+
+            extra = [synthetic_snapshot(index) for index in range(size, size + args.repeat)]
+            legacy_extra, store_extra = iter(extra), iter(extra)
+            legacy_time, _ = timed(lambda: legacy_append(next(legacy_extra), legacy_path), repeat=args.repeat)
+            store_time, _ = timed(lambda: store.append(next(store_extra)), repeat=args.repeat)
+
+            since = START + (size + args.repeat) * STEP - 30 * 86400
+            raw_time, raw = timed(lambda: raw_daily_trend(legacy_path, since), repeat=args.repeat)
+            query_time, rollup = timed(lambda: store.query("day", since=since), repeat=args.repeat)
+            # La fenêtre commence en cours de journée : le premier jour n'est comparable qu'en entier.
+            got = {
+                bucket_of("day", parse_timestamp(row["period"])): (row["scans"], row["host_count"])
+                for row in rollup
+            }
+            expected = {day: values[:2] for day, values in raw.items() if day > min(raw)}
+            identical = all(got.get(day) == values for day, values in expected.items())
+            status |= not identical
+
+        rows.append(
+            [
+                size,
+                f"{legacy_time * 1e3:.2f}",
+                f"{store_time * 1e3:.2f}",
+                f"{raw_time * 1e3:.2f}",
+                f"{query_time * 1e3:.2f}",
+                "oui" if identical else "NON",
+            ]
+        )
+
+    print("[INFO] Ajout d'un scan et tendance journalière sur 30 jours (ms, meilleur temps)")
+    print_table(["historique", "ajout JSON", "ajout store", "tendance brute", "tendance agrégée", "identique"], rows)
+    if status:
+        print("[ERREUR] Les agrégats diffèrent de l'agrégation de la liste brute", file=sys.stderr)
+    return status
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""Mesure la mémoire retenue par les ``HostFeatures`` d'un scan, ramenée à 10 000 hôtes.
+
+Le rapport est lu au fil de l'eau (comme ``analyse_scan.py`` sur un ``.xml``) et
+seules les features sont conservées. L'ancienne représentation (dataclass sans
+``__slots__``, ``cve_list`` en liste de chaînes propres à chaque hôte,
+``script_findings`` copiant les textes NSE) est reproduite ici pour comparaison.
+Avec ``--budget``, le script échoue si la représentation actuelle dépasse le
+budget (Mo pour 10 000 hôtes).
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import sys
+import tempfile
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+from bench_common import print_table, setup_paths
+from synthetic_nmap import write_synthetic_scan
+
+setup_paths()
+
+import parse_nmap  # noqa: E402
+from feature_engineering import CVE_PATTERN, _iter_script_outputs  # noqa: E402
+from xml_features import iter_features_from_xml  # noqa: E402
+
+
+@dataclass
+class LegacyHostFeatures:
+    host: str | None
+    hostname: str | None
+    os: str | None
+    open_ports: int
+    risky_services: int
+    cve_count: int
+    cve_list: list[str]
+    has_anonymous_ftp: bool
+    has_default_http_admin: bool
+    script_findings: list[str]
+    max_cvss: float
+    avg_cvss: float
+
+
+def iter_legacy_features(xml_path: Path) -> Any:
+    features = iter_features_from_xml(xml_path)
+    for record in parse_nmap.iter_scan_records(xml_path):
+        if record["record"] != "host":
+            continue
+        host = record["host"]
+        feat = next(features)
+        texts = list(_iter_script_outputs(host.get("scripts", [])))
+        for svc in host.get("services", []):
+            if svc.get("state") == "open":
+                texts.extend(_iter_script_outputs(svc.get("scripts", [])))
+        cves = {match.upper(): None for text in texts for match in CVE_PATTERN.findall(text)}
+        yield LegacyHostFeatures(
+            host=feat.host,
+            hostname=feat.hostname,
+            os=feat.os,
+            open_ports=feat.open_ports,
+            risky_services=feat.risky_services,
+            cve_count=feat.cve_count,
+            cve_list=list(cves),
+            has_anonymous_ftp=feat.has_anonymous_ftp,
+            has_default_http_admin=feat.has_default_http_admin,
+            script_findings=list(set(texts)),
+            max_cvss=feat.max_cvss,
+            avg_cvss=feat.avg_cvss,
+        )
+
+
+def retained(build: Callable[[], list[Any]]) -> tuple[int, list[Any]]:
+    """Octets encore alloués une fois ``build`` terminé (flux source libéré)."""
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, result
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hosts", type=int, default=10_000)
+    parser.add_argument("--ports", type=int, default=6)
+    parser.add_argument("--cves", type=int, default=20, help="CVE max par port (densité des scripts)")
+    parser.add_argument(
+        "--cve-pool", type=int, default=2000, help="CVE distinctes dans le parc (0 = tirage aléatoire par hôte)"
+    )
+    parser.add_argument("--budget", type=float, default=None, help="Mo max pour 10 000 hôtes")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        xml_path = write_synthetic_scan(
+            Path(tmp) / "scan.xml", hosts=args.hosts, ports=args.ports, cves=args.cves, cve_pool=args.cve_pool
+        )
+        legacy_bytes, legacy = retained(lambda: list(iter_legacy_features(xml_path)))
+        witness = set(legacy[len(legacy) // 2].script_findings) if legacy else set()
+        del legacy
+        compact_bytes, compact = retained(lambda: list(iter_features_from_xml(xml_path)))
+        hosts = len(compact)
+        # La référence paresseuse doit relire les mêmes textes depuis le rapport source.
+        sample = compact[hosts // 2].script_findings if hosts else []
+        del compact
+
+    if set(sample) != witness:
+        print("[ERREUR] script_findings relus depuis le rapport diffèrent des textes d'origine", file=sys.stderr)
+        return 1
+
+    def per_10k(size: int) -> float:
+        return size / max(hosts, 1) * 10_000 / 1e6
+
+    print(f"[INFO] {hosts} hôtes, {len(sample)} textes NSE relus pour l'hôte témoin")
+    print_table(
+        ["représentation", "Mo retenus", "octets/hôte", "Mo / 10k hôtes"],
+        [
+            [
+                "dataclass + textes copiés (ancienne)",
+                f"{legacy_bytes / 1e6:,.1f}",
+                f"{legacy_bytes / max(hosts, 1):,.0f}",
+                f"{per_10k(legacy_bytes):,.1f}",
+            ],
+            [
+                "__slots__ + CVE internées + réf. paresseuse",
+                f"{compact_bytes / 1e6:,.1f}",
+                f"{compact_bytes / max(hosts, 1):,.0f}",
+                f"{per_10k(compact_bytes):,.1f}",
+            ],
+        ],
+    )
+    print(f"[INFO] Réduction : x{legacy_bytes / max(compact_bytes, 1):.1f}")
+    if args.budget is not None and per_10k(compact_bytes) > args.budget:
+        print(
+            f"[ERREUR] {per_10k(compact_bytes):.1f} Mo / 10k hôtes > budget {args.budget:.1f} Mo",
+            file=sys.stderr,
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
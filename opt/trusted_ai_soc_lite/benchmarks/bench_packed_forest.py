@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Compare la forêt compilée de ``forest_eval.py`` au ``predict_proba`` de scikit-learn.
+
+Deux mesures : le démarrage à froid d'un processus qui charge le modèle et score
+un hôte (``joblib.load`` + import sklearn vs ``model.forest.npz``), puis la
+latence par lot à ``--sizes`` hôtes. Le script échoue si une probabilité diffère
+d'un seul bit entre les deux évaluations.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from bench_common import AI_ENGINE_DIR, print_table, setup_paths, timed
+from bench_batched_scoring import synthetic_features
+
+setup_paths()
+
+from feature_engineering import FEATURE_NAMES, FeatureMatrix  # noqa: E402
+from forest_eval import export_packed_forest, load_matching_packed_forest  # noqa: E402
+
+try:
+    import joblib
+    import numpy as np
+    from sklearn.ensemble import RandomForestClassifier
+except ModuleNotFoundError:  # pragma: no cover
+    RandomForestClassifier = None  # type: ignore
+
+COLD_START = {
+    "sklearn (model.pkl)": "import joblib; model = joblib.load({path!r})",
+    "forêt compilée (.forest.npz)": (
+        "from forest_eval import load_matching_packed_forest; "
+        "model = load_matching_packed_forest(Path({path!r}))"
+    ),
+}
+
+
+def cold_start(code: str, model_path: Path, repeat: int) -> float:
+    script = (
+        f"import sys; sys.path.insert(0, {str(AI_ENGINE_DIR)!r}); from pathlib import Path; "
+        + code.format(path=str(model_path))
+        + f"; model.predict_proba([[0.0] * {len(FEATURE_NAMES)}])"
+    )
+    seconds, _ = timed(lambda: subprocess.run([sys.executable, "-c", script], check=True), repeat=repeat)
+    return seconds
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="100,1000,10000,100000", help="Nombres d'hôtes séparés par des virgules")
+    parser.add_argument("--trees", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3, help="Démarrages à froid mesurés (meilleur temps)")
+    args = parser.parse_args(argv)
+
+    if RandomForestClassifier is None:
+        print("[ERREUR] scikit-learn non installé", file=sys.stderr)
+        return 1
+
+    rng = random.Random(42)
+    train = FeatureMatrix.from_features(synthetic_features(2000, rng))
+    max_cvss, anonymous = FEATURE_NAMES.index("max_cvss"), FEATURE_NAMES.index("has_anonymous_ftp")
+    labels = [int(row[max_cvss] >= 7.0 or row[anonymous] > 0) for row in train.values]
+    model = RandomForestClassifier(n_estimators=args.trees, max_depth=12, random_state=42).fit(train.values, labels)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = Path(tmp) / "model.pkl"
+        joblib.dump(model, model_path)
+        export_packed_forest(model, model_path)
+        forest = load_matching_packed_forest(model_path)
+        startup = [[label, f"{cold_start(code, model_path, args.repeat):.3f}"] for label, code in COLD_START.items()]
+
+    rows = []
+    for size in (int(value) for value in args.sizes.split(",")):
+        values = FeatureMatrix.from_features(synthetic_features(size, rng)).values
+        sklearn_time, expected = timed(lambda: model.predict_proba(values))
+        packed_time, packed = timed(lambda: forest.predict_proba(values))
+        if not np.array_equal(expected, packed):
+            print(f"[ERREUR] {size} hôtes : probabilités différentes de predict_proba", file=sys.stderr)
+            return 1
+        rows.append(
+            [
+                size,
+                f"{sklearn_time * 1e3:,.1f}",
+                f"{packed_time * 1e3:,.1f}",
+                f"{sklearn_time / size * 1e6:,.1f}",
+                f"{packed_time / size * 1e6:,.1f}",
+            ]
+        )
+
+    print(f"[INFO] RandomForest {args.trees} arbres, max_depth=12, {len(forest.feature)} nœuds")
+    print_table(["démarrage à froid", "secondes"], startup)
+    print()
+    print_table(["hôtes", "sklearn (ms)", "compilée (ms)", "µs/hôte sklearn", "µs/hôte compilée"], rows)
+    print("[INFO] Probabilités identiques bit à bit à predict_proba")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
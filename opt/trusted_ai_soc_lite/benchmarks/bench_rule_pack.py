@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""Coût du pack de signatures (rule_pack.py) quand le nombre de règles augmente.
+
+Compare, pour 10 à 5000 règles synthétiques, l'évaluation naïve règle par règle
+(une passe ``in``/``re.search`` par règle et par texte) au pack compilé (une regex
+en trie par texte, regex des règles filtrées par leur littéral obligatoire).
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import sys
+import tempfile
+from pathlib import Path
+
+from bench_common import print_table, setup_paths, timed
+from synthetic_nmap import write_synthetic_scan
+
+setup_paths()
+
+import parse_nmap  # noqa: E402
+from feature_engineering import _iter_script_outputs  # noqa: E402
+from rule_pack import Rule, RulePack  # noqa: E402
+
+# Motifs à quantificateurs {m,n} : le littéral obligatoire ne doit pas inclure leurs chiffres.
+QUANTIFIER_PATTERNS = [
+    r"x{2,10}y",
+    r"ab{0,3}cde",
+    r"serv{1}er-status",
+    r"openssh[_ ]\d{1,2}\.\d",
+    r"(?:ab){2}cdef",
+    r"tls{,2}v1",
+]
+QUANTIFIER_TEXTS = ["xxxy", "acde", "abbbcde", "server-status", "openssh_7.4", "ababcdef", "tlv1", "tlssv1", "2,10 0,3"]
+WORDS = ["admin", "login", "console", "default", "password", "apache", "nginx", "openssh", "tls", "cipher", "vulnerable"]
+
+
+def synthetic_rules(count: int, *, seed: int = 7, regex_ratio: float = 0.1) -> list[Rule]:
+    rng = random.Random(seed)
+    rules: list[Rule] = []
+    for index in range(count):
+        token = f"{rng.choice(WORDS)}-{rng.randrange(16**5):05x}"
+        data: dict = {"id": f"r{index}", "column": f"col{index % 16}"}
+        if rng.random() < regex_ratio:
+            data["regex"] = [rf"{re.escape(token)}/[0-9]+\.[0-9]+"]
+        elif rng.random() < 0.5:
+            data["all"] = [token, rng.choice(WORDS)]
+        else:
+            data["any"] = [token, f"{token}-alt"]
+        rules.append(Rule.from_dict(data))
+    return rules
+
+
+def naive_match(rules: list[tuple[Rule, list[re.Pattern[str]]]], lowered: str) -> tuple[int, ...]:
+    hits = []
+    for index, (rule, patterns) in enumerate(rules):
+        if not all(literal in lowered for literal in rule.all):
+            continue
+        if rule.any and not any(literal in lowered for literal in rule.any):
+            continue
+        if not all(pattern.search(lowered) for pattern in patterns):
+            continue
+        hits.append(index)
+    return tuple(hits)
+
+
+def check_quantifiers() -> bool:
+    """Pack compilé et ``re.search`` d'accord sur les motifs à quantificateurs ``{m,n}``."""
+
+    rules = [
+        Rule.from_dict({"id": f"q{index}", "column": "quantifier", "regex": [pattern]})
+        for index, pattern in enumerate(QUANTIFIER_PATTERNS)
+    ]
+    pack = RulePack(rules)
+    compiled = [(rule, [re.compile(pattern) for pattern in rule.regex]) for rule in rules]
+    ok = True
+    for text in QUANTIFIER_TEXTS:
+        expected, got = naive_match(compiled, text), pack.match(text)
+        if got != expected:
+            print(f"[ERREUR] {text!r} : pack {got}, re.search {expected}", file=sys.stderr)
+            ok = False
+    return ok
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hosts", type=int, default=50)
+    parser.add_argument("--texts", type=int, default=2000, help="Textes NSE distincts évalués")
+    parser.add_argument("--sizes", default="10,100,500,1000,5000", help="Nombres de règles, séparés par des virgules")
+    args = parser.parse_args(argv)
+
+    if not check_quantifiers():
+        return 1
+    with tempfile.TemporaryDirectory() as tmp:
+        xml_path = write_synthetic_scan(Path(tmp) / "scan.xml", hosts=args.hosts, ports=8, cves=20)
+        texts: dict[str, None] = {}
+        for record in parse_nmap.iter_scan_records(xml_path):
+            if record["record"] != "host":
+                continue
+            host = record["host"]
+            for svc in host.get("services", []):
+                for text in _iter_script_outputs(svc.get("scripts", [])):
+                    texts[text.lower()] = None
+    lowered_texts = list(texts)[: args.texts]
+    print(f"[INFO] {len(lowered_texts)} textes NSE distincts ({sum(map(len, lowered_texts)) // len(lowered_texts)} car. en moyenne)")
+
+    rows = []
+    for size in [int(value) for value in args.sizes.split(",")]:
+        rules = synthetic_rules(size)
+        # Quelques textes déclenchent des règles, comme en production.
+        sample = [f"{text} {rule.all[0] if rule.all else rule.any[0] if rule.any else ''}" for text, rule in zip(lowered_texts[:50], rules)]
+        corpus = sample + lowered_texts[50:]
+        compile_time, pack = timed(lambda: RulePack(rules))
+        compiled = [(rule, [re.compile(pattern) for pattern in rule.regex]) for rule in rules]
+        naive_time, expected = timed(lambda: [naive_match(compiled, text) for text in corpus])
+        pack_time, got = timed(lambda: [pack.match(text) for text in corpus], repeat=3)
+        if got != expected:
+            print(f"[ERREUR] {size} règles : résultats différents de l'évaluation naïve", file=sys.stderr)
+            return 1
+        rows.append(
+            [
+                size,
+                f"{compile_time * 1e3:,.1f}",
+                f"{naive_time / len(corpus) * 1e6:,.1f}",
+                f"{pack_time / len(corpus) * 1e6:,.1f}",
+                f"x{naive_time / pack_time:,.1f}",
+            ]
+        )
+    print_table(["règles", "compilation (ms)", "naïf (µs/texte)", "pack (µs/texte)", "gain"], rows)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Différentiel entre deux scans successifs de ``run_scan.sh`` (``--diff-state``).
+
+Génère deux XML Nmap synthétiques dont la ligne de commande ne diffère que par le
+chemin horodaté de ``-oX``, comme deux passages de ``run_scan.sh`` sur le même
+``targets.txt`` : le second reprend les ``--hosts`` hôtes du premier à
+l'identique et en ajoute ``--new-hosts``. Le second scan est analysé sans puis
+avec l'état différentiel du premier. Le script échoue si les hôtes inchangés ne
+sont pas repris sans re-scoring (aucune référence trouvée pour le périmètre).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from bench_common import AI_ENGINE_DIR, print_table
+from synthetic_nmap import write_synthetic_scan
+
+RUN_SCAN_ARGS = (
+    "nmap -sV -sC -O -T4 -p 1-2048 --script default,vuln,auth,malware,safe --script-timeout 20s "
+    "-oX {reports}/full_soc_scan_{stamp}.xml -iL {reports}/../targets.txt"
+)
+
+
+def analyse(report: Path, outputs: Path, diff_state: Path | None) -> float:
+    outputs.mkdir(exist_ok=True)
+    command = [
+        sys.executable,
+        str(AI_ENGINE_DIR / "analyse_scan.py"),
+        str(report),
+        "--disable-shap",
+        "--disable-lime",
+        "--ti-offline",
+        "--no-scoring-daemon",
+        "--no-metrics",
+        "--log-file",
+        str(outputs / "ia_events.log"),
+        "--audit-file",
+        str(outputs / "ia_decisions.json"),
+        "--scan-history",
+        str(outputs / "scan_history.json"),
+        "--ti-cache",
+        str(outputs / "ti_cache.json"),
+        "--features-file",
+        str(outputs / "last_features.json"),
+    ]
+    if diff_state is not None:
+        command += ["--diff-state", str(diff_state), "--delta-log", str(outputs / "scan_deltas.log")]
+    started = time.perf_counter()
+    subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - started
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hosts", type=int, default=2000, help="Hôtes présents dans les deux scans")
+    parser.add_argument("--new-hosts", type=int, default=50, help="Hôtes ajoutés par le second scan")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        reports = workdir / "reports"
+        scans = [
+            write_synthetic_scan(
+                reports / f"full_soc_scan_{stamp}.xml",
+                hosts=hosts,
+                cve_pool=500,
+                port_distribution="geometric",
+                script_density=0.6,
+                args=RUN_SCAN_ARGS.format(reports=reports, stamp=stamp),
+            )
+            for stamp, hosts in (("2025-11-30_183951", args.hosts), ("2025-11-30_185639", args.hosts + args.new_hosts))
+        ]
+        diff_state = workdir / "scan_diff_state.json"
+        analyse(scans[0], workdir / "first", diff_state)
+        full = analyse(scans[1], workdir / "full", None)
+        incremental = analyse(scans[1], workdir / "diff", diff_state)
+        delta = json.loads((workdir / "diff/scan_deltas.log").read_text(encoding="utf-8").splitlines()[-1])
+        with (workdir / "diff/ia_events.log").open(encoding="utf-8") as fh:
+            reused = sum("reused_from" in json.loads(line) for line in fh)
+
+    print_table(
+        ["second scan", "secondes"],
+        [["analyse complète", f"{full:.2f}"], ["--diff-state", f"{incremental:.2f}"]],
+    )
+    print(
+        f"[INFO] Référence : {delta['previous_scan_id']} ; {len(delta['added'])} nouveau(x), "
+        f"{len(delta['changed'])} modifié(s), {delta['unchanged']} inchangé(s), {reused} repris"
+    )
+    if delta["previous_scan_id"] is None or reused != args.hosts or len(delta["added"]) != args.new_hosts:
+        print(f"[ERREUR] {args.hosts} hôtes inchangés attendus repris sans re-scoring", file=sys.stderr)
+        return 1
+    print("[OK] Hôtes inchangés repris entre deux scans run_scan.sh")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Mesure le coût par hôte de l'extraction des features texte sur des hôtes riches en scripts NSE.
+
+Compare l'ancienne extraction multi-passes (reproduite ici telle qu'elle était
+dans feature_engineering.py) au scanner une passe ``ScriptTextScanner``.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Iterable
+
+from bench_common import print_table, setup_paths, timed
+from synthetic_nmap import write_synthetic_scan
+
+setup_paths()
+
+import parse_nmap  # noqa: E402
+from feature_engineering import (  # noqa: E402
+    CVE_PATTERN,
+    CVSS_PATTERN,
+    RISKY_SERVICES,
+    HostFeatures,
+    _iter_script_outputs,
+    extract_features_from_host,
+)
+
+
+def _legacy_cves_and_scores(scripts: Iterable[dict[str, Any]]) -> tuple[list[str], list[float]]:
+    cves: dict[str, None] = {}
+    scores: list[float] = []
+    for text in _iter_script_outputs(scripts):
+        for match in CVE_PATTERN.findall(text):
+            cves[match.upper()] = None
+        for match in CVSS_PATTERN.findall(text):
+            scores.append(float(match))
+    return list(cves.keys()), scores
+
+
+def _legacy_anonymous(scripts: Iterable[dict[str, Any]]) -> bool:
+    return any("anonymous" in text.lower() for text in _iter_script_outputs(scripts))
+
+
+def _legacy_http_admin(scripts: Iterable[dict[str, Any]]) -> bool:
+    for text in _iter_script_outputs(scripts):
+        lowered = text.lower()
+        if "admin" in lowered and any(keyword in lowered for keyword in {"login", "panel", "console"}):
+            return True
+    return False
+
+
+def legacy_extract(host: dict[str, Any]) -> HostFeatures:
+    open_services = [svc for svc in host.get("services", []) if svc.get("state") == "open"]
+    risky = [svc for svc in open_services if (svc.get("service", {}) or {}).get("name") in RISKY_SERVICES]
+    combined: list[dict[str, Any]] = list(host.get("scripts", []))
+    per_service = [script for svc in open_services for script in svc.get("scripts", [])]
+    for svc in open_services:
+        combined.extend(svc.get("scripts", []))
+    cve_list, scores = _legacy_cves_and_scores(combined)
+    return HostFeatures(
+        host=host.get("address"),
+        hostname=host.get("hostname"),
+        os=host.get("os"),
+        open_ports=len(open_services),
+        risky_services=len(risky),
+        cve_count=len(cve_list),
+        cve_list=cve_list,
+        has_anonymous_ftp=_legacy_anonymous(per_service),
+        has_default_http_admin=_legacy_http_admin(per_service),
+        max_cvss=max(scores) if scores else 0.0,
+        avg_cvss=(sum(scores) / len(scores)) if scores else 0.0,
+    )
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hosts", type=int, default=2000)
+    parser.add_argument("--ports", type=int, default=8)
+    parser.add_argument("--cves", type=int, default=60, help="CVE max par port (densité des scripts)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        xml_path = write_synthetic_scan(Path(tmp) / "scan.xml", hosts=args.hosts, ports=args.ports, cves=args.cves)
+        hosts = [record["host"] for record in parse_nmap.iter_scan_records(xml_path) if record["record"] == "host"]
+
+    legacy_time, reference = timed(lambda: [legacy_extract(host) for host in hosts], repeat=args.repeat)
+    single_time, candidate = timed(lambda: [extract_features_from_host(host) for host in hosts], repeat=args.repeat)
+
+    # L'ancienne extraction ne connaît pas le pack de signatures.
+    if [feat.to_dict() for feat in reference] != [dict(feat.to_dict(), signatures={}) for feat in candidate]:
+        print("[ERREUR] Les deux extractions ne produisent pas les mêmes features", file=sys.stderr)
+        return 1
+
+    texts = sum(1 for host in hosts for _ in _iter_script_outputs(host.get("scripts", [])))
+    texts += sum(
+        1 for host in hosts for svc in host.get("services", []) for _ in _iter_script_outputs(svc.get("scripts", []))
+    )
+    print(f"[INFO] {len(hosts)} hôtes, {texts / max(len(hosts), 1):.0f} textes NSE par hôte en moyenne")
+    print_table(
+        ["extraction", "temps (s)", "µs/hôte"],
+        [
+            ["multi-passes (ancienne)", f"{legacy_time:.3f}", f"{legacy_time / len(hosts) * 1e6:,.0f}"],
+            ["ScriptTextScanner (1 passe)", f"{single_time:.3f}", f"{single_time / len(hosts) * 1e6:,.0f}"],
+        ],
+    )
+    print(f"[INFO] Gain : x{legacy_time / single_time:.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Contrôle le démarrage à froid d'``analyse_scan.py`` en mode heuristique seul.
+
+Chaque scan relance ``analyse_scan.py`` : ce chemin (pas de modèle,
+``--disable-shap --disable-lime``, TI hors ligne) doit rester sous ``--budget``
+secondes, meilleur temps de ``--repeat`` exécutions d'un petit rapport XML.
+Le script échoue aussi si une dépendance lourde (numpy, joblib, sklearn, shap,
+lime, requests) est importée sur ce chemin : elles doivent rester différées.
+"""
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from bench_common import AI_ENGINE_DIR, print_table, setup_paths, timed
+from synthetic_nmap import write_synthetic_scan
+
+setup_paths()
+
+from startup_profile import format_report, parse_importtime  # noqa: E402
+
+HEAVY_MODULES = {"numpy", "joblib", "sklearn", "shap", "lime", "requests", "scipy", "pandas"}
+DEFAULT_BUDGET = 0.5
+
+
+def analyse_command(report: Path, workdir: Path) -> list[str]:
+    return [
+        str(AI_ENGINE_DIR / "analyse_scan.py"),
+        str(report),
+        "--model",
+        str(workdir / "absent.pkl"),
+        "--disable-shap",
+        "--disable-lime",
+        "--ti-offline",
+        "--no-scoring-daemon",
+        "--ti-cache",
+        str(workdir / "ti.json"),
+        "--log-file",
+        str(workdir / "ia_events.log"),
+        "--audit-file",
+        str(workdir / "audit.json"),
+        "--features-file",
+        str(workdir / "features.json"),
+        "--scan-history",
+        str(workdir / "history.json"),
+    ]
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hosts", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET, help="Secondes max (meilleur temps)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        report = write_synthetic_scan(workdir / "scan.xml", hosts=args.hosts)
+        command = analyse_command(report, workdir)
+        baseline, _ = timed(lambda: subprocess.run([sys.executable, "-c", "pass"], check=True), repeat=args.repeat)
+        elapsed, _ = timed(
+            lambda: subprocess.run([sys.executable, *command], check=True, capture_output=True), repeat=args.repeat
+        )
+        profiled = subprocess.run(
+            [sys.executable, "-X", "importtime", *command], check=True, capture_output=True, text=True
+        )
+
+    timings, _ = parse_importtime(profiled.stderr.splitlines())
+    heavy = sorted({timing.module.split(".")[0] for timing in timings} & HEAVY_MODULES)
+    print(f"[INFO] {args.hosts} hôtes, heuristique seule, meilleur de {args.repeat} exécutions")
+    print_table(
+        ["mesure", "secondes"],
+        [
+            ["python -c pass", f"{baseline:.3f}"],
+            ["analyse_scan.py", f"{elapsed:.3f}"],
+            ["budget", f"{args.budget:.3f}"],
+        ],
+    )
+    print()
+    for line in format_report(timings, elapsed, top=10):
+        print(line)
+
+    status = 0
+    if heavy:
+        print(f"[ERREUR] Dépendances lourdes importées en mode heuristique : {', '.join(heavy)}", file=sys.stderr)
+        status = 1
+    if elapsed > args.budget:
+        print(f"[ERREUR] Démarrage {elapsed:.3f} s > budget {args.budget:.3f} s", file=sys.stderr)
+        status = 1
+    return status
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
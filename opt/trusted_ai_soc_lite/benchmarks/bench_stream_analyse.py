@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""Mémoire d'``analyse_scan.py`` : rapport entier vs mode flux (``--stream-batch``).
+
+Pour chaque taille de ``--sizes``, génère un XML Nmap synthétique et l'analyse
+dans un processus séparé, d'abord en mode classique puis en flux par micro-lots
+de ``--batch`` hôtes. Mesure le pic de RSS du processus (``VmHWM`` relevé pendant
+l'exécution : le ``ru_maxrss`` d'un enfant compte aussi la mémoire du parent au
+``fork``), la durée totale et le délai avant la première ligne de
+``ia_events.log``. Les événements (horodatage exclu) doivent être identiques
+dans les deux modes.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from bench_common import AI_ENGINE_DIR, print_table
+from synthetic_nmap import write_synthetic_scan
+
+
+def vm_hwm_kb(status_path: Path) -> int | None:
+    try:
+        for line in status_path.read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def run(report: Path, outputs: Path, extra: list[str]) -> tuple[float, float | None, float]:
+    """Durée, délai avant le premier événement et pic de RSS (Mo) d'une analyse."""
+
+    outputs.mkdir()
+    log_path = outputs / "ia_events.log"
+    command = [
+        sys.executable,
+        str(AI_ENGINE_DIR / "analyse_scan.py"),
+        str(report),
+        "--disable-shap",
+        "--disable-lime",
+        "--ti-offline",
+        "--no-scoring-daemon",
+        "--no-metrics",
+        "--log-file",
+        str(log_path),
+        "--audit-file",
+        str(outputs / "ia_decisions.json"),
+        "--scan-history",
+        str(outputs / "scan_history.json"),
+        "--ti-cache",
+        str(outputs / "ti_cache.json"),
+        "--features-file",
+        str(outputs / "last_features.json"),
+        *extra,
+    ]
+    started = time.perf_counter()
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    first_event = None
+    peak_kb = 0
+    status_path = Path(f"/proc/{process.pid}/status")
+    while True:
+        peak_kb = vm_hwm_kb(status_path) or peak_kb
+        if first_event is None and log_path.exists() and log_path.stat().st_size:
+            first_event = time.perf_counter() - started
+        if process.poll() is not None:
+            break
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - started
+    if process.returncode:
+        raise RuntimeError(f"échec de {' '.join(command)}")
+    return elapsed, first_event, peak_kb / 1024
+
+
+def events_digest(outputs: Path) -> str:
+    """Empreinte des événements hors horodatage (sans les garder en mémoire)."""
+
+    digest = hashlib.sha256()
+    with (outputs / "ia_events.log").open(encoding="utf-8") as fh:
+        for line in fh:
+            record = json.loads(line)
+            record.pop("timestamp", None)
+            digest.update(json.dumps(record, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="10000,100000", help="Nombres d'hôtes séparés par des virgules")
+    parser.add_argument("--batch", type=int, default=512, help="Hôtes par micro-lot en mode flux")
+    args = parser.parse_args(argv)
+
+    modes = [("rapport entier", []), (f"flux --stream-batch {args.batch}", ["--stream-batch", str(args.batch)])]
+    rows = []
+    identical = True
+    for size in (int(value) for value in args.sizes.split(",")):
+        with tempfile.TemporaryDirectory() as tmp:
+            workdir = Path(tmp)
+            report = write_synthetic_scan(
+                workdir / "scan.xml",
+                hosts=size,
+                cve_pool=2000,
+                port_distribution="geometric",
+                script_density=0.6,
+                os_matches=3,
+            )
+            for label, extra in modes:
+                outputs = workdir / label.split()[0]
+                elapsed, first_event, rss = run(report, outputs, extra)
+                first = f"{first_event:.2f}" if first_event is not None else "-"
+                rows.append([size, label, f"{elapsed:.2f}", first, f"{rss:.0f}"])
+            identical &= events_digest(workdir / "rapport") == events_digest(workdir / "flux")
+
+    print_table(["hôtes", "mode", "secondes", "1er événement (s)", "pic RSS (Mo)"], rows)
+    print(f"[INFO] Événements identiques dans les deux modes : {'oui' if identical else 'NON'}")
+    return 0 if identical else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""Génère un rapport XML Nmap synthétique (services + scripts vulners) pour les benchmarks.
+
+Par défaut chaque hôte expose ``--ports`` services parmi ``SERVICES`` avec un
+script vulners par port. Pour une charge plus proche d'un vrai parc :
+
+- ``--port-distribution geometric`` : nombre de ports ouverts tiré autour de
+  ``--ports`` (beaucoup d'hôtes peu exposés, quelques-uns très exposés), parmi
+  ``SERVICES`` + ``EXTRA_SERVICES`` ;
+- ``--script-density`` : proportion de ports portant une table vulners ;
+- ``--os-matches`` : nombre d'``osmatch`` (précision décroissante) par hôte.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+from pathlib import Path
+from typing import TextIO
+from xml.sax.saxutils import quoteattr
+
+SERVICES = [
+    ("ssh", "OpenSSH", "8.9p1", 22),
+    ("http", "Apache httpd", "2.4.65", 80),
+    ("https", "nginx", "1.24.0", 443),
+    ("ftp", "vsftpd", "3.0.3", 21),
+    ("smb", "Samba smbd", "4.6.2", 445),
+    ("mysql", "MySQL", "8.0.36", 3306),
+    ("rdp", "Microsoft Terminal Services", None, 3389),
+    ("ipp", "CUPS", "2.4", 631),
+]
+EXTRA_SERVICES = [
+    ("telnet", "Linux telnetd", None, 23),
+    ("smtp", "Postfix smtpd", None, 25),
+    ("domain", "ISC BIND", "9.16.1", 53),
+    ("rpcbind", "rpcbind", "2-4", 111),
+    ("msrpc", "Microsoft Windows RPC", None, 135),
+    ("netbios-ssn", "Samba smbd", "3.X - 4.X", 139),
+    ("imap", "Dovecot imapd", None, 143),
+    ("ldap", "OpenLDAP", "2.2.X - 2.3.X", 389),
+    ("postgresql", "PostgreSQL DB", "9.6.0 or later", 5432),
+    ("vnc", "VNC", "protocol 3.8", 5900),
+    ("redis", "Redis key-value store", "6.0.16", 6379),
+    ("http-proxy", "Apache Tomcat", "9.0.31", 8080),
+    ("elasticsearch", "Elasticsearch REST API", "7.10.2", 9200),
+    ("mongodb", "MongoDB", "4.4.6", 27017),
+]
+OS_MATCHES = [
+    "Linux 5.0 - 6.2",
+    "Linux 4.15 - 5.8",
+    "Microsoft Windows Server 2019",
+    "Microsoft Windows 10 1909 - 21H2",
+    "FreeBSD 13.0-RELEASE",
+    "Cisco IOS 15.X",
+    "OpenWrt 21.02 (Linux 5.4)",
+    "VMware ESXi 7.0",
+]
+PORT_DISTRIBUTIONS = ("fixed", "geometric")
+
+
+def _random_cve(rng: random.Random) -> str:
+    return f"CVE-{rng.randint(2015, 2025)}-{rng.randint(1000, 99999)}"
+
+
+def _vulners_script(
+    rng: random.Random, product: str, version: str | None, cves: int, pool: list[str] | None = None
+) -> str:
+    cpe = f"cpe:/a:{product.lower().replace(' ', '_')}:{version or 'unknown'}"
+    lines = [f"\n  {cpe}: "]
+    tables = []
+    for _ in range(cves):
+        cve_id = rng.choice(pool) if pool else _random_cve(rng)
+        cvss = f"{rng.uniform(2.0, 10.0):.1f}"
+        lines.append(f"\n    \t{cve_id}\t{cvss}\thttps://vulners.com/cve/{cve_id}")
+        tables.append(
+            "<table>\n"
+            '<elem key="type">cve</elem>\n'
+            f'<elem key="cvss">{cvss}</elem>\n'
+            f'<elem key="id">{cve_id}</elem>\n'
+            '<elem key="is_exploit">false</elem>\n'
+            "</table>\n"
+        )
+    return (
+        f'<script id="vulners" output={quoteattr("".join(lines))}>'
+        f'<table key="{cpe}">\n{"".join(tables)}</table>\n</script>'
+    )
+
+
+def _port_count(rng: random.Random, ports: int, distribution: str, available: int) -> int:
+    if distribution == "fixed" or ports <= 1:
+        return min(ports, available)
+    # Loi géométrique de moyenne ``ports`` (au moins un port ouvert).
+    return min(available, 1 + int(rng.expovariate(1 / (ports - 1))))
+
+
+def _os_block(rng: random.Random, matches: int) -> str:
+    if not matches:
+        return '<os><osmatch name="Linux 5.0 - 6.2" accuracy="98" line="71749"/></os>\n'
+    names = rng.sample(OS_MATCHES, k=min(matches, len(OS_MATCHES)))
+    accuracy = rng.randint(90, 100)
+    entries = []
+    for rank, name in enumerate(names):
+        entries.append(f'<osmatch name="{name}" accuracy="{max(accuracy - rank * 3, 50)}" line="{71749 + rank}"/>')
+    return f"<os>{''.join(entries)}</os>\n"
+
+
+def _write_host(
+    fh: TextIO,
+    rng: random.Random,
+    index: int,
+    *,
+    ports: int,
+    cves: int,
+    pool: list[str] | None = None,
+    port_distribution: str = "fixed",
+    script_density: float = 1.0,
+    os_matches: int = 0,
+) -> None:
+    address = f"10.{(index >> 16) & 255}.{(index >> 8) & 255}.{index & 255}"
+    catalog = SERVICES if port_distribution == "fixed" else SERVICES + EXTRA_SERVICES
+    fh.write('<host starttime="1764525400" endtime="1764525460"><status state="up" reason="echo-reply"/>\n')
+    fh.write(f'<address addr="{address}" addrtype="ipv4"/>\n')
+    fh.write(f'<hostnames><hostname name="host-{index}.lab" type="PTR"/></hostnames>\n<ports>')
+    for name, product, version, portid in rng.sample(
+        catalog, k=_port_count(rng, ports, port_distribution, len(catalog))
+    ):
+        state = "open" if rng.random() > 0.1 else "filtered"
+        version_attr = f' version="{version}"' if version else ""
+        fh.write(
+            f'<port protocol="tcp" portid="{portid}"><state state="{state}" reason="syn-ack"/>'
+            f'<service name="{name}" product="{product}"{version_attr} method="probed" conf="10"/>'
+        )
+        if name in {"http", "https"} and rng.random() < 0.2:
+            fh.write('<script id="http-title" output="Admin Login Panel"><elem key="title">Admin Login Panel</elem></script>')
+        if name == "ftp" and rng.random() < 0.3:
+            fh.write('<script id="ftp-anon" output="Anonymous FTP login allowed (FTP code 230)"/>')
+        if cves and (script_density >= 1.0 or rng.random() < script_density):
+            fh.write(_vulners_script(rng, product, version, rng.randint(0, cves), pool))
+        fh.write("</port>\n")
+    fh.write("</ports>\n")
+    fh.write(_os_block(rng, os_matches))
+    fh.write('<hostscript><script id="clock-skew" output="mean: 0s, deviation: 0s, median: 0s"/></hostscript>\n')
+    fh.write("</host>\n")
+
+
+def write_synthetic_scan(
+    path: Path,
+    *,
+    hosts: int,
+    ports: int = 4,
+    cves: int = 6,
+    seed: int = 42,
+    cve_pool: int | None = None,
+    port_distribution: str = "fixed",
+    script_density: float = 1.0,
+    os_matches: int = 0,
+    args: str = "nmap -sV --script vulners -iL targets.txt",
+) -> Path:
+    """Écrit un scan de ``hosts`` hôtes avec ~``ports`` ports et jusqu'à ``cves`` CVE par port.
+
+    Avec ``cve_pool``, les CVE sont tirées parmi ``cve_pool`` identifiants communs à
+    tout le parc (comme des hôtes partageant les mêmes versions logicielles).
+    Les valeurs par défaut des autres options reproduisent l'ancien générateur.
+    ``args`` est la ligne de commande Nmap enregistrée dans ``<nmaprun>``.
+    """
+
+    if port_distribution not in PORT_DISTRIBUTIONS:
+        raise ValueError(f"Distribution de ports inconnue : {port_distribution}")
+
+    rng = random.Random(seed)
+    pool = [_random_cve(rng) for _ in range(cve_pool)] if cve_pool else None
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as fh:
+        fh.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        fh.write(
+            f'<nmaprun scanner="nmap" args={quoteattr(args)} '
+            'start="1764525399" version="7.95" xmloutputversion="1.05">\n'
+        )
+        fh.write('<scaninfo type="syn" protocol="tcp" numservices="1024" services="1-1024"/>\n')
+        for index in range(hosts):
+            _write_host(
+                fh,
+                rng,
+                index,
+                ports=ports,
+                cves=cves,
+                pool=pool,
+                port_distribution=port_distribution,
+                script_density=script_density,
+                os_matches=os_matches,
+            )
+        fh.write(
+            f'<runstats><finished time="1764526109" elapsed="710.49" exit="success"/>'
+            f'<hosts up="{hosts}" down="0" total="{hosts}"/></runstats>\n</nmaprun>\n'
+        )
+    return path
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="Génère un rapport XML Nmap synthétique")
+    parser.add_argument("output", type=Path)
+    parser.add_argument("--hosts", type=int, default=1000)
+    parser.add_argument("--ports", type=int, default=4, help="Ports par hôte (moyenne si geometric)")
+    parser.add_argument("--port-distribution", choices=PORT_DISTRIBUTIONS, default="fixed")
+    parser.add_argument("--cves", type=int, default=6, help="CVE max par port (script vulners)")
+    parser.add_argument("--cve-pool", type=int, default=None, help="Nombre de CVE distinctes dans le parc")
+    parser.add_argument("--script-density", type=float, default=1.0, help="Part des ports avec une table vulners")
+    parser.add_argument("--os-matches", type=int, default=0, help="osmatch par hôte (0 = un Linux fixe)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+    write_synthetic_scan(
+        args.output,
+        hosts=args.hosts,
+        ports=args.ports,
+        cves=args.cves,
+        seed=args.seed,
+        cve_pool=args.cve_pool,
+        port_distribution=args.port_distribution,
+        script_density=args.script_density,
+        os_matches=args.os_matches,
+    )
+    print(f"[OK] {args.hosts} hôtes écrits dans {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
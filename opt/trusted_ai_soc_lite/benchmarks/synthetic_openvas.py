@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Génère un export XML OpenVAS/GVM (get_reports_response) synthétique pour les benchmarks."""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+from pathlib import Path
+from typing import TextIO
+from xml.sax.saxutils import escape
+
+NVTS = [
+    ("1.3.6.1.4.1.25623.1.0.108440", "SSL/TLS: Deprecated TLSv1.0 and TLSv1.1 Protocol Detection", "443/tcp"),
+    ("1.3.6.1.4.1.25623.1.0.900498", "Apache HTTP Server Multiple Vulnerabilities", "80/tcp"),
+    ("1.3.6.1.4.1.25623.1.0.900600", "Anonymous FTP Login Reporting", "21/tcp"),
+    ("1.3.6.1.4.1.25623.1.0.150712", "MySQL / MariaDB Multiple Vulnerabilities", "3306/tcp"),
+    ("1.3.6.1.4.1.25623.1.0.108477", "OpenSSH Information Disclosure Vulnerability", "22/tcp"),
+    ("1.3.6.1.4.1.25623.1.0.105777", "OS End Of Life Detection", "general/tcp"),
+]
+# Texte « description » volumineux comme dans les vrais exports (c'est lui qui gonfle les rapports).
+FILLER = escape("Vulnerability insight: " + "the remote service is affected by an issue. " * 20)
+
+
+def _write_result(fh: TextIO, rng: random.Random, address: str, index: int, *, cves: int) -> None:
+    oid, name, port = rng.choice(NVTS)
+    severity = rng.choice([0.0, rng.uniform(2.0, 10.0)])
+    threat = "Log" if severity == 0 else ("High" if severity >= 7 else "Medium")
+    refs = "".join(
+        f'<ref type="cve" id="CVE-{rng.randint(2015, 2025)}-{rng.randint(1000, 99999)}"/>'
+        for _ in range(rng.randint(0, cves))
+    )
+    fh.write(
+        f'<result id="r-{index}"><name>{escape(name)}</name><owner><name>admin</name></owner>'
+        f"<host>{address}<asset asset_id=\"\"/><hostname>host-{address}.lab</hostname></host>"
+        f"<port>{port}</port>"
+        f'<nvt oid="{oid}"><type>nvt</type><name>{escape(name)}</name><family>General</family>'
+        f"<cvss_base>{severity:.1f}</cvss_base><tags>summary={FILLER}</tags>"
+        f"<refs>{refs}<ref type=\"url\" id=\"https://example.invalid/{oid}\"/></refs></nvt>"
+        f"<threat>{threat}</threat><severity>{severity:.1f}</severity>"
+        f"<qod><value>80</value><type>remote_banner</type></qod>"
+        f"<description>{FILLER}</description></result>\n"
+    )
+
+
+def write_synthetic_openvas(
+    path: Path, *, hosts: int, results: int = 8, cves: int = 4, seed: int = 42
+) -> Path:
+    """Écrit un rapport de ``hosts`` hôtes et ~``results`` résultats NVT par hôte (triés par sévérité)."""
+
+    rng = random.Random(seed)
+    addresses = [f"10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}" for i in range(hosts)]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as fh:
+        fh.write('<get_reports_response status="200" status_text="OK">\n')
+        fh.write('<report id="synthetic" format_id="a994b278-1f62-11e1-96ac-406186ea4fc5" extension="xml">\n')
+        fh.write('<task id="t-1"><name>TRUSTED-AI-SOC-synthetic</name></task>\n<report id="synthetic">\n')
+        fh.write("<scan_run_status>Done</scan_run_status>\n")
+        fh.write(f"<hosts><count>{hosts}</count></hosts>\n<scan_start>2025-11-28T20:00:00Z</scan_start>\n")
+        # GVM trie par sévérité : les résultats d'un même hôte sont dispersés dans le rapport.
+        fh.write('<results start="1" max="-1">\n')
+        for index in range(hosts * results):
+            _write_result(fh, rng, rng.choice(addresses), index, cves=cves)
+        fh.write("</results>\n")
+        for address in addresses:
+            fh.write(
+                f"<host><ip>{address}</ip><start>2025-11-28T20:00:05Z</start>"
+                "<detail><name>best_os_txt</name><value>Linux Kernel</value></detail></host>\n"
+            )
+        fh.write("<scan_end>2025-11-28T21:30:00Z</scan_end>\n</report>\n</report>\n</get_reports_response>\n")
+    return path
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="Génère un rapport XML OpenVAS synthétique")
+    parser.add_argument("output", type=Path)
+    parser.add_argument("--hosts", type=int, default=1000)
+    parser.add_argument("--results", type=int, default=8, help="Résultats NVT par hôte (moyenne)")
+    parser.add_argument("--cves", type=int, default=4, help="CVE max par résultat")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+    write_synthetic_openvas(args.output, hosts=args.hosts, results=args.results, cves=args.cves, seed=args.seed)
+    print(f"[OK] {args.hosts} hôtes écrits dans {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
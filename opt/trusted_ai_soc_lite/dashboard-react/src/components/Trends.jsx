@@ -6,16 +6,20 @@ function formatDateLabel(ts) {
   return ts.split('T')[0];
 }
 
-export function Trends({ history }) {
-  const data = history
-    .map((item) => ({ ...item, risk_score: Number(item.risk_score) || 0 }))
-    .sort((a, b) => new Date(a.timestamp) - new Date(b.timestamp));
+export function Trends({ history, rollups, granularity = 'day' }) {
+  // Prefer the periods pre-aggregated by history_store.py over the raw scan list.
+  const periods = rollups?.[granularity];
+  const data = Array.isArray(periods) && periods.length
+    ? periods.map((item) => ({ timestamp: item.period, risk_score: Number(item.average_score) || 0 }))
+    : history
+        .map((item) => ({ ...item, risk_score: Number(item.risk_score) || 0 }))
+        .sort((a, b) => new Date(a.timestamp) - new Date(b.timestamp));
 
   return (
     <div className="card">
       <div className="section-title">
         <h3 style={{ margin: 0 }}>Risk timeline</h3>
-        <small>Risk score per scan</small>
+        <small>{Array.isArray(periods) && periods.length ? `Average risk score per ${granularity}` : 'Risk score per scan'}</small>
       </div>
       {data.length === 0 ? (
         <small style={{ color: '#94a3b8' }}>No history yet</small>
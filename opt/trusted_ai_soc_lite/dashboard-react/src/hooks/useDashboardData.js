@@ -7,6 +7,7 @@ const SOURCES = {
   ia: '/data/ia_decisions.json',
   responses: '/data/response_actions.json',
   history: '/data/scan_history.json',
+  rollups: '/data/scan_history_rollups.json',
 };
 
 async function fetchJson(path) {
@@ -68,6 +69,7 @@ export function useDashboardData() {
   const [iaDecisions, setIaDecisions] = useState([]);
   const [responses, setResponses] = useState([]);
   const [history, setHistory] = useState([]);
+  const [rollups, setRollups] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [usingSamples, setUsingSamples] = useState(false);
@@ -78,7 +80,7 @@ export function useDashboardData() {
       setLoading(true);
       let usedSamples = false;
       try {
-        const [ia, resp, hist] = await Promise.all([
+        const [ia, resp, hist, roll] = await Promise.all([
           fetchJson(SOURCES.ia).catch(() => {
             usedSamples = true;
             return sampleIa;
@@ -91,11 +93,14 @@ export function useDashboardData() {
             usedSamples = true;
             return sampleHistory;
           }),
+          // Optional: pre-aggregated hour/day/week periods exported by history_store.py.
+          fetchJson(SOURCES.rollups).catch(() => null),
         ]);
         if (!cancelled) {
           setIaDecisions(Array.isArray(ia) ? ia : []);
           setResponses(Array.isArray(resp) ? resp : []);
           setHistory(Array.isArray(hist) ? hist : []);
+          setRollups(roll && typeof roll === 'object' ? roll : null);
           setUsingSamples(usedSamples);
         }
       } catch (err) {
@@ -130,6 +135,7 @@ export function useDashboardData() {
     iaDecisions,
     responses,
     history,
+    rollups,
     aggregates,
     scanOptions,
     loading,
@@ -26,6 +26,26 @@ ROOT=${SOURCE_ROOT:-"$(dirname "$SCRIPT_DIR")"}
 DEST="$SCRIPT_DIR/public/data"
 mkdir -p "$DEST"
 
+# Les audits IA/réponse et l'historique des scans sont des journaux segmentés
+# (ai_engine/audit_store.py, history_store.py) : on régénère leurs JSON avant la copie.
+export_audits() {
+  local python_bin="$ROOT/ai_engine/venv/bin/python"
+  [[ -x "$python_bin" ]] || python_bin=$(command -v python3 || true)
+  if [[ -z "$python_bin" ]]; then
+    echo "[WARN] python3 introuvable, export des journaux d'audit ignoré" >&2
+    return
+  fi
+  if [[ $DRY_RUN -eq 1 ]]; then
+    echo "[DRY-RUN] Would export audit logs with $python_bin"
+  else
+    "$python_bin" "$ROOT/ai_engine/audit_store.py" export \
+      "$ROOT/audit/ia_decisions.json" "$ROOT/audit/response_actions.json"
+    "$python_bin" "$ROOT/ai_engine/history_store.py" export "$ROOT/audit/scan_history.json"
+  fi
+}
+
+export_audits
+
 copy_or_seed() {
   local src="$1"; shift
   local dest="$1"; shift
@@ -48,5 +68,13 @@ copy_or_seed() {
 copy_or_seed "$ROOT/audit/ia_decisions.json" "$DEST/ia_decisions.json" "$SCRIPT_DIR/src/sample/ia_decisions.sample.json"
 copy_or_seed "$ROOT/audit/response_actions.json" "$DEST/response_actions.json" "$SCRIPT_DIR/src/sample/response_actions.sample.json"
 copy_or_seed "$ROOT/audit/scan_history.json" "$DEST/scan_history.json" "$SCRIPT_DIR/src/sample/scan_history.sample.json"
+# Agrégats horaires/journaliers/hebdomadaires (facultatifs : sinon Trends agrège l'historique brut).
+if [[ -s "$ROOT/audit/scan_history_rollups.json" ]]; then
+  if [[ $DRY_RUN -eq 1 ]]; then
+    echo "[DRY-RUN] Would copy $ROOT/audit/scan_history_rollups.json -> $DEST/scan_history_rollups.json"
+  else
+    cp "$ROOT/audit/scan_history_rollups.json" "$DEST/scan_history_rollups.json"
+  fi
+fi
 
 echo "[OK] Dashboard data synced to $DEST"
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""Convertit un rapport déjà produit entre les formats json, jsonl et msgpack."""
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+from parse_nmap import OUTPUT_SUFFIXES, iter_report_records, write_json_report, write_records
+
+SUFFIX_FORMATS = {suffix: fmt for fmt, suffix in OUTPUT_SUFFIXES.items()}
+
+
+def convert_report(source: Path, destination: Path, fmt: str | None = None) -> None:
+    fmt = fmt or SUFFIX_FORMATS.get(destination.suffix)
+    if fmt is None:
+        raise SystemExit(f"Format de sortie inconnu pour {destination} (utilisez --format)")
+    records = iter_report_records(source)
+    if fmt == "json":
+        write_json_report(records, destination)
+    else:
+        write_records(records, destination, fmt)
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("source", type=Path, help="Rapport .json, .jsonl ou .msgpack")
+    parser.add_argument("destination", type=Path, help="Fichier de sortie")
+    parser.add_argument("--format", choices=sorted(OUTPUT_SUFFIXES), help="Déduit du suffixe par défaut")
+    args = parser.parse_args(argv)
+    convert_report(args.source, args.destination, args.format)
+    before = args.source.stat().st_size
+    after = args.destination.stat().st_size
+    print(f"[OK] {args.source.name} ({before:,} o) → {args.destination.name} ({after:,} o)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
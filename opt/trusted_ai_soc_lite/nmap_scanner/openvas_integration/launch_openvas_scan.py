@@ -58,8 +58,13 @@ def run_task(gmp: Gmp, task_id: str) -> str:
 
 def export_report(gmp: Gmp, report_id: str, output: Path) -> None:
     resp = gmp.get_report(report_id=report_id, report_format_id="a994b278-1f62-11e1-96ac-406186ea4fc5")
-    xml_data = ET.fromstring(resp)
-    output.write_text(ET.tostring(xml_data, encoding="unicode"))
+    # La réponse GMP est déjà du XML : on l'écrit telle quelle, sans la recharger
+    # en DOM (les rapports complets dépassent facilement plusieurs Go).
+    output.parent.mkdir(parents=True, exist_ok=True)
+    if isinstance(resp, bytes):
+        output.write_bytes(resp)
+    else:
+        output.write_text(resp, encoding="utf-8")
 
 
 def main(argv: list[str]) -> int:
@@ -87,6 +92,7 @@ def main(argv: list[str]) -> int:
         report_id = run_task(gmp, task_id)
         export_report(gmp, report_id, args.output)
         print(f"[OK] Rapport OpenVAS exporté vers {args.output}")
+        print(f"[INFO] Conversion pour l'IA : python3 ../parse_openvas.py {args.output}")
     return 0
 
 
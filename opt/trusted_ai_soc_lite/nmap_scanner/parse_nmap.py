@@ -2,12 +2,29 @@
 """Convertit un rapport XML Nmap en JSON lisible par l'IA."""
 from __future__ import annotations
 
+import argparse
+import hashlib
 import json
+import os
+import struct
 import sys
+import time
 import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import UTC, datetime
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable, Iterator
+
+try:  # pragma: no cover - dépendance optionnelle (format binaire compact)
+    import msgpack  # type: ignore
+except ModuleNotFoundError:  # pragma: no cover
+    msgpack = None  # type: ignore
+
+# Format binaire : en-tête magique puis enregistrements [longueur uint32 BE][msgpack].
+RECORD_MAGIC = b"SOCREC1\n"
+OUTPUT_SUFFIXES = {"json": ".json", "jsonl": ".jsonl", "msgpack": ".msgpack"}
+# Racines des exports GMP, convertis par parse_openvas.py en mode --batch.
+OPENVAS_ROOT_TAGS = {"get_reports_response", "report"}
 
 
 def parse_table(table_elem: ET.Element) -> dict[str, Any]:
@@ -105,28 +122,42 @@ def parse_host(host_elem: ET.Element) -> dict:
     }
 
 
+def _format_start(start_attr: str | None) -> str | None:
+    if start_attr is None:
+        return None
+    return datetime.fromtimestamp(int(start_attr), tz=UTC).isoformat().replace("+00:00", "Z")
+
+
+def _scan_header(root_attrib: dict[str, str], scan_info: ET.Element | None) -> dict[str, Any]:
+    return {
+        "scanner": root_attrib.get("scanner"),
+        "args": root_attrib.get("args"),
+        "start": _format_start(root_attrib.get("start")),
+        "scan_type": scan_info.attrib.get("type") if scan_info is not None else None,
+    }
+
+
+def _scan_trailer(run_stats: ET.Element | None) -> dict[str, Any]:
+    return {
+        "elapsed": float(run_stats.attrib.get("elapsed", 0)) if run_stats is not None else None,
+        "hosts_up": int(run_stats.attrib.get("hosts_up", 0)) if run_stats is not None else None,
+        "hosts_total": int(run_stats.attrib.get("hosts_total", 0)) if run_stats is not None else None,
+    }
+
+
 def convert(xml_path: Path, json_path: Path) -> None:
     tree = ET.parse(xml_path)
     root = tree.getroot()
-    run_stats = root.find("runstats/finished")
-    scan_info = root.find("scaninfo")
-
-    start_attr = root.attrib.get("start")
-    start_dt = (
-        datetime.fromtimestamp(int(start_attr), tz=UTC).isoformat().replace("+00:00", "Z")
-        if start_attr is not None
-        else None
-    )
+    header = _scan_header(root.attrib, root.find("scaninfo"))
+    trailer = _scan_trailer(root.find("runstats/finished"))
 
     payload = {
         "metadata": {
-            "scanner": root.attrib.get("scanner"),
-            "args": root.attrib.get("args"),
-            "start": start_dt,
-            "elapsed": float(run_stats.attrib.get("elapsed", 0)) if run_stats is not None else None,
-            "hosts_up": int(run_stats.attrib.get("hosts_up", 0)) if run_stats is not None else None,
-            "hosts_total": int(run_stats.attrib.get("hosts_total", 0)) if run_stats is not None else None,
-            "scan_type": scan_info.attrib.get("type") if scan_info is not None else None,
+            "scanner": header["scanner"],
+            "args": header["args"],
+            "start": header["start"],
+            **trailer,
+            "scan_type": header["scan_type"],
         },
         "hosts": [parse_host(host) for host in root.findall("host")],
     }
@@ -135,17 +166,309 @@ def convert(xml_path: Path, json_path: Path) -> None:
     json_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
 
 
-def main(argv: list[str]) -> None:
-    if len(argv) not in {2, 3}:
-        raise SystemExit(f"Usage: {argv[0]} <scan.xml> [scan.json]")
+def iter_scan_records(xml_path: Path) -> Iterator[dict[str, Any]]:
+    """Parcourt le XML en flux et produit les enregistrements header/host/trailer.
+
+    Chaque ``<host>`` est converti dès sa fermeture puis libéré, de sorte que la
+    mémoire reste constante quelle que soit la taille du scan.
+    """
+
+    root: ET.Element | None = None
+    root_attrib: dict[str, str] = {}
+    scan_info: ET.Element | None = None
+    header_sent = False
+
+    for event, elem in ET.iterparse(xml_path, events=("start", "end")):
+        if event == "start":
+            if root is None:
+                root = elem
+                root_attrib = dict(elem.attrib)
+            continue
+        if elem.tag == "scaninfo" and scan_info is None:
+            scan_info = elem
+        elif elem.tag == "host":
+            if not header_sent:
+                yield {"record": "header", "metadata": _scan_header(root_attrib, scan_info)}
+                header_sent = True
+            yield {"record": "host", "host": parse_host(elem)}
+            # Vide la racine : l'hôte traité et les éléments annexes (hosthint…)
+            # ne restent pas en mémoire.
+            if root is not None:
+                root.clear()
+        elif elem.tag == "finished":
+            if not header_sent:
+                yield {"record": "header", "metadata": _scan_header(root_attrib, scan_info)}
+                header_sent = True
+            yield {"record": "trailer", "metadata": _scan_trailer(elem)}
+
+    if not header_sent:
+        yield {"record": "header", "metadata": _scan_header(root_attrib, scan_info)}
+
+
+def ensure_msgpack_available() -> None:
+    if msgpack is None:
+        raise SystemExit(
+            "msgpack n'est pas installé.\n"
+            "Installez-le via `pip install msgpack` ou utilisez --format json/jsonl."
+        )
+
+
+def write_records(records: Iterable[dict[str, Any]], output_path: Path, fmt: str) -> None:
+    """Écrit des enregistrements header/host/trailer en JSON Lines ou msgpack encadré."""
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    if fmt == "msgpack":
+        ensure_msgpack_available()
+        with output_path.open("wb") as fh:
+            fh.write(RECORD_MAGIC)
+            for record in records:
+                body = msgpack.packb(record, use_bin_type=True)
+                fh.write(struct.pack(">I", len(body)))
+                fh.write(body)
+        return
+    with output_path.open("w", encoding="utf-8") as fh:
+        for record in records:
+            fh.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def iter_report_records(report_path: Path) -> Iterator[dict[str, Any]]:
+    """Relit un rapport (.json, .jsonl ou .msgpack) sous forme d'enregistrements."""
+
+    if report_path.suffix == ".msgpack":
+        ensure_msgpack_available()
+        with report_path.open("rb") as fh:
+            if fh.read(len(RECORD_MAGIC)) != RECORD_MAGIC:
+                raise ValueError(f"{report_path} n'est pas un rapport msgpack TRUSTED AI SOC")
+            while header := fh.read(4):
+                (length,) = struct.unpack(">I", header)
+                yield msgpack.unpackb(fh.read(length), raw=False)
+    elif report_path.suffix == ".jsonl":
+        with report_path.open(encoding="utf-8") as fh:
+            for line in fh:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        payload = json.loads(report_path.read_text(encoding="utf-8"))
+        metadata = payload.get("metadata") or {}
+        trailer_keys = {"elapsed", "hosts_up", "hosts_total"}
+        yield {"record": "header", "metadata": {k: v for k, v in metadata.items() if k not in trailer_keys}}
+        for host in payload.get("hosts", []):
+            yield {"record": "host", "host": host}
+        yield {"record": "trailer", "metadata": {k: v for k, v in metadata.items() if k in trailer_keys}}
+
+
+def write_json_report(records: Iterable[dict[str, Any]], json_path: Path) -> None:
+    """Reconstitue le JSON indenté historique à partir d'enregistrements."""
+
+    header: dict[str, Any] = {}
+    trailer: dict[str, Any] = {}
+    hosts: list[dict[str, Any]] = []
+    for record in records:
+        kind = record.get("record")
+        if kind == "host":
+            hosts.append(record.get("host") or {})
+        elif kind == "header":
+            header = record.get("metadata") or {}
+        elif kind == "trailer":
+            trailer = record.get("metadata") or {}
+    payload = {
+        "metadata": {
+            "scanner": header.get("scanner"),
+            "args": header.get("args"),
+            "start": header.get("start"),
+            "elapsed": trailer.get("elapsed"),
+            "hosts_up": trailer.get("hosts_up"),
+            "hosts_total": trailer.get("hosts_total"),
+            "scan_type": header.get("scan_type"),
+        },
+        "hosts": hosts,
+    }
+    json_path.parent.mkdir(parents=True, exist_ok=True)
+    json_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+
 
-    xml_path = Path(argv[1])
-    if len(argv) == 3:
-        json_path = Path(argv[2])
+def convert_stream(xml_path: Path, output_path: Path, fmt: str = "jsonl") -> None:
+    """Variante streaming de :func:`convert` : un enregistrement par hôte (JSON Lines ou msgpack)."""
+
+    write_records(iter_scan_records(xml_path), output_path, fmt)
+
+
+def convert_to(xml_path: Path, output_path: Path, fmt: str) -> None:
+    if fmt == "json":
+        convert(xml_path, output_path)
+    else:
+        convert_stream(xml_path, output_path, fmt)
+
+
+MANIFEST_NAME = ".parse_manifest.json"
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def root_tag(xml_path: Path) -> str | None:
+    """Retourne la balise racine sans charger le document."""
+
+    try:
+        for _, elem in ET.iterparse(xml_path, events=("start",)):
+            return elem.tag
+    except ET.ParseError:
+        return None
+    return None
+
+
+def load_manifest(path: Path) -> dict[str, dict[str, Any]]:
+    if not path.exists():
+        return {}
+    try:
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+    except json.JSONDecodeError:
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+
+def save_manifest(path: Path, manifest: dict[str, dict[str, Any]]) -> None:
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def _convert_one(xml_path: Path, output_path: Path, fmt: str, source: str = "nmap") -> tuple[float, str, int]:
+    """Retourne durée, SHA-256 et ``st_mtime_ns`` du XML, relevé avant le hachage.
+
+    Un XML modifié pendant la conversion garde ainsi un mtime antérieur dans le
+    manifeste et sera revérifié au passage suivant.
+    """
+
+    start = time.perf_counter()
+    mtime_ns = xml_path.stat().st_mtime_ns
+    sha256 = file_sha256(xml_path)
+    if source == "openvas":
+        from parse_openvas import convert_openvas
+
+        convert_openvas(xml_path, output_path, fmt)
     else:
-        json_path = xml_path.with_suffix(".json")
+        convert_to(xml_path, output_path, fmt)
+    return time.perf_counter() - start, sha256, mtime_ns
+
+
+def convert_directory(
+    directory: Path,
+    *,
+    fmt: str = "json",
+    workers: int | None = None,
+    force: bool = False,
+) -> dict[str, int]:
+    """Convertit tous les XML Nmap (et OpenVAS) d'un dossier en parallèle.
+
+    Un manifeste (mtime + SHA-256 par fichier) permet de sauter les rapports dont
+    la sortie JSON est déjà à jour.
+    """
+
+    manifest_path = directory / MANIFEST_NAME
+    manifest = load_manifest(manifest_path)
+    suffix = OUTPUT_SUFFIXES[fmt]
+    stats = {"converted": 0, "skipped": 0, "failed": 0}
+    pending: list[tuple[Path, Path, str]] = []
 
-    convert(xml_path, json_path)
+    for xml_path in sorted(directory.glob("*.xml")):
+        output_path = xml_path.with_suffix(suffix)
+        mtime_ns = xml_path.stat().st_mtime_ns
+        entry = manifest.get(xml_path.name)
+        if not force and entry and entry.get("output") == output_path.name and output_path.exists():
+            if entry.get("mtime_ns") == mtime_ns:
+                stats["skipped"] += 1
+                continue
+            # mtime modifié (copie, rsync…) : le contenu fait foi.
+            if entry.get("sha256") == file_sha256(xml_path):
+                entry["mtime_ns"] = mtime_ns
+                stats["skipped"] += 1
+                continue
+        tag = root_tag(xml_path)
+        if tag == "nmaprun":
+            source = "nmap"
+        elif tag in OPENVAS_ROOT_TAGS:
+            source = "openvas"
+        else:
+            print(f"[INFO] {xml_path.name} ignoré (ni Nmap ni OpenVAS)")
+            stats["skipped"] += 1
+            continue
+        pending.append((xml_path, output_path, source))
+
+    batch_start = time.perf_counter()
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(_convert_one, xml_path, output_path, fmt, source): (xml_path, output_path)
+                for xml_path, output_path, source in pending
+            }
+            for future in as_completed(futures):
+                xml_path, output_path = futures[future]
+                try:
+                    elapsed, sha256, mtime_ns = future.result()
+                except (ET.ParseError, OSError, ValueError) as exc:
+                    print(f"[ERREUR] {xml_path.name} : {exc}", file=sys.stderr)
+                    stats["failed"] += 1
+                    continue
+                manifest[xml_path.name] = {
+                    "mtime_ns": mtime_ns,
+                    "sha256": sha256,
+                    "output": output_path.name,
+                    "seconds": round(elapsed, 3),
+                }
+                stats["converted"] += 1
+                print(f"[OK] {xml_path.name} → {output_path.name} ({elapsed:.2f}s)")
+
+    save_manifest(manifest_path, manifest)
+    print(
+        f"[INFO] {stats['converted']} converti(s), {stats['skipped']} à jour/ignoré(s), "
+        f"{stats['failed']} en échec en {time.perf_counter() - batch_start:.2f}s"
+    )
+    return stats
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Convertit un rapport XML Nmap en JSON")
+    parser.add_argument("xml", type=Path, help="Rapport XML produit par nmap -oX (ou dossier avec --batch)")
+    parser.add_argument("output", type=Path, nargs="?", help="Fichier de sortie (défaut: même nom)")
+    parser.add_argument(
+        "--format",
+        choices=sorted(OUTPUT_SUFFIXES),
+        default="json",
+        help="json (indenté), jsonl (streaming, un hôte par ligne) ou msgpack (binaire compact)",
+    )
+    parser.add_argument(
+        "--jsonl",
+        dest="format",
+        action="store_const",
+        const="jsonl",
+        help="Raccourci pour --format jsonl",
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Convertit tous les XML du dossier en parallèle (sorties à jour ignorées)",
+    )
+    parser.add_argument("--workers", type=int, default=None, help="Processus parallèles (défaut: nb de CPU)")
+    parser.add_argument("--force", action="store_true", help="Avec --batch : reconvertit même les sorties à jour")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str]) -> None:
+    args = parse_args(argv[1:])
+    if args.format == "msgpack":
+        ensure_msgpack_available()
+    if args.batch:
+        stats = convert_directory(args.xml, fmt=args.format, workers=args.workers, force=args.force)
+        if stats["failed"]:
+            raise SystemExit(1)
+    else:
+        convert_to(args.xml, args.output or args.xml.with_suffix(OUTPUT_SUFFIXES[args.format]), args.format)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""Convertit un rapport XML OpenVAS/GVM vers le schéma hôtes/services/scripts de parse_nmap.
+
+Le rapport est lu en flux (``iterparse``) : chaque ``<result>`` est réduit à un
+enregistrement compact (NVT, CVE, CVSS) puis retiré de l'arbre. Seuls ces
+résumés sont gardés en mémoire, regroupés par hôte, le temps de lire les
+détails hôte (nom, OS) publiés en fin de rapport.
+"""
+from __future__ import annotations
+
+import argparse
+import socket
+import sys
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterator
+
+from parse_nmap import OUTPUT_SUFFIXES, ensure_msgpack_available, write_json_report, write_records
+
+
+def _service_name(portid: str, protocol: str) -> str | None:
+    try:
+        return socket.getservbyport(int(portid), protocol)
+    except (OSError, ValueError, OverflowError):
+        return None
+
+
+def _split_port(port_text: str) -> tuple[str | None, str | None]:
+    """``443/tcp`` → (``443``, ``tcp``) ; ``general/tcp`` ou ``package`` → (None, None)."""
+
+    portid, _, protocol = port_text.partition("/")
+    if not portid.isdigit() or not protocol:
+        return None, None
+    return portid, protocol
+
+
+def _parse_severity(value: str | None) -> float | None:
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+def _nvt_cves(nvt: ET.Element | None) -> list[str]:
+    if nvt is None:
+        return []
+    cves = [
+        ref.attrib["id"]
+        for ref in nvt.iterfind("refs/ref")
+        if ref.attrib.get("type") == "cve" and ref.attrib.get("id")
+    ]
+    # GMP < 8 : liste séparée par des virgules dans <cve> (« NOCVE » si vide).
+    legacy = (nvt.findtext("cve") or "").strip()
+    if legacy and legacy.upper() != "NOCVE":
+        cves.extend(part.strip() for part in legacy.split(",") if part.strip())
+    return list(dict.fromkeys(cves))
+
+
+def _result_script(result: ET.Element) -> dict[str, Any] | None:
+    nvt = result.find("nvt")
+    severity = _parse_severity(result.findtext("severity"))
+    if severity is None and nvt is not None:
+        severity = _parse_severity(nvt.findtext("cvss_base"))
+    if severity is not None and severity < 0:
+        # -1 = faux positif, -2 = erreur : rien à remonter à l'IA.
+        return None
+
+    name = (nvt.findtext("name") if nvt is not None else None) or result.findtext("name") or "OpenVAS"
+    threat = (result.findtext("threat") or "").strip() or None
+    output = name.strip()
+    if severity:
+        # « CVSS x.y » est reconnu par feature_engineering.CVSS_PATTERN.
+        output += f" (CVSS {severity:.1f}, {threat or 'n/a'})"
+    elements = [{"key": "cve", "value": cve} for cve in _nvt_cves(nvt)]
+    if threat:
+        elements.append({"key": "threat", "value": threat})
+    return {
+        "id": f"openvas:{nvt.attrib.get('oid') if nvt is not None else result.attrib.get('id')}",
+        "output": output,
+        "elements": elements,
+        "tables": [],
+    }
+
+
+class _HostAccumulator:
+    """Résumé compact d'un hôte OpenVAS au fil des résultats."""
+
+    __slots__ = ("address", "hostname", "os", "ports", "host_scripts", "seen")
+
+    def __init__(self, address: str) -> None:
+        self.address = address
+        self.hostname: str | None = None
+        self.os: str | None = None
+        self.ports: dict[str, list[dict[str, Any]]] = {}
+        self.host_scripts: list[dict[str, Any]] = []
+        self.seen: set[tuple[str, str]] = set()
+
+    def add_port(self, port_text: str) -> list[dict[str, Any]]:
+        portid, _ = _split_port(port_text)
+        if portid is None:
+            return self.host_scripts
+        return self.ports.setdefault(port_text, [])
+
+    def add_script(self, port_text: str, script: dict[str, Any]) -> None:
+        key = (port_text, script["id"])
+        if key in self.seen:
+            return
+        self.seen.add(key)
+        self.add_port(port_text).append(script)
+
+    def to_host(self) -> dict[str, Any]:
+        services = []
+        for port_text, scripts in self.ports.items():
+            portid, protocol = _split_port(port_text)
+            name = _service_name(portid, protocol)
+            services.append(
+                {
+                    "protocol": protocol,
+                    "portid": portid,
+                    "state": "open",
+                    "service": {"name": name, "product": None, "version": None} if name else None,
+                    "scripts": scripts,
+                }
+            )
+        return {
+            "address": self.address,
+            "hostname": self.hostname,
+            "status": "up",
+            "os": self.os,
+            "accuracy": None,
+            "services": services,
+            "scripts": self.host_scripts,
+        }
+
+
+def _elapsed(start: str | None, end: str | None) -> float | None:
+    if not start or not end:
+        return None
+    try:
+        begin = datetime.fromisoformat(start.replace("Z", "+00:00"))
+        finish = datetime.fromisoformat(end.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return (finish - begin).total_seconds()
+
+
+def iter_openvas_records(xml_path: Path) -> Iterator[dict[str, Any]]:
+    """Produit les enregistrements header/host/trailer d'un rapport OpenVAS."""
+
+    hosts: dict[str, _HostAccumulator] = {}
+    stack: list[ET.Element] = []
+    info: dict[str, str | None] = {"task": None, "scan_start": None, "scan_end": None, "hosts_total": None}
+
+    def host_for(address: str) -> _HostAccumulator:
+        if address not in hosts:
+            hosts[address] = _HostAccumulator(address)
+        return hosts[address]
+
+    for event, elem in ET.iterparse(xml_path, events=("start", "end")):
+        if event == "start":
+            stack.append(elem)
+            continue
+        stack.pop()
+        parent = stack[-1] if stack else None
+        parent_tag = parent.tag if parent is not None else None
+        tag = elem.tag
+
+        if tag == "result" and parent_tag == "results":
+            address = (elem.findtext("host") or "").strip()
+            if address:
+                acc = host_for(address)
+                hostname = (elem.findtext("host/hostname") or "").strip()
+                if hostname and acc.hostname is None:
+                    acc.hostname = hostname
+                script = _result_script(elem)
+                if script is not None:
+                    acc.add_script((elem.findtext("port") or "").strip(), script)
+        elif tag == "port" and parent_tag == "ports":
+            address = (elem.findtext("host") or "").strip()
+            if address:
+                host_for(address).add_port((elem.text or "").strip())
+        elif tag == "host" and parent_tag == "report":
+            address = (elem.findtext("ip") or "").strip()
+            if address:
+                acc = host_for(address)
+                for detail in elem.iterfind("detail"):
+                    name = detail.findtext("name")
+                    value = (detail.findtext("value") or "").strip() or None
+                    if name == "hostname" and value and acc.hostname is None:
+                        acc.hostname = value
+                    elif name == "best_os_txt" and value:
+                        acc.os = value
+        elif parent_tag == "report":
+            if tag == "task":
+                info["task"] = elem.findtext("name")
+            elif tag in {"scan_start", "scan_end"}:
+                info[tag] = (elem.text or "").strip() or None
+            elif tag == "hosts":
+                info["hosts_total"] = elem.findtext("count")
+        else:
+            continue
+
+        # Élément traité : on le détache pour que l'arbre ne grossisse pas.
+        if parent is not None:
+            parent.remove(elem)
+
+    yield {
+        "record": "header",
+        "metadata": {
+            "scanner": "openvas",
+            "args": f"openvas task={info['task']}" if info["task"] else None,
+            "start": info["scan_start"],
+            "scan_type": "openvas",
+        },
+    }
+    for acc in hosts.values():
+        yield {"record": "host", "host": acc.to_host()}
+    hosts_total = info["hosts_total"]
+    yield {
+        "record": "trailer",
+        "metadata": {
+            "elapsed": _elapsed(info["scan_start"], info["scan_end"]),
+            "hosts_up": len(hosts),
+            "hosts_total": int(hosts_total) if hosts_total and hosts_total.isdigit() else len(hosts),
+        },
+    }
+
+
+def convert_openvas(xml_path: Path, output_path: Path, fmt: str = "json") -> None:
+    records = iter_openvas_records(xml_path)
+    if fmt == "json":
+        write_json_report(records, output_path)
+    else:
+        write_records(records, output_path, fmt)
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Convertit un rapport XML OpenVAS/GVM en JSON pour l'IA")
+    parser.add_argument("xml", type=Path, help="Rapport XML exporté par launch_openvas_scan.py")
+    parser.add_argument("output", type=Path, nargs="?", help="Fichier de sortie (défaut: même nom)")
+    parser.add_argument("--format", choices=sorted(OUTPUT_SUFFIXES), default="json")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str]) -> int:
+    args = parse_args(argv)
+    if args.format == "msgpack":
+        ensure_msgpack_available()
+    output = args.output or args.xml.with_suffix(OUTPUT_SUFFIXES[args.format])
+    convert_openvas(args.xml, output, args.format)
+    print(f"[OK] Rapport OpenVAS converti vers {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
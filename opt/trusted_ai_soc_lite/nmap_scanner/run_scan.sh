@@ -12,6 +12,12 @@ SCAN_PROFILE="${SCAN_PROFILE:-full}"
 PROFILES_DIR="${PROFILES_DIR:-${SCRIPT_DIR}/profiles.d}"
 PROFILE_FILE="${PROFILES_DIR}/${SCAN_PROFILE}.env"
 EXTRA_NMAP_ARGS="${EXTRA_NMAP_ARGS:-}"
+REPORT_JSONL="${REPORT_JSONL:-0}"
+REPORT_FORMAT="${REPORT_FORMAT:-json}"
+if [ "${REPORT_JSONL}" = "1" ]; then
+  REPORT_FORMAT="jsonl"
+fi
+KEEP_JSON_REPORT="${KEEP_JSON_REPORT:-1}"
 AI_AUTORUN="${AI_AUTORUN:-1}"
 AI_ENGINE_DIR="${AI_ENGINE_DIR:-${PROJECT_ROOT}/ai_engine}"
 AI_MODEL_PATH="${AI_MODEL_PATH:-${AI_ENGINE_DIR}/models/model.pkl}"
@@ -23,6 +29,11 @@ AI_DISABLE_SHAP="${AI_DISABLE_SHAP:-0}"
 AI_DISABLE_LIME="${AI_DISABLE_LIME:-0}"
 AI_TI_OFFLINE="${AI_TI_OFFLINE:-0}"
 AI_EXTRA_ARGS="${AI_EXTRA_ARGS:-}"
+AI_DIFF_STATE="${AI_DIFF_STATE:-}"
+AI_FEATURE_CACHE="${AI_FEATURE_CACHE:-}"
+AI_FROM_XML="${AI_FROM_XML:-0}"
+AI_FOLLOW="${AI_FOLLOW:-0}"
+RESPONSE_WATCH_INTERVAL="${RESPONSE_WATCH_INTERVAL:-5}"
 RESPONSE_AUTORUN="${RESPONSE_AUTORUN:-0}"
 RESPONSE_ENGINE_DIR="${RESPONSE_ENGINE_DIR:-${PROJECT_ROOT}/response_engine}"
 RESPONDER_SCRIPT="${RESPONDER_SCRIPT:-${RESPONSE_ENGINE_DIR}/responder.py}"
@@ -172,16 +183,146 @@ if [ -n "${EXTRA_NMAP_ARGS}" ]; then
   NMAP_ARGS+=("${EXTRA_ARGS_ARRAY[@]}")
 fi
 
+# Construit ANALYSE_CMD pour le rapport passé en argument.
+build_analyse_cmd() {
+  ANALYSE_CMD=(
+    python3 "${AI_ENGINE_DIR}/analyse_scan.py"
+    "$1"
+    --model "${AI_MODEL_PATH}"
+    --log-file "${AI_LOG_FILE}"
+    --audit-file "${AI_AUDIT_FILE}"
+    --scan-history "${AI_SCAN_HISTORY}"
+    --ti-cache "${TI_CACHE_FILE}"
+  )
+  if [ "${AI_DISABLE_SHAP}" = "1" ]; then
+    ANALYSE_CMD+=(--disable-shap)
+  fi
+  if [ "${AI_DISABLE_LIME}" = "1" ]; then
+    ANALYSE_CMD+=(--disable-lime)
+  fi
+  if [ "${AI_TI_OFFLINE}" = "1" ]; then
+    ANALYSE_CMD+=(--ti-offline)
+  fi
+  if [ -n "${AI_DIFF_STATE}" ]; then
+    ANALYSE_CMD+=(--diff-state "${AI_DIFF_STATE}")
+  fi
+  if [ -n "${AI_FEATURE_CACHE}" ]; then
+    ANALYSE_CMD+=(--feature-cache "${AI_FEATURE_CACHE}")
+  fi
+  if [ -n "${AI_EXTRA_ARGS}" ]; then
+    # shellcheck disable=SC2206
+    EXTRA_AI_ARGS=(${AI_EXTRA_ARGS})
+    ANALYSE_CMD+=("${EXTRA_AI_ARGS[@]}")
+  fi
+}
+
+build_responder_cmd() {
+  RESPONDER_CMD=(
+    python3 "${RESPONDER_SCRIPT}"
+    --ai-log "${AI_LOG_FILE}"
+    --actions-log "${RESPONSE_ACTIONS_LOG}"
+    --audit-file "${RESPONSE_AUDIT_FILE}"
+    --state-file "${RESPONDER_STATE_FILE}"
+  )
+  if [ -n "${RESPONSE_ALERT_EMAIL}" ]; then
+    RESPONDER_CMD+=(--mailto "${RESPONSE_ALERT_EMAIL}")
+  else
+    RESPONDER_CMD+=(--disable-email)
+  fi
+  if [ "${RESPONDER_DISABLE_EMAIL}" = "1" ]; then
+    RESPONDER_CMD+=(--disable-email)
+  fi
+  if [ "${RESPONDER_DISABLE_UFW}" = "1" ]; then
+    RESPONDER_CMD+=(--disable-ufw)
+  fi
+  if [ "${RESPONDER_DRY_RUN}" = "1" ]; then
+    RESPONDER_CMD+=(--dry-run)
+  fi
+  if [ -n "${RESPONDER_EXTRA_ARGS}" ]; then
+    # shellcheck disable=SC2206
+    EXTRA_RESPONDER_ARGS=(${RESPONDER_EXTRA_ARGS})
+    RESPONDER_CMD+=("${EXTRA_RESPONDER_ARGS[@]}")
+  fi
+}
+
+activate_ai_venv() {
+  mkdir -p "$(dirname "${AI_LOG_FILE}")"
+  mkdir -p "$(dirname "${AI_AUDIT_FILE}")"
+  AI_VENV_ACTIVATE="${AI_ENGINE_DIR}/venv/bin/activate"
+  if [ -f "${AI_VENV_ACTIVATE}" ]; then
+    # shellcheck disable=SC1091
+    source "${AI_VENV_ACTIVATE}"
+  else
+    echo "[INFO] Aucun venv détecté dans ${AI_ENGINE_DIR} → utilisation de python3 système"
+  fi
+}
+
 echo "[INFO] Profil ${PROFILE_NAME} → ${PROFILE_DESC}"
 echo "[INFO] Lancement du scan Nmap avancé (${TARGETS_FILE})"
-nmap "${NMAP_ARGS[@]}" -oX "${XML_REPORT}" -iL "${TARGETS_FILE}"
-
-echo "[INFO] Conversion XML -> JSON"
-python3 "${SCRIPT_DIR}/parse_nmap.py" "${XML_REPORT}"
+if [ "${AI_FOLLOW}" = "1" ] && [ "${AI_AUTORUN}" = "1" ] && [ -f "${AI_ENGINE_DIR}/analyse_scan.py" ]; then
+  # Mode direct : l'IA suit le XML pendant que Nmap l'écrit, le responder
+  # surveille le journal IA ; un hôte critique est traité sans attendre la fin du scan.
+  echo "[INFO] AI_FOLLOW=1 → analyse IA en direct pendant le scan"
+  activate_ai_venv
+  nmap "${NMAP_ARGS[@]}" -oX "${XML_REPORT}" -iL "${TARGETS_FILE}" &
+  NMAP_PID=$!
+  build_analyse_cmd "${XML_REPORT}"
+  ANALYSE_CMD+=(--follow --follow-pid "${NMAP_PID}")
+  "${ANALYSE_CMD[@]}" &
+  FOLLOW_PID=$!
+  WATCH_PID=""
+  if [ "${RESPONSE_AUTORUN}" = "1" ] && [ -f "${RESPONDER_SCRIPT}" ]; then
+    build_responder_cmd
+    RESPONDER_CMD+=(--watch "${RESPONSE_WATCH_INTERVAL}" --watch-pid "${FOLLOW_PID}")
+    "${RESPONDER_CMD[@]}" &
+    WATCH_PID=$!
+  fi
+  NMAP_STATUS=0
+  wait "${NMAP_PID}" || NMAP_STATUS=$?
+  if wait "${FOLLOW_PID}"; then
+    echo "[OK] Analyse IA en direct terminée"
+  else
+    echo "[ERREUR] L'analyse IA en direct a échoué" >&2
+  fi
+  if [ -n "${WATCH_PID}" ]; then
+    wait "${WATCH_PID}" || echo "[AVERTISSEMENT] Le responder en direct a rencontré une erreur" >&2
+  fi
+  if [ "${NMAP_STATUS}" != "0" ]; then
+    echo "[ERREUR] nmap s'est terminé avec le code ${NMAP_STATUS}" >&2
+    exit "${NMAP_STATUS}"
+  fi
+  # Analyse et réponse déjà effectuées : seules les conversions restent à faire.
+  AI_FROM_XML=1
+  AI_AUTORUN=0
+  RESPONSE_AUTORUN=0
+  FOLLOW_DONE=1
+else
+  nmap "${NMAP_ARGS[@]}" -oX "${XML_REPORT}" -iL "${TARGETS_FILE}"
+  FOLLOW_DONE=0
+fi
 
 JSON_REPORT="${XML_REPORT%.xml}.json"
-if [ ! -f "${JSON_REPORT}" ]; then
-  echo "[ERREUR] ${JSON_REPORT} introuvable → impossible de lancer l'analyse IA" >&2
+if [ "${AI_FROM_XML}" = "1" ] && [ "${KEEP_JSON_REPORT}" = "0" ]; then
+  echo "[INFO] AI_FROM_XML=1 et KEEP_JSON_REPORT=0 → pas de rapport JSON intermédiaire"
+elif [ "${REPORT_FORMAT}" = "jsonl" ] || [ "${REPORT_FORMAT}" = "msgpack" ]; then
+  echo "[INFO] Conversion XML -> ${REPORT_FORMAT} (streaming)"
+  python3 "${SCRIPT_DIR}/parse_nmap.py" --format "${REPORT_FORMAT}" "${XML_REPORT}"
+  JSON_REPORT="${XML_REPORT%.xml}.${REPORT_FORMAT}"
+else
+  echo "[INFO] Conversion XML -> JSON"
+  python3 "${SCRIPT_DIR}/parse_nmap.py" "${XML_REPORT}"
+fi
+
+if [ "${AI_FROM_XML}" = "1" ]; then
+  AI_INPUT_REPORT="${XML_REPORT}"
+else
+  AI_INPUT_REPORT="${JSON_REPORT}"
+fi
+
+if [ ! -f "${AI_INPUT_REPORT}" ]; then
+  echo "[ERREUR] ${AI_INPUT_REPORT} introuvable → impossible de lancer l'analyse IA" >&2
+elif [ "${FOLLOW_DONE}" = "1" ]; then
+  echo "[INFO] Analyse IA et réponse déjà réalisées en direct"
 else
   if [ "${AI_AUTORUN}" = "1" ]; then
     DEFAULT_AI_ENGINE_DIR="/opt/trusted_ai_soc_lite/ai_engine"
@@ -190,38 +331,8 @@ else
     if [ ! -f "${AI_ENGINE_DIR}/analyse_scan.py" ]; then
       echo "[AVERTISSEMENT] ${AI_ENGINE_DIR}/analyse_scan.py introuvable → saute l'analyse IA" >&2
     else
-      mkdir -p "$(dirname "${AI_LOG_FILE}")"
-      mkdir -p "$(dirname "${AI_AUDIT_FILE}")"
-      AI_VENV_ACTIVATE="${AI_ENGINE_DIR}/venv/bin/activate"
-      if [ -f "${AI_VENV_ACTIVATE}" ]; then
-        # shellcheck disable=SC1091
-        source "${AI_VENV_ACTIVATE}"
-      else
-        echo "[INFO] Aucun venv détecté dans ${AI_ENGINE_DIR} → utilisation de python3 système"
-      fi
-      ANALYSE_CMD=(
-        python3 "${AI_ENGINE_DIR}/analyse_scan.py"
-        "${JSON_REPORT}"
-        --model "${AI_MODEL_PATH}"
-        --log-file "${AI_LOG_FILE}"
-        --audit-file "${AI_AUDIT_FILE}"
-        --scan-history "${AI_SCAN_HISTORY}"
-        --ti-cache "${TI_CACHE_FILE}"
-      )
-      if [ "${AI_DISABLE_SHAP}" = "1" ]; then
-        ANALYSE_CMD+=(--disable-shap)
-      fi
-      if [ "${AI_DISABLE_LIME}" = "1" ]; then
-        ANALYSE_CMD+=(--disable-lime)
-      fi
-      if [ "${AI_TI_OFFLINE}" = "1" ]; then
-        ANALYSE_CMD+=(--ti-offline)
-      fi
-      if [ -n "${AI_EXTRA_ARGS}" ]; then
-        # shellcheck disable=SC2206
-        EXTRA_AI_ARGS=(${AI_EXTRA_ARGS})
-        ANALYSE_CMD+=("${EXTRA_AI_ARGS[@]}")
-      fi
+      activate_ai_venv
+      build_analyse_cmd "${AI_INPUT_REPORT}"
       if "${ANALYSE_CMD[@]}"; then
         echo "[OK] Analyse IA terminée"
       else
@@ -238,39 +349,14 @@ if [ "${RESPONSE_AUTORUN}" = "1" ]; then
     echo "[AVERTISSEMENT] ${RESPONDER_SCRIPT} introuvable → saut de la réponse automatique" >&2
   else
     echo "[INFO] Déclenchement du responder automatique"
-    RESPONDER_CMD=(
-      python3 "${RESPONDER_SCRIPT}"
-      --ai-log "${AI_LOG_FILE}"
-      --actions-log "${RESPONSE_ACTIONS_LOG}"
-      --audit-file "${RESPONSE_AUDIT_FILE}"
-      --state-file "${RESPONDER_STATE_FILE}"
-    )
-    if [ -n "${RESPONSE_ALERT_EMAIL}" ]; then
-      RESPONDER_CMD+=(--mailto "${RESPONSE_ALERT_EMAIL}")
-    else
-      RESPONDER_CMD+=(--disable-email)
-    fi
-    if [ "${RESPONDER_DISABLE_EMAIL}" = "1" ]; then
-      RESPONDER_CMD+=(--disable-email)
-    fi
-    if [ "${RESPONDER_DISABLE_UFW}" = "1" ]; then
-      RESPONDER_CMD+=(--disable-ufw)
-    fi
-    if [ "${RESPONDER_DRY_RUN}" = "1" ]; then
-      RESPONDER_CMD+=(--dry-run)
-    fi
-    if [ -n "${RESPONDER_EXTRA_ARGS}" ]; then
-      # shellcheck disable=SC2206
-      EXTRA_RESPONDER_ARGS=(${RESPONDER_EXTRA_ARGS})
-      RESPONDER_CMD+=("${EXTRA_RESPONDER_ARGS[@]}")
-    fi
+    build_responder_cmd
     if "${RESPONDER_CMD[@]}"; then
       echo "[OK] Actions de réponse orchestrées"
     else
       echo "[AVERTISSEMENT] Le responder automatique a rencontré une erreur" >&2
     fi
   fi
-else
+elif [ "${FOLLOW_DONE}" != "1" ]; then
   echo "[INFO] RESPONSE_AUTORUN=0 → réponse automatique désactivée"
 fi
 
@@ -6,12 +6,17 @@ import argparse
 import json
 import os
 import subprocess
+import sys
+import time
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Dict, List
 
 from mailer import send_alert
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "ai_engine"))
+from audit_store import open_audit_store  # noqa: E402
+
 DEFAULT_AI_LOG = "/opt/trusted_ai_soc_lite/ai_engine/logs/ia_events.log"
 DEFAULT_ACTIONS_LOG = "/opt/trusted_ai_soc_lite/response_engine/actions.log"
 DEFAULT_AUDIT_FILE = "/opt/trusted_ai_soc_lite/audit/response_actions.json"
@@ -47,6 +52,12 @@ def save_state(path: Path, state: ResponderState) -> None:
 
 
 def read_new_events(ai_log: Path, offset: int) -> tuple[List[Dict[str, Any]], int]:
+    """Read complete lines appended since ``offset``.
+
+    The offset only advances past the last newline: a line still being written
+    (the writer appends whole batches, see ai_engine/event_log.py) is read on the
+    next pass instead of being dropped.
+    """
     if not ai_log.exists():
         return [], offset
 
@@ -54,12 +65,12 @@ def read_new_events(ai_log: Path, offset: int) -> tuple[List[Dict[str, Any]], in
     with ai_log.open("rb") as handle:
         handle.seek(offset)
         chunk = handle.read()
-        new_offset = handle.tell()
 
-    if not chunk:
+    complete = chunk.rfind(b"\n") + 1
+    if not complete:
         return [], offset
 
-    for line in chunk.decode("utf-8").splitlines():
+    for line in chunk[:complete].decode("utf-8").splitlines():
         line = line.strip()
         if not line:
             continue
@@ -67,7 +78,7 @@ def read_new_events(ai_log: Path, offset: int) -> tuple[List[Dict[str, Any]], in
             events.append(json.loads(line))
         except json.JSONDecodeError:
             continue
-    return events, new_offset
+    return events, offset + complete
 
 
 def format_timestamp(value: str | None) -> str:
@@ -96,18 +107,11 @@ def run_ufw(
 
 
 def append_audit(audit_file: Path, entries: List[Dict[str, Any]]) -> None:
-    audit_file.parent.mkdir(parents=True, exist_ok=True)
-    existing: List[Dict[str, Any]] = []
-    if audit_file.exists():
-        try:
-            existing = json.loads(audit_file.read_text())
-        except json.JSONDecodeError:
-            existing = []
-    existing.extend(entries)
-    audit_file.write_text(json.dumps(existing, indent=2))
+    """Append entries to the segmented audit log (see ai_engine/audit_store.py)."""
+    open_audit_store(audit_file).append_many(entries)
 
 
-def orchestrate(args: argparse.Namespace) -> None:
+def orchestrate(args: argparse.Namespace, *, quiet: bool = False) -> int:
     state_path = Path(args.state_file)
     ai_log = Path(args.ai_log)
     actions_log = Path(args.actions_log)
@@ -118,9 +122,10 @@ def orchestrate(args: argparse.Namespace) -> None:
     events, new_offset = read_new_events(ai_log, state.offset)
 
     if not events:
-        print("[INFO] Aucune nouvelle décision IA à traiter")
+        if not quiet:
+            print("[INFO] Aucune nouvelle décision IA à traiter")
         save_state(state_path, state)
-        return
+        return 0
 
     state.offset = new_offset
     save_state(state_path, state)
@@ -193,6 +198,32 @@ def orchestrate(args: argparse.Namespace) -> None:
 
     append_audit(audit_file, recorded_actions)
     print(f"[OK] {len(recorded_actions)} actions de réponse journalisées")
+    return len(recorded_actions)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def watch(args: argparse.Namespace) -> None:
+    """Relance ``orchestrate`` toutes les ``args.watch`` secondes.
+
+    Avec ``--watch-pid``, la boucle s'arrête (après un dernier passage) quand le
+    processus surveillé, typiquement ``analyse_scan.py --follow``, se termine.
+    """
+
+    while True:
+        producer_done = args.watch_pid is not None and not _pid_alive(args.watch_pid)
+        orchestrate(args, quiet=True)
+        if producer_done:
+            return
+        time.sleep(args.watch)
 
 
 def parse_args() -> argparse.Namespace:
@@ -206,8 +237,19 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--disable-email", action="store_true")
     parser.add_argument("--disable-ufw", action="store_true")
     parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument(
+        "--watch",
+        type=float,
+        metavar="SECONDS",
+        help="Surveille le journal IA en continu (intervalle en secondes)",
+    )
+    parser.add_argument("--watch-pid", type=int, help="Avec --watch : s'arrête quand ce processus se termine")
     return parser.parse_args()
 
 
 if __name__ == "__main__":
-    orchestrate(parse_args())
+    cli_args = parse_args()
+    if cli_args.watch:
+        watch(cli_args)
+    else:
+        orchestrate(cli_args)
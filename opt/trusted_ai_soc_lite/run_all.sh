@@ -11,6 +11,10 @@ AI_AUTORUN="${AI_AUTORUN:-1}"
 RESPONSE_AUTORUN="${RESPONSE_AUTORUN:-1}"
 TI_OFFLINE=0
 LOOP_INTERVAL=""
+AI_DIFF_STATE="${AI_DIFF_STATE:-}"
+AI_FEATURE_CACHE="${AI_FEATURE_CACHE:-}"
+AI_SCORING_DAEMON="${AI_SCORING_DAEMON:-1}"
+SCORING_DAEMON_PID=""
 DRY_RUN=0
 EXTRA_NMAP_ARGS=""
 AI_EXTRA_ARGS=""
@@ -38,6 +42,9 @@ Options:
       --openvas                                  Trigger the OpenVAS helper before Nmap
       --openvas-args "..."                       Arguments for the OpenVAS helper
       --loop <seconds>                           Rerun the full pipeline every N seconds
+                                                 (only new/changed hosts are re-scored)
+      --no-diff                                  With --loop: re-score every host on each pass
+      --no-scoring-daemon                        With --loop: do not keep a resident scoring service
       --dry-run                                  Print the resolved commands without executing
       --help                                     Display this message
 USAGE
@@ -58,6 +65,22 @@ run_openvas_helper() {
   python3 "${OPENVAS_LAUNCHER}" "${helper_args[@]}"
 }
 
+# En boucle, un service de scoring résident garde le modèle chargé entre les passages ;
+# analyse_scan.py l'utilise via ai_engine/logs/scoring.sock.
+start_scoring_daemon() {
+  local daemon="${PROJECT_ROOT}/ai_engine/scoring_daemon.py"
+  local model="${AI_MODEL_PATH:-${PROJECT_ROOT}/ai_engine/models/model.pkl}"
+  if [ "${DRY_RUN}" = "1" ]; then
+    echo "[DRY-RUN] python3 ${daemon} --model ${model} &"
+    return 0
+  fi
+  mkdir -p "${PROJECT_ROOT}/ai_engine/logs"
+  python3 "${daemon}" --model "${model}" >>"${PROJECT_ROOT}/ai_engine/logs/scoring_daemon.log" 2>&1 &
+  SCORING_DAEMON_PID=$!
+  trap 'kill "${SCORING_DAEMON_PID}" 2>/dev/null || true' EXIT
+  echo "[INFO] Service de scoring résident démarré (pid ${SCORING_DAEMON_PID})"
+}
+
 run_pipeline_once() {
   if [ "${RUN_OPENVAS}" = "1" ]; then
     run_openvas_helper
@@ -81,6 +104,8 @@ run_pipeline_once() {
     "AI_TI_OFFLINE=${TI_OFFLINE}"
     "EXTRA_NMAP_ARGS=${EXTRA_NMAP_ARGS}"
     "AI_EXTRA_ARGS=${AI_EXTRA_ARGS}"
+    "AI_DIFF_STATE=${AI_DIFF_STATE}"
+    "AI_FEATURE_CACHE=${AI_FEATURE_CACHE}"
     "RESPONDER_EXTRA_ARGS=${RESPONDER_EXTRA_ARGS}"
   )
 
@@ -121,6 +146,10 @@ while [[ $# -gt 0 ]]; do
       OPENVAS_ARGS="$2"; shift 2;;
     --loop)
       LOOP_INTERVAL="$2"; shift 2;;
+    --no-diff)
+      AI_DIFF_STATE="none"; shift;;
+    --no-scoring-daemon)
+      AI_SCORING_DAEMON=0; shift;;
     --dry-run)
       DRY_RUN=1; shift;;
     --help|-h)
@@ -132,6 +161,20 @@ while [[ $# -gt 0 ]]; do
   esac
 done
 
+if [ "${AI_DIFF_STATE}" = "none" ]; then
+  AI_DIFF_STATE=""
+elif [ -n "${LOOP_INTERVAL}" ] && [ -z "${AI_DIFF_STATE}" ]; then
+  # En boucle, la plupart des hôtes sont inchangés d'un passage à l'autre.
+  AI_DIFF_STATE="${PROJECT_ROOT}/ai_engine/logs/scan_diff_state.json"
+fi
+if [ -n "${LOOP_INTERVAL}" ] && [ -z "${AI_FEATURE_CACHE}" ]; then
+  AI_FEATURE_CACHE="${PROJECT_ROOT}/ai_engine/logs/feature_cache.sqlite"
+fi
+
+if [ -n "${LOOP_INTERVAL}" ] && [ "${AI_AUTORUN}" = "1" ] && [ "${AI_SCORING_DAEMON}" = "1" ]; then
+  start_scoring_daemon
+fi
+
 run_pipeline_once
 
 if [ -n "${LOOP_INTERVAL}" ]; then